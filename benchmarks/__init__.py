@@ -0,0 +1 @@
+"""Local, network-free benchmarks for the market research pipeline."""
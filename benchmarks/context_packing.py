@@ -0,0 +1,119 @@
+"""
+Field-recall benchmark: relevance-ranked context packing vs plain truncation.
+
+For each page we know which facts (feature names, pricing tiers and prices,
+case-study customers) an extractor would need. A fact is "recalled" when it
+survives into the context that would be sent to the LLM.
+
+Usage:
+    python -m benchmarks.context_packing [--pages 200] [--budget 2000]
+    python -m benchmarks.context_packing --corpus DIR
+
+A corpus directory holds `<name>.txt` scraped page text with a sidecar
+`<name>.json` of {"field": ["fact", ...]} expected facts.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+from typing import Dict, List, Tuple
+
+from core.context import pack_context, DEFAULT_TOKEN_BUDGET
+
+FEATURES = ["Mobile App", "API access", "SSO", "Analytics Dashboard", "Webhooks"]
+
+_FLUFF = [
+    "Transform the way your team works with the next generation platform.",
+    "Join thousands of innovative companies who trust us every day.",
+    "Built for speed, designed for scale, loved by teams everywhere.",
+    "Unlock productivity and delight your stakeholders with beautiful workflows.",
+    "Book a demo today and see why analysts call us a leader.",
+    "Our mission is to empower every organization to achieve more.",
+    "Award-winning support available around the clock in every time zone.",
+    "Start your journey now and experience the difference yourself.",
+]
+_TIERS = ["Starter", "Team", "Business", "Growth", "Enterprise"]
+_CUSTOMERS = ["Globex", "Initech", "Umbrella Corp", "Hooli", "Stark Industries", "Wayne Enterprises"]
+
+
+def synthetic_page(rng: random.Random) -> Tuple[str, Dict[str, List[str]]]:
+    """A vendor page with a long hero section and the useful sections further down."""
+    hero = " ".join(rng.choice(_FLUFF) for _ in range(rng.randint(80, 180)))
+    present = [f for f in FEATURES if rng.random() < 0.6]
+    features = " ".join(f"{f}: our {f} lets you work smarter and connect every tool." for f in present)
+    features += " " + " ".join(rng.choice(_FLUFF) for _ in range(rng.randint(5, 20)))
+    tiers = rng.sample(_TIERS, rng.randint(2, 4))
+    prices = [f"${rng.randint(5, 200)}" for _ in tiers]
+    pricing = "Pricing plans. " + " ".join(
+        f"{t} plan {p} per user per month billed annually." for t, p in zip(tiers, prices))
+    customer = rng.choice(_CUSTOMERS)
+    case = (f"Customer story: {customer} reduced onboarding time by {rng.randint(20, 70)}% "
+            f"after switching. Read the case study.")
+    filler = " ".join(rng.choice(_FLUFF) for _ in range(rng.randint(10, 40)))
+    sections = [features, filler, pricing, case]
+    rng.shuffle(sections)
+    text = "Acme Cloud - the all-in-one workspace. " + hero + " " + " ".join(sections)
+    facts = {
+        "features": present,
+        "pricing_tiers": tiers + prices,
+        "case_study": [customer],
+    }
+    return text, facts
+
+
+def load_corpus(directory: str) -> List[Tuple[str, Dict[str, List[str]]]]:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        with open(os.path.splitext(path)[0] + ".json", encoding="utf-8") as f:
+            pages.append((text, json.load(f)))
+    return pages
+
+
+def recall(context: str, facts: Dict[str, List[str]]) -> Dict[str, Tuple[int, int]]:
+    lowered = context.lower()
+    return {field: (sum(1 for v in values if v.lower() in lowered), len(values))
+            for field, values in facts.items()}
+
+
+def run(pages: List[Tuple[str, Dict[str, List[str]]]], budget: int) -> Dict[str, Dict[str, float]]:
+    totals = {"truncate": {}, "packed": {}}
+    for text, facts in pages:
+        contexts = {
+            "truncate": text[:budget * 4],
+            "packed": pack_context(text, FEATURES, budget),
+        }
+        for method, context in contexts.items():
+            for field, (hit, total) in recall(context, facts).items():
+                h, t = totals[method].get(field, (0, 0))
+                totals[method][field] = (h + hit, t + total)
+    return {method: {field: (h / t if t else 1.0) for field, (h, t) in fields.items()}
+            for method, fields in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic pages to generate")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Token budget per page")
+    parser.add_argument("--corpus", help="Directory of saved page text with expected facts")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        rng = random.Random(args.seed)
+        pages = [synthetic_page(rng) for _ in range(args.pages)]
+
+    results = run(pages, args.budget)
+    fields = sorted(results["truncate"])
+    print(f"Field recall over {len(pages)} pages at {args.budget} tokens")
+    print(f"{'Field':<16}" + "".join(f"{m:>12}" for m in results))
+    for field in fields:
+        print(f"{field:<16}" + "".join(f"{results[m][field]:>12.1%}" for m in results))
+
+
+if __name__ == "__main__":
+    main()
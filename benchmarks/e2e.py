@@ -0,0 +1,186 @@
+"""
+End-to-end pipeline benchmark against a fake Gemini and a local vendor site server.
+
+Runs the real LandscapeCreator (taxonomy + grounded discovery) and
+LandscapeUpdater (crawl, parse, batched extraction) for each landscape size.
+FakeGeminiClient (benchmarks.fake_gemini) stands in for the API and
+FixtureServer (benchmarks.fixture_server) for the vendor sites. Nothing
+touches the network and no API key is needed. Each size runs in a fresh
+process and reports:
+
+- vendors per minute (successfully extracted vendors over wall time)
+- p50/p95 latency per pipeline stage, from core.telemetry
+- quota utilization: LLM requests per minute against the configured RPM,
+  and the busiest quota window seen by the fake server
+- peak RSS of the process
+
+Usage:
+    python -m benchmarks.e2e [--sizes 10 100 1000] [--rpm 1200] [--latency 0.05]
+    python -m benchmarks.e2e --error-rate 0.05 --quota-rpm 600 --json results.json
+    python -m benchmarks.e2e --corpus DIR    # serve saved vendor pages
+
+The fake enforces --quota-rpm over --window seconds (default: the client's
+--rpm over 60s), so mismatched budgets show up as 429 retries. Set --window
+below 60 to make quota effects visible in short runs.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.isolated import run_isolated
+
+FEATURES = ["Mobile App", "API access", "SSO", "Analytics Dashboard", "Webhooks"]
+STAGES = [("llm", "analyze_market"), ("llm", "search_and_analyze"), ("llm", "extract_product_data"),
+          ("http", "fetch"), ("parse", "html"), ("scrape", "vendor")]
+
+
+def run_pipeline(size: int, options: dict) -> Dict:
+    """One full landscape build in this process; returns its measurements."""
+    # Budgets are read from the environment when the first limiter is created
+    os.environ["GEMINI_RPM"] = str(options["rpm"])
+    os.environ["GEMINI_TPM"] = str(options["tpm"])
+    if options["html_backend"]:
+        os.environ["HTML_EXTRACTOR"] = options["html_backend"]
+
+    from benchmarks.fake_gemini import FakeGeminiClient
+    from benchmarks.fixture_server import FixtureServer
+    from core.config import get_rate_limiter, get_telemetry
+    from core.crawler import SiteCrawler
+    from core.creator import LandscapeCreator
+    from core.fetcher import HttpFetcher
+    from core.llm_handler import LLMEngine
+    from core.retry import RetryPolicy
+    from core.updater import LandscapeUpdater, STATUS_OK
+
+    if not options["verbose"]:
+        logging.getLogger().setLevel(logging.WARNING)
+    model = options["model"]
+    with FixtureServer(size, options["corpus"], latency=options["site_latency"]) as server:
+        client = FakeGeminiClient(
+            vendors=size, site_url=server.url, latency=options["latency"], jitter=options["jitter"],
+            error_rate=options["error_rate"], rate_limit_rate=options["rate_limit_rate"],
+            quota_rpm=options["quota_rpm"] * options["window"] / 60.0, window_seconds=options["window"],
+            seed=options["seed"])
+        # Short backoffs: injected errors should cost retries, not minutes of sleeping
+        llm = LLMEngine(client, model, retry_policy=RetryPolicy(base_delay=0.05, max_delay=2.0))
+        creator = LandscapeCreator(llm)
+        # Every vendor shares the fixture host, so the per-domain politeness delay is disabled
+        fetcher = HttpFetcher(max_per_host=options["scrape_workers"], politeness_delay=0.0)
+        updater = LandscapeUpdater(llm, fetcher, context_budget=options["context_budget"],
+                                   crawler=SiteCrawler(fetcher, max_pages=options["crawl_pages"], use_sitemap=False),
+                                   html_backend=options["html_backend"])
+
+        started = time.perf_counter()
+        taxonomy = creator.build_taxonomy("Fixture market")
+        competitors = creator.find_competitors("Fixture market", taxonomy["divisions"])
+        rows = updater.update_many([c["official_website_url"] for c in competitors], FEATURES,
+                                   scrape_workers=options["scrape_workers"],
+                                   extract_workers=options["extract_workers"],
+                                   batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        fetcher.close()
+
+    limiter = get_rate_limiter(model)
+    ok = sum(1 for row in rows if row["status"] == STATUS_OK)
+    stages = {f"{s['kind']}:{s['stage']}": s for s in get_telemetry().stats()}
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "size": size,
+        "vendors_ok": ok,
+        "competitors": len(competitors),
+        "seconds": elapsed,
+        "vendors_per_minute": ok / elapsed * 60 if elapsed else 0.0,
+        "llm_requests": limiter.total_requests,
+        "throttle_seconds": limiter.total_wait_seconds,
+        "quota_utilization": limiter.total_requests / (options["rpm"] * elapsed / 60) if elapsed else 0.0,
+        "peak_window_utilization": client.peak_window_calls / (options["quota_rpm"] * options["window"] / 60.0),
+        "fake_errors": client.stats()["errors"],
+        "retries": llm.retry_policy.stats.as_dict()["retries"],
+        "stages": {name: {"calls": s["calls"], "p50_s": s["p50_s"], "p95_s": s["p95_s"]}
+                   for name, s in stages.items()},
+        "rss_peak": rss,
+    }
+
+
+def _child(size: int, options: dict, results):
+    try:
+        results.put(run_pipeline(size, options))
+    except BaseException as e:
+        results.put({"size": size, "error": f"{type(e).__name__}: {e}"})
+        raise
+
+
+def run_size(size: int, options: dict) -> Dict:
+    """Run one size in a fresh process, so limiters, telemetry and peak RSS start clean."""
+    result = run_isolated(_child, (size, options))
+    result.setdefault("size", size)
+    return result
+
+
+def print_report(results: List[Dict]):
+    print(f"\n{'vendors':>8}{'ok':>7}{'seconds':>9}{'vendors/min':>13}{'LLM req':>9}{'quota use':>11}"
+          f"{'peak window':>13}{'retries':>9}{'peak RSS MB':>13}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['size']:>8}  failed: {r['error']}")
+            continue
+        print(f"{r['size']:>8}{r['vendors_ok']:>7}{r['seconds']:>9.1f}{r['vendors_per_minute']:>13.1f}"
+              f"{r['llm_requests']:>9}{r['quota_utilization']:>11.1%}{r['peak_window_utilization']:>13.1%}"
+              f"{r['retries']:>9}{r['rss_peak'] / 1e6:>13.1f}")
+
+    print(f"\n{'stage latency (p50 / p95 s)':<30}" + "".join(f"{r['size']:>18}" for r in results if "error" not in r))
+    for kind, stage in STAGES:
+        name = f"{kind}:{stage}"
+        cells = []
+        for r in results:
+            if "error" in r:
+                continue
+            s = r["stages"].get(name)
+            cells.append(f"{s['p50_s']:.3f} / {s['p95_s']:.3f}" if s else "-")
+        print(f"{name:<30}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Vendors per landscape")
+    parser.add_argument("--model", default="gemini-2.5-flash-lite", help="Model name (for limits and cost)")
+    parser.add_argument("--rpm", type=float, default=1200, help="Client RPM budget (GEMINI_RPM)")
+    parser.add_argument("--tpm", type=float, default=10_000_000, help="Client TPM budget (GEMINI_TPM)")
+    parser.add_argument("--quota-rpm", type=float, help="RPM enforced by the fake API (default: --rpm)")
+    parser.add_argument("--window", type=float, default=60.0, help="Fake quota window in seconds")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake API latency per call")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Random extra API latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls failing with 429")
+    parser.add_argument("--site-latency", type=float, default=0.0, help="Fixture server latency per page")
+    parser.add_argument("--corpus", help="Directory of saved vendor pages (*.html) to serve")
+    parser.add_argument("--crawl-pages", type=int, default=4, help="Pages crawled per vendor")
+    parser.add_argument("--batch-size", type=int, default=4, help="Vendors per extraction request")
+    parser.add_argument("--scrape-workers", type=int, default=8)
+    parser.add_argument("--extract-workers", type=int, default=2)
+    parser.add_argument("--context-budget", type=int, default=2000, help="Input tokens per vendor")
+    parser.add_argument("--html-backend", help="HTML extractor backend (lxml or bs4)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Also write the raw results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's INFO logs")
+    args = parser.parse_args()
+
+    options = vars(args).copy()
+    options["quota_rpm"] = args.quota_rpm or args.rpm
+    results = []
+    for size in args.sizes:
+        print(f"[*] {size} vendors...", flush=True)
+        results.append(run_size(size, options))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Local stand-in for the google-genai client, for network-free benchmarks.
+
+FakeGeminiClient matches the parts of `genai.Client` the pipeline calls
+(`models.generate_content`, `models.generate_content_stream` and
+`aio.models.generate_content`) and answers from the request alone:
+
+- grounded search (a google_search tool): a JSON array of `vendors`
+  competitors whose URLs point at `site_url` (see fixture_server)
+- a schema-constrained request: a record matching `response_json_schema`,
+  with the company name taken from the vendor page in the prompt; batched
+  extraction prompts get one record per "### VENDOR <key>" section
+
+Latency, injected 503/429 errors, a per-minute quota window and token
+counts are configurable, and a seeded RNG keeps runs reproducible.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+_VENDOR_SECTION = re.compile(r"### VENDOR (\S+)\n")
+_VENDOR_NAME = re.compile(r"Vendor (\d+)")
+
+
+class FakeAPIError(Exception):
+    """Raised like google.genai's APIError; only the message is inspected by core.retry."""
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class FakeResponse:
+    def __init__(self, text: str, usage: Optional[_Usage] = None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+def fake_value(schema: dict, defs: dict, name: str = "", hint: str = ""):
+    """A value conforming to a (Pydantic-generated) JSON schema."""
+    if "$ref" in schema:
+        return fake_value(defs[schema["$ref"].split("/")[-1]], defs, name, hint)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return fake_value(options[0], defs, name, hint) if options else None
+    kind = schema.get("type")
+    if kind == "object":
+        if "properties" in schema:
+            return {key: fake_value(sub, defs, key, hint) for key, sub in schema["properties"].items()}
+        return {"SSO": True, "API access": True, "Mobile App": False}
+    if kind == "array":
+        return [fake_value(schema.get("items", {}), defs, name, hint) for _ in range(3)]
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 1
+    if name == "company_name":
+        return hint or "Vendor"
+    if "url" in name or "link" in name:
+        return "https://example.com/case-study"
+    return f"{hint} {name.replace('_', ' ')}".strip()
+
+
+class _Models:
+    def __init__(self, client: 'FakeGeminiClient'):
+        self._client = client
+
+    def generate_content(self, model: str, contents: str, config=None) -> FakeResponse:
+        self._client._admit(model)
+        return self._client._answer(contents, config)
+
+    def generate_content_stream(self, model: str, contents: str, config=None):
+        self._client._admit(model)
+        response = self._client._answer(contents, config)
+        text, size = response.text, 512
+        for start in range(0, len(text), size):
+            last = start + size >= len(text)
+            yield FakeResponse(text[start:start + size], response.usage_metadata if last else None)
+
+
+class _AsyncModels:
+    def __init__(self, client: 'FakeGeminiClient'):
+        self._client = client
+
+    async def generate_content(self, model: str, contents: str, config=None) -> FakeResponse:
+        delay = self._client._admit(model, sleep=False)
+        await asyncio.sleep(delay)
+        return self._client._answer(contents, config)
+
+
+class _Aio:
+    def __init__(self, client: 'FakeGeminiClient'):
+        self.models = _AsyncModels(client)
+
+
+class FakeGeminiClient:
+    """Deterministic fake Gemini client; thread-safe."""
+
+    def __init__(self, vendors: int = 10, site_url: str = "http://127.0.0.1:8000",
+                 latency: float = 0.05, jitter: float = 0.02, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, quota_rpm: Optional[float] = None,
+                 window_seconds: float = 60.0, output_tokens: Optional[int] = None, seed: int = 7):
+        """
+        Args:
+            vendors: Competitors returned by a grounded search
+            site_url: Base URL of the fixture server hosting /vendor-<n>/ pages
+            latency: Seconds per call (plus up to `jitter`)
+            jitter: Random extra latency
+            error_rate: Fraction of calls failing with 503 UNAVAILABLE
+            rate_limit_rate: Fraction of calls failing with a transient 429
+            quota_rpm: Requests allowed per quota window (None = unlimited);
+                       calls beyond it fail with 429 and a retryDelay hint
+            window_seconds: Length of the quota window
+            output_tokens: Fixed output token count (default: ~4 chars per token)
+            seed: RNG seed for latency and error injection
+        """
+        self.vendors = vendors
+        self.site_url = site_url.rstrip("/")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.quota_rpm = quota_rpm
+        self.window_seconds = window_seconds
+        self.output_tokens = output_tokens
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()
+        self.calls = 0
+        self.calls_by_model: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.peak_window_calls = 0
+        self.models = _Models(self)
+        self.aio = _Aio(self)
+
+    def _admit(self, model: str, sleep: bool = True) -> float:
+        """Count a call against the quota window and inject errors; returns (or sleeps) the latency."""
+        with self._lock:
+            now = time.monotonic()
+            self.calls += 1
+            self.calls_by_model[model] = self.calls_by_model.get(model, 0) + 1
+            while self._window and self._window[0] <= now - self.window_seconds:
+                self._window.popleft()
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            roll = self._rng.random()
+            error = None
+            if self.quota_rpm is not None and len(self._window) >= self.quota_rpm:
+                retry = max(0.0, self._window[0] + self.window_seconds - now)
+                error = ("quota", f"429 RESOURCE_EXHAUSTED. Quota exceeded for requests per minute. "
+                                  f"{{'retryDelay': '{retry:.2f}s'}}")
+            elif roll < self.error_rate:
+                error = ("unavailable", "503 UNAVAILABLE. The model is overloaded.")
+            elif roll < self.error_rate + self.rate_limit_rate:
+                error = ("rate_limited", "429 RESOURCE_EXHAUSTED. {'retryDelay': '0.1s'}")
+            else:
+                self._window.append(now)
+                self.peak_window_calls = max(self.peak_window_calls, len(self._window))
+            if error is not None:
+                self.errors[error[0]] = self.errors.get(error[0], 0) + 1
+        if error is not None:
+            raise FakeAPIError(error[1])
+        if sleep:
+            time.sleep(delay)
+        return delay
+
+    def _competitors(self) -> List[dict]:
+        return [{"company_name": f"Vendor {i}", "product_name": f"Product {i}",
+                 "official_website_url": f"{self.site_url}/vendor-{i}/",
+                 "description": f"Fixture vendor {i}"} for i in range(self.vendors)]
+
+    def _answer(self, prompt: str, config) -> FakeResponse:
+        tools = getattr(config, "tools", None) or []
+        schema = getattr(config, "response_json_schema", None)
+        if any(getattr(tool, "google_search", None) is not None for tool in tools):
+            data = self._competitors()
+        elif schema is None:
+            data = {}
+        elif schema.get("type") == "array":
+            defs = schema.get("$defs", {})
+            sections = _VENDOR_SECTION.split(prompt)[1:]
+            data = []
+            for key, body in zip(sections[::2], sections[1::2]):
+                record = fake_value(schema["items"], defs, hint=self._vendor_name(body))
+                record["vendor_key"] = key
+                data.append(record)
+        else:
+            data = fake_value(schema, schema.get("$defs", {}), hint=self._vendor_name(prompt))
+        text = json.dumps(data)
+        output = self.output_tokens if self.output_tokens is not None else max(1, len(text) // 4)
+        return FakeResponse(text, _Usage(max(1, len(prompt) // 4), output))
+
+    @staticmethod
+    def _vendor_name(text: str) -> str:
+        match = _VENDOR_NAME.search(text)
+        return f"Vendor {match.group(1)}" if match else "Vendor"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "errors": dict(self.errors), "peak_window_calls": self.peak_window_calls,
+                    "calls_by_model": dict(self.calls_by_model)}
@@ -0,0 +1,132 @@
+"""
+Local HTTP server hosting vendor sites for network-free benchmarks.
+
+Vendor n lives under /vendor-<n>/ with pricing, features and customers
+pages linked from its home page. Pages are either generated
+deterministically (see html_extraction.synthetic_page) or taken from a
+corpus of saved vendor pages, cycled across vendors. Responses carry an
+ETag, so conditional GETs from HttpFetcher get 304s on a second run.
+"""
+import glob
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from benchmarks.html_extraction import synthetic_page
+
+VENDOR_PAGES = ("", "pricing", "features", "customers")
+_PATH = re.compile(r"^/vendor-(\d+)/(\w*)/?$")
+
+
+class FixtureServer:
+    """
+    Threaded HTTP server on 127.0.0.1 (an ephemeral port by default), used
+    as a context manager:
+
+        with FixtureServer(vendors=100) as server:
+            urls = server.vendor_urls()
+    """
+
+    def __init__(self, vendors: int, corpus_dir: Optional[str] = None, latency: float = 0.0,
+                 port: int = 0, seed: int = 7):
+        """
+        Args:
+            vendors: Number of vendor sites
+            corpus_dir: Directory of saved *.html pages to serve instead of generated ones
+            latency: Seconds added to every response
+            port: Port to listen on (0 picks a free one)
+            seed: Seed for generated pages
+        """
+        self.vendors = vendors
+        self.latency = latency
+        self.seed = seed
+        self.corpus: List[bytes] = []
+        if corpus_dir:
+            for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+                with open(path, "rb") as f:
+                    self.corpus.append(f.read())
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def vendor_urls(self) -> List[str]:
+        return [f"{self.url}/vendor-{i}/" for i in range(self.vendors)]
+
+    def page(self, vendor: int, name: str) -> bytes:
+        """HTML for one vendor page, identical on every call."""
+        if self.corpus:
+            html = self.corpus[(vendor * len(VENDOR_PAGES) + VENDOR_PAGES.index(name)) % len(self.corpus)]
+        else:
+            html = synthetic_page(random.Random(f"{self.seed}-{vendor}-{name}"))
+        links = "".join(f'<a href="/vendor-{vendor}/{page}">{page or "home"}</a> ' for page in VENDOR_PAGES)
+        header = f"<header><h1>Vendor {vendor} {name}</h1>{links}</header>".encode("utf-8")
+        # Keep the crawler on the vendor's own pages: site-relative links in the page become anchors
+        html = html.replace(b"Acme Cloud", f"Vendor {vendor}".encode("utf-8")).replace(b'href="/', b'href="#')
+        body_at = html.find(b"<body>")
+        if body_at < 0:
+            return header + html
+        return html[:body_at + 6] + header + html[body_at + 6:]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like real vendor sites, so the fetcher's connection pool is exercised
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                match = _PATH.match(self.path.split("?")[0])
+                if not match or int(match.group(1)) >= server.vendors or match.group(2) not in VENDOR_PAGES:
+                    self.send_error(404)
+                    return
+                body = server.page(int(match.group(1)), match.group(2))
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                with server._lock:
+                    server.requests += 1
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                with server._lock:
+                    server.bytes_sent += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FixtureServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,163 @@
+"""
+HTML-to-text benchmark: streaming lxml extractor vs the BeautifulSoup path.
+
+Each backend runs in its own process over the same pages and reports
+throughput (pages/sec, best of --repeat passes), peak resident memory of
+that process, and peak Python heap during one pass (tracemalloc; libxml2's
+own buffers are only visible in the RSS figure). Outputs are then compared
+with the bs4 reference: exact matches and word-level similarity.
+
+Usage:
+    python -m benchmarks.html_extraction [--pages 300] [--repeat 3]
+    python -m benchmarks.html_extraction --corpus DIR
+    python -m benchmarks.html_extraction --http-cache .http_cache.sqlite
+
+A corpus directory holds saved vendor pages as `*.html`; --http-cache reads
+the page bodies stored by HttpFetcher's conditional-GET cache.
+"""
+import argparse
+import collections
+import glob
+import os
+import random
+import resource
+import sqlite3
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from benchmarks.isolated import run_isolated
+from core.extractors import EXTRACTOR_BACKENDS, get_extractor
+
+_WORDS = ["platform", "workflow", "teams", "analytics", "secure", "automation", "pricing", "customers",
+          "integrations", "dashboard", "enterprise", "support", "cloud", "data", "insights", "scale"]
+_FEATURES = ["Mobile App", "API access", "SSO", "Analytics Dashboard", "Webhooks", "Audit Log"]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 18))]
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_page(rng: random.Random) -> bytes:
+    """A marketing page with the usual boilerplate: head assets, inline scripts, nav, footer."""
+    scripts = "".join(f"<script>window.dataLayer=window.dataLayer||[];function f{i}(){{return {i}<2&&true}}"
+                      f"</script>" for i in range(rng.randint(3, 12)))
+    styles = "<style>" + " ".join(f".c{i}{{margin:{i}px}}" for i in range(rng.randint(50, 300))) + "</style>"
+    nav = "<nav><ul>" + "".join(f'<li><a href="/{w}">{w.title()}</a></li>' for w in _WORDS) + "</ul></nav>"
+    sections = []
+    for _ in range(rng.randint(5, 25)):
+        paragraphs = "".join(f"<p>{_sentence(rng)}\n      {_sentence(rng)} &amp; more&nbsp;&#8212; "
+                             f"<b>{rng.choice(_WORDS)}</b>{rng.choice(_WORDS)}</p>"
+                             for _ in range(rng.randint(1, 6)))
+        sections.append(f'<section class="s"><h2>{_sentence(rng)}</h2><!-- block -->{paragraphs}</section>')
+    features = "<ul>" + "".join(f"<li><span>{f}</span>: {_sentence(rng)}</li>"
+                                for f in rng.sample(_FEATURES, 4)) + "</ul>"
+    tiers = "".join(f"<tr><td>{tier}</td><td>${rng.randint(5, 200)}/user/mo</td></tr>"
+                    for tier in ("Starter", "Team", "Business", "Enterprise"))
+    footer = "<footer>" + "".join(f'<a href="/legal/{i}">Legal {i}</a> ' for i in range(20)) + "&copy; 2025</footer>"
+    html = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Acme Cloud — {rng.choice(_WORDS)}</title>'
+            f"{styles}{scripts}</head><body>{nav}<main><h1>Acme Cloud</h1>{''.join(sections)}{features}"
+            f"<table>{tiers}</table></main>{footer}{scripts}</body></html>")
+    return html.encode("utf-8")
+
+
+def load_corpus(directory: str) -> List[bytes]:
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def load_http_cache(path: str) -> List[bytes]:
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT content FROM pages WHERE content IS NOT NULL")]
+    finally:
+        conn.close()
+
+
+def _measure(backend: str, pages: List[bytes], repeat: int, results):
+    """Child process: time `repeat` passes, then one traced pass for the heap peak."""
+    extract = get_extractor(backend)
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        for page in pages:
+            extract(page)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for page in pages:
+        extract(page)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    results.put({"backend": backend, "seconds": best, "heap_peak": heap_peak, "rss_peak": rss})
+
+
+def measure(backend: str, pages: List[bytes], repeat: int) -> Dict:
+    """Run one backend in a fresh process so its memory peak is not mixed with the other's."""
+    result = run_isolated(_measure, (backend, pages, repeat))
+    result.setdefault("backend", backend)
+    return result
+
+
+def compare(pages: List[bytes], backend: str, reference: str = "bs4") -> Dict[str, float]:
+    """Exact-match rate and mean word-level similarity of `backend` against the reference output."""
+    expected, actual = get_extractor(reference), get_extractor(backend)
+    exact, similarity = 0, 0.0
+    for page in pages:
+        a, b = expected(page), actual(page)
+        if a == b:
+            exact += 1
+            similarity += 1.0
+            continue
+        words_a, words_b = collections.Counter(a.split()), collections.Counter(b.split())
+        total = max(sum(words_a.values()), sum(words_b.values()))
+        similarity += sum((words_a & words_b).values()) / total if total else 1.0
+    count = len(pages) or 1
+    return {"exact": exact / count, "similarity": similarity / count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300, help="Synthetic pages to generate")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per backend (best is reported)")
+    parser.add_argument("--corpus", help="Directory of saved vendor pages (*.html)")
+    parser.add_argument("--http-cache", help="HttpFetcher cache file to read saved pages from")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    elif args.http_cache:
+        pages = load_http_cache(args.http_cache)
+    else:
+        rng = random.Random(args.seed)
+        pages = [synthetic_page(rng) for _ in range(args.pages)]
+    if not pages:
+        print("No pages to benchmark")
+        return
+
+    megabytes = sum(len(p) for p in pages) / 1e6
+    print(f"HTML-to-text over {len(pages)} pages ({megabytes:.1f} MB)")
+    print(f"{'Backend':<8}{'pages/sec':>12}{'MB/sec':>10}{'peak RSS MB':>14}{'peak heap MB':>14}"
+          f"{'exact':>9}{'similar':>9}")
+    for backend in sorted(EXTRACTOR_BACKENDS):
+        result = measure(backend, pages, args.repeat)
+        if "error" in result:
+            print(f"{backend:<8}  failed: {result['error']}")
+            continue
+        equivalence = compare(pages, backend)
+        print(f"{backend:<8}{len(pages) / result['seconds']:>12.1f}{megabytes / result['seconds']:>10.1f}"
+              f"{result['rss_peak'] / 1e6:>14.1f}{result['heap_peak'] / 1e6:>14.1f}"
+              f"{equivalence['exact']:>9.1%}{equivalence['similarity']:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Run a benchmark step in a fresh spawned process and collect its result."""
+import multiprocessing
+import queue
+from typing import Callable, Dict
+
+# How often the parent checks that the child is still alive while waiting
+POLL_SECONDS = 1.0
+
+
+def run_isolated(target: Callable, args: tuple) -> Dict:
+    """Call `target(*args, results)` in a spawned process and return what it puts on `results`.
+
+    If the child dies without reporting (OOM kill, import failure at spawn),
+    returns {"error": ...} with its exit code instead of waiting forever.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=target, args=(*args, results))
+    process.start()
+    try:
+        while True:
+            try:
+                return results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+            # The child may have exited right after its result was flushed
+            try:
+                return results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                return {"error": f"process exited with code {process.exitcode} without a result"}
+    finally:
+        process.join()
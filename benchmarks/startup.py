@@ -0,0 +1,72 @@
+"""
+Startup-time report for the CLI.
+
+Times `import main` (and `core`) in fresh interpreters, and `main.py --help`
+and `main.py --list-runs` end to end, interpreter start included. Lists any
+module that only commands calling the API or scraping should load. The
+import-time budget and deferred imports are enforced by
+tests/test_startup.py; this script shows where the time goes.
+
+Usage:
+    python -m benchmarks.startup [--runs 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported until a command needs them (kept in sync with tests/test_startup.py)
+DEFERRED_MODULES = ("google.genai", "requests", "bs4", "lxml")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main, core
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def probe_import() -> dict:
+    """Import time and deferred modules loaded, measured in a fresh interpreter."""
+    output = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_command(args, env) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", *args], cwd=ROOT, env=env, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    probes = [probe_import() for _ in range(args.runs)]
+    import_s = statistics.median(p["seconds"] for p in probes)
+    loaded = sorted({m for p in probes for m in p["loaded"]})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # --list-runs reads the landscape DB; point it at an empty one
+        env = dict(os.environ, LANDSCAPE_DB_PATH=os.path.join(tmp, "landscape.sqlite"))
+        help_s = statistics.median(time_command(["--help"], env) for _ in range(args.runs))
+        list_s = statistics.median(time_command(["--list-runs"], env) for _ in range(args.runs))
+
+    print(f"{'import main':<24}{import_s:>8.3f}s")
+    print(f"{'main.py --help':<24}{help_s:>8.3f}s")
+    print(f"{'main.py --list-runs':<24}{list_s:>8.3f}s")
+    if loaded:
+        print(f"[!] Imported at startup: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,113 @@
 """
 Core module for market research tool
+
+Names are imported from their submodule on first access, so `import core`
+(and every command that only needs the store or the run journal) does not
+load the Gemini SDK, requests or BeautifulSoup.
 """
 
-from .config import setup_api_key, get_working_model, rate_limit
-from .llm_handler import LLMEngine
-from .creator import LandscapeCreator
-from .updater import LandscapeUpdater
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'setup_api_key': 'config',
+    'get_working_model': 'config',
+    'rate_limit': 'config',
+    'get_rate_limiter': 'config',
+    'get_circuit_breaker': 'config',
+    'set_quota_ledger': 'config',
+    'get_telemetry': 'config',
+    'RateLimiter': 'rate_limiter',
+    'SharedRateLimiter': 'rate_limiter',
+    'Telemetry': 'telemetry',
+    'RetryPolicy': 'retry',
+    'CircuitBreaker': 'retry',
+    'DailyQuotaExceeded': 'retry',
+    'RetryExhausted': 'retry',
+    'LLMCache': 'cache',
+    'ModelRouter': 'router',
+    'pack_context': 'context',
+    'JSONObjectStreamParser': 'json_stream',
+    'parse_json_objects': 'json_stream',
+    'ValidationStats': 'structured',
+    'response_schema': 'structured',
+    'HttpFetcher': 'fetcher',
+    'SiteCrawler': 'crawler',
+    'CompetitorIndex': 'discovery',
+    'url_key': 'discovery',
+    'OfflineBatch': 'batch',
+    'BatchBackend': 'batch',
+    'GeminiBatchBackend': 'batch',
+    'LocalBatchBackend': 'batch',
+    'SnapshotStore': 'snapshots',
+    'PageFingerprint': 'snapshots',
+    'diff_products': 'snapshots',
+    'LandscapeStore': 'store',
+    'RunJournal': 'runs',
+    'JobQueue': 'jobqueue',
+    'LLMEngine': 'llm_handler',
+    'AsyncLLMEngine': 'async_engine',
+    'LandscapeCreator': 'creator',
+    'AsyncLandscapeCreator': 'creator',
+    'LandscapeUpdater': 'updater',
+    'AsyncLandscapeUpdater': 'updater',
+    'WorkerPool': 'workers',
+}
 
 __all__ = [
     'setup_api_key',
     'get_working_model',
     'rate_limit',
+    'get_rate_limiter',
+    'RateLimiter',
+    'SharedRateLimiter',
+    'set_quota_ledger',
+    'get_circuit_breaker',
+    'get_telemetry',
+    'Telemetry',
+    'RetryPolicy',
+    'CircuitBreaker',
+    'DailyQuotaExceeded',
+    'RetryExhausted',
+    'LLMCache',
+    'ModelRouter',
+    'pack_context',
+    'JSONObjectStreamParser',
+    'parse_json_objects',
+    'ValidationStats',
+    'response_schema',
+    'HttpFetcher',
+    'SiteCrawler',
+    'CompetitorIndex',
+    'url_key',
+    'OfflineBatch',
+    'BatchBackend',
+    'GeminiBatchBackend',
+    'LocalBatchBackend',
+    'SnapshotStore',
+    'PageFingerprint',
+    'diff_products',
+    'LandscapeStore',
+    'RunJournal',
+    'JobQueue',
     'LLMEngine',
+    'AsyncLLMEngine',
     'LandscapeCreator',
-    'LandscapeUpdater'
-]
\ No newline at end of file
+    'AsyncLandscapeCreator',
+    'LandscapeUpdater',
+    'AsyncLandscapeUpdater',
+    'WorkerPool'
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
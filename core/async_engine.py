@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Type
+
+from google.genai import types
+from pydantic import BaseModel
+
+from core.cache import LLMCache, make_cache_key
+from core.config import get_rate_limiter, get_telemetry
+from core.context import DEFAULT_TOKEN_BUDGET
+from core.llm_handler import LLMEngine, record_usage
+from core.rate_limiter import RateLimiter, estimate_tokens, usage_prompt_tokens
+from core.retry import RetryPolicy
+from core.router import ModelRouter
+from core.structured import (
+    ValidationStats, load_record, load_records, merge_patch
+)
+from models.schemas import Product, LandscapeTaxonomy, Competitor
+
+
+class AsyncLLMEngine:
+    """
+    Asyncio-native counterpart of LLMEngine built on `client.aio`.
+
+    Prompts, configs and parsing come from an inner LLMEngine, so results
+    match the synchronous methods. Calls share the same per-model rate
+    limiter, circuit breaker and cache; waiting for quota yields to the
+    event loop instead of blocking it, and at most `max_concurrency`
+    requests are in flight at once.
+    """
+
+    def __init__(self, client, model_name: str, max_concurrency: int = 4,
+                 limiter: RateLimiter = None, retry_policy: RetryPolicy = None,
+                 cache: LLMCache = None, router: ModelRouter = None, max_repairs: int = 1):
+        """
+        Args:
+            client: google.genai Client (its `aio` attribute is used)
+            model_name: Model to call
+            max_concurrency: Maximum in-flight requests
+            limiter: Rate limiter (the shared per-model one by default; unused when routing)
+            retry_policy: Retry policy (per-model circuit breaker by default)
+            cache: Optional persistent response cache
+            router: Optional model router (created automatically for model 'auto')
+            max_repairs: Follow-up calls allowed per record that fails validation
+        """
+        self.engine = LLMEngine(client, model_name, limiter, retry_policy, cache, router, max_repairs)
+        self.client = client
+        self.model_name = model_name
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def limiter(self) -> Optional[RateLimiter]:
+        return self.engine.limiter
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return self.engine.retry_policy
+
+    @property
+    def cache(self) -> LLMCache:
+        return self.engine.cache
+
+    @property
+    def router(self) -> ModelRouter:
+        return self.engine.router
+
+    @property
+    def validation_stats(self) -> ValidationStats:
+        return self.engine.validation_stats
+
+    async def _safe_generate(self, prompt: str, config: types.GenerateContentConfig, method: str = None):
+        """Async version of LLMEngine._safe_generate; cache lookups run in a worker thread."""
+        with get_telemetry().span("llm", method or "request") as event:
+            if self.cache is not None:
+                cache_key = make_cache_key(self.engine.cache_model(method), prompt, config)
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached is not None:
+                    logging.info(f"Cache hit for {method or 'request'}, skipping API call")
+                    event["cache_hits"] = 1
+                    return cached
+
+            est_tokens = estimate_tokens(prompt)
+            event.update(throttle_s=0.0, request_s=0.0, attempts=0)
+
+            async def call_model(model_name: str, limiter: RateLimiter):
+                event["throttle_s"] += await limiter.acquire_async(est_tokens)
+                event["attempts"] += 1
+                event["model"] = model_name
+                async with self._semaphore:
+                    start = time.perf_counter()
+                    try:
+                        response = await self.client.aio.models.generate_content(
+                            model=model_name,
+                            contents=prompt,
+                            config=config
+                        )
+                    except Exception:
+                        # Rejected calls don't consume input tokens
+                        limiter.record_usage(est_tokens, 0)
+                        raise
+                    finally:
+                        event["request_s"] += time.perf_counter() - start
+                limiter.record_usage(est_tokens, usage_prompt_tokens(response))
+                return response
+
+            async def attempt():
+                if self.router is None:
+                    return await call_model(self.model_name, self.limiter)
+                return await self.router.call_async(
+                    method, est_tokens, lambda m: call_model(m, get_rate_limiter(m)))
+
+            try:
+                response = await self.retry_policy.call_async(attempt)
+            finally:
+                event["retries"] = max(0, event["attempts"] - 1)
+            record_usage(event, response)
+            return response
+
+    async def analyze_market(self, topic: str) -> dict:
+        prompt, config = self.engine.build_market_request(topic)
+        response = await self._safe_generate(prompt, config, method="analyze_market")
+        taxonomy = await self.validate_record(LandscapeTaxonomy, load_record(response.text), prompt, config,
+                                              "analyze_market")
+        await asyncio.to_thread(self.engine.store_validated, prompt, config, "analyze_market", taxonomy, response)
+        return taxonomy
+
+    async def validate_record(self, model_cls: Type[BaseModel], record: dict, prompt: str,
+                              config: types.GenerateContentConfig, method: str = None) -> dict:
+        """Async version of LLMEngine.validate_record."""
+        for attempt in range(self.engine.max_repairs + 1):
+            result, repair = self.engine._validation_step(model_cls, record, prompt, config, method, attempt)
+            if repair is None:
+                return result
+            repair_prompt, repair_config, fields = repair
+            response = await self._safe_generate(repair_prompt, repair_config, method=method)
+            record = merge_patch(record, load_record(response.text), fields)
+
+    async def validate_records(self, model_cls: Type[BaseModel], records: List[dict], prompt: str,
+                               config: types.GenerateContentConfig, method: str = None,
+                               key_field: str = "company_name") -> List[dict]:
+        """Async version of LLMEngine.validate_records."""
+        results, invalid = self.engine._split_valid(model_cls, records, method)
+        if not invalid:
+            return results
+
+        invalid_records = [r for _, r in invalid]
+        patches = []
+        repair = self.engine._list_repair_request(model_cls, invalid_records, prompt, config, method, key_field)
+        if repair is not None:
+            try:
+                patches = load_records((await self._safe_generate(*repair, method=method)).text or "")
+            except Exception as e:
+                logging.warning(f"Repair request failed: {e}")
+        repaired = self.engine._merge_repairs(model_cls, invalid_records, patches, key_field)
+        for (index, _), record in zip(invalid, repaired):
+            results[index] = record
+        return [r for r in results if r is not None]
+
+    async def search_and_analyze(self, query: str) -> list:
+        logging.info("Initiating Google Search grounding...")
+        config = self.engine.build_search_config()
+        try:
+            response = await self._safe_generate(query, config, method="search_and_analyze")
+            if response and response.text:
+                competitors = await self.validate_records(Competitor,
+                                                          self.engine._parse_json_from_text(response.text),
+                                                          query, config, "search_and_analyze")
+                await asyncio.to_thread(self.engine.store_validated, query, config, "search_and_analyze",
+                                        competitors, response)
+                return competitors
+            return []
+        except Exception as e:
+            logging.error(f"Search failed: {e}")
+            return []
+
+    async def extract_product_data(self, raw_text: str, features_to_check: List[str],
+                                   token_budget: int = DEFAULT_TOKEN_BUDGET) -> dict:
+        prompt, config = self.engine.build_extract_request(raw_text, features_to_check, token_budget)
+        response = await self._safe_generate(prompt, config, method="extract_product_data")
+        product = await self.validate_record(Product, load_record(response.text), prompt, config,
+                                             "extract_product_data")
+        await asyncio.to_thread(self.engine.store_validated, prompt, config, "extract_product_data",
+                                product, response)
+        return product
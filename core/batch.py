@@ -0,0 +1,276 @@
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from google.genai import types
+
+from core.cache import make_cache_key
+from core.context import DEFAULT_TOKEN_BUDGET
+from core.structured import load_record
+from models.schemas import Product, LandscapeTaxonomy
+
+if TYPE_CHECKING:
+    from core.llm_handler import LLMEngine
+
+# Normalized job states reported by every backend
+JOB_PENDING = "pending"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+def to_batch_line(key: str, prompt: str, config: types.GenerateContentConfig) -> dict:
+    """One Gemini batch JSONL record for a prompt/config pair."""
+    generation_config = config.model_dump(mode="json", exclude_none=True) if config else {}
+    tools = generation_config.pop("tools", None)
+    request = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generation_config": generation_config,
+    }
+    if tools:
+        request["tools"] = tools
+    return {"key": key, "request": request}
+
+
+def response_text(record: dict) -> str:
+    """Concatenated text parts of the first candidate in a batch output record."""
+    candidates = record.get("response", {}).get("candidates") or []
+    if not candidates:
+        return ""
+    parts = candidates[0].get("content", {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts)
+
+
+class BatchBackend(ABC):
+    """
+    Interface for submitting a JSONL spool of requests as one batch job.
+
+    Output records follow the Gemini batch format: {"key", "response"} on
+    success or {"key", "error"} on failure.
+    """
+
+    @abstractmethod
+    def submit(self, spool_path: str, model_name: str) -> str:
+        """Submit a spool file; returns a job id."""
+
+    @abstractmethod
+    def status(self, job_id: str) -> str:
+        """One of JOB_PENDING, JOB_SUCCEEDED, JOB_FAILED."""
+
+    @abstractmethod
+    def results(self, job_id: str) -> List[dict]:
+        """Output records of a finished job."""
+
+
+class GeminiBatchBackend(BatchBackend):
+    """Gemini API batch jobs: upload the spool, create the job, download the output file."""
+
+    _SUCCEEDED = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+    _FAILED = {"JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, spool_path: str, model_name: str) -> str:
+        name = os.path.basename(spool_path)
+        uploaded = self.client.files.upload(
+            file=spool_path,
+            config=types.UploadFileConfig(display_name=name, mime_type="jsonl")
+        )
+        job = self.client.batches.create(
+            model=model_name,
+            src=uploaded.name,
+            config=types.CreateBatchJobConfig(display_name=name)
+        )
+        logging.info(f"Submitted batch job {job.name} ({name})")
+        return job.name
+
+    def status(self, job_id: str) -> str:
+        state = self.client.batches.get(name=job_id).state
+        state = getattr(state, "name", str(state))
+        if state in self._SUCCEEDED:
+            return JOB_SUCCEEDED
+        if state in self._FAILED:
+            return JOB_FAILED
+        return JOB_PENDING
+
+    def results(self, job_id: str) -> List[dict]:
+        job = self.client.batches.get(name=job_id)
+        content = self.client.files.download(file=job.dest.file_name)
+        return [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Runs a spool synchronously against any object with the
+    client.models.generate_content shape. Used for local runs and
+    benchmarks with a fake client; no quota handling is applied.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._jobs = {}
+
+    def submit(self, spool_path: str, model_name: str) -> str:
+        outputs = []
+        with open(spool_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                request = record["request"]
+                config = types.GenerateContentConfig(
+                    **request.get("generation_config", {}),
+                    tools=request.get("tools") or []
+                )
+                prompt = "".join(p.get("text", "") for p in request["contents"][0]["parts"])
+                try:
+                    response = self.client.models.generate_content(
+                        model=model_name, contents=prompt, config=config
+                    )
+                    outputs.append({"key": record["key"], "response": {
+                        "candidates": [{"content": {"parts": [{"text": response.text}]}}]
+                    }})
+                except Exception as e:
+                    outputs.append({"key": record["key"], "error": {"message": str(e)}})
+        job_id = f"local-{len(self._jobs) + 1}"
+        self._jobs[job_id] = outputs
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        return JOB_SUCCEEDED if job_id in self._jobs else JOB_FAILED
+
+    def results(self, job_id: str) -> List[dict]:
+        return self._jobs[job_id]
+
+
+class OfflineBatch:
+    """
+    Collects taxonomy and extraction requests, spools them to JSONL, runs
+    them as one batch job and merges the parsed results back by key.
+
+    Prompts and configs come from the same LLMEngine builders as the
+    synchronous methods, so identical inputs give identical requests.
+    Requests already in the LLM response cache are answered locally, and
+    batch results are written back to it under the same keys as online
+    calls. Results are validated against the same schemas, with online
+    repair calls for invalid fields.
+
+    With a routing engine (model 'auto'), each task is sent to the model
+    the router picks for it, as one batch job per model.
+    """
+
+    def __init__(self, llm: 'LLMEngine', backend: BatchBackend, spool_dir: str = "batches",
+                 poll_interval: float = 30.0, timeout: float = 24 * 3600):
+        """
+        Args:
+            llm: Engine providing the model name, request builders and cache
+            backend: Where the batch job runs
+            spool_dir: Directory for the request JSONL files
+            poll_interval: Seconds between job status checks
+            timeout: Give up waiting for the job after this many seconds
+        """
+        self.llm = llm
+        self.backend = backend
+        self.spool_dir = spool_dir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._requests = {}
+
+    def add_taxonomy(self, key: str, topic: str):
+        prompt, config = self.llm.build_market_request(topic)
+        self._requests[key] = ("analyze_market", prompt, config, LandscapeTaxonomy)
+
+    def add_extraction(self, key: str, raw_text: str, features_to_check: List[str],
+                       token_budget: int = DEFAULT_TOKEN_BUDGET):
+        prompt, config = self.llm.build_extract_request(raw_text, features_to_check, token_budget)
+        self._requests[key] = ("extract_product_data", prompt, config, Product)
+
+    def __len__(self):
+        return len(self._requests)
+
+    def batch_model(self, method: str) -> str:
+        """Concrete model a task's requests are submitted to."""
+        router = self.llm.router
+        if router is None:
+            return self.llm.model_name
+        return router.choose(method) or router.primary(method)
+
+    def write_spool(self, keys: List[str], model_name: str = None) -> str:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        suffix = f"_{model_name.split('/')[-1]}" if model_name else ""
+        path = os.path.join(self.spool_dir,
+                            f"requests_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}{suffix}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for key in keys:
+                _, prompt, config, _ = self._requests[key]
+                f.write(json.dumps(to_batch_line(key, prompt, config)) + "\n")
+        logging.info(f"Spooled {len(keys)} requests to {path}")
+        return path
+
+    def _wait(self, job_id: str) -> str:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            state = self.backend.status(job_id)
+            if state != JOB_PENDING:
+                return state
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch job {job_id} did not finish within {self.timeout:.0f}s")
+            logging.info(f"Batch job {job_id} still running, checking again in {self.poll_interval:.0f}s")
+            time.sleep(self.poll_interval)
+
+    def run(self) -> Tuple[Dict[str, object], Dict[str, Exception]]:
+        """
+        Submit every pending request and wait for the results.
+
+        Returns:
+            (validated results by key, errors by key)
+        """
+        results, errors, texts, fresh = {}, {}, {}, set()
+        cache = self.llm.cache
+        # Pending keys per concrete model, chosen once per task for the whole run
+        pending, models = {}, {}
+        for key, (method, prompt, config, _) in self._requests.items():
+            cached = cache.get(make_cache_key(self.llm.cache_model(method), prompt, config)) if cache else None
+            if cached is not None:
+                texts[key] = cached.text
+                continue
+            if method not in models:
+                models[method] = self.batch_model(method)
+            pending.setdefault(models[method], []).append(key)
+
+        jobs = [(self.backend.submit(self.write_spool(keys, model_name), model_name), model_name)
+                for model_name, keys in pending.items()]
+        for job_id, model_name in jobs:
+            state = self._wait(job_id)
+            if state == JOB_FAILED:
+                raise Exception(f"Batch job {job_id} ({model_name}) failed")
+            for record in self.backend.results(job_id):
+                key = record.get("key")
+                if key not in self._requests:
+                    continue
+                if "error" in record:
+                    errors[key] = Exception(f"Batch request failed: {record['error']}")
+                    continue
+                texts[key] = response_text(record)
+                fresh.add(key)
+
+        for key in self._requests:
+            if key in errors:
+                continue
+            if key not in texts:
+                errors[key] = Exception("No result returned by batch job")
+                continue
+            method, prompt, config, model_cls = self._requests[key]
+            try:
+                results[key] = self.llm.validate_record(model_cls, load_record(texts[key]), prompt, config, method)
+            except Exception as e:
+                errors[key] = e
+                continue
+            # Cached after validation, under the key online calls use
+            if key in fresh:
+                self.llm.store_validated(prompt, config, method, results[key])
+        self._requests.clear()
+        return results, errors
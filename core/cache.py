@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Default time-to-live per LLMEngine method, in seconds. Grounded search
+# results drift quickly, taxonomies and page extractions much less so.
+DEFAULT_TTLS = {
+    'analyze_market': 30 * 24 * 3600,
+    'extract_product_data': 7 * 24 * 3600,
+    'search_and_analyze': 6 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+
+class CachedResponse:
+    """Stand-in for a GenerateContentResponse served from the cache."""
+
+    def __init__(self, text: str):
+        self.text = text
+        # Cached calls consume no quota
+        self.usage_metadata = None
+        self.from_cache = True
+
+
+def make_cache_key(model_name: str, prompt: str, config) -> str:
+    """SHA-256 over the model name, prompt and serialized GenerateContentConfig."""
+    if config is None:
+        config_json = ""
+    elif hasattr(config, "model_dump"):
+        config_json = json.dumps(config.model_dump(mode="json", exclude_none=True), sort_keys=True)
+    else:
+        config_json = json.dumps(config, sort_keys=True, default=str)
+    h = hashlib.sha256()
+    for part in (model_name, prompt, config_json):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent SQLite cache of LLM response text.
+
+    Entries expire after a per-method TTL and the least recently used ones
+    are evicted once the cache grows past `max_entries` or `max_bytes`.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str = ".llm_cache.sqlite", ttls: Optional[dict] = None,
+                 max_entries: int = 10_000, max_bytes: int = 200 * 1024 * 1024,
+                 bypass: bool = False):
+        """
+        Args:
+            path: SQLite file location
+            ttls: Per-method TTL overrides in seconds, merged over DEFAULT_TTLS
+            max_entries: LRU eviction threshold by entry count
+            max_bytes: LRU eviction threshold by total stored text size
+            bypass: Skip cache reads (fresh responses are still written)
+        """
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                method TEXT,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def ttl_for(self, method: Optional[str]) -> float:
+        return self.ttls.get(method, DEFAULT_TTL)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached response for `key`, or None on a miss or when bypassed."""
+        if self.bypass:
+            with self._lock:
+                self.misses += 1
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return CachedResponse(row[0])
+
+    def put(self, key: str, text: str, method: Optional[str] = None):
+        """Store a response text under `key` with the TTL for `method`."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, method, text, len(text.encode("utf-8")), now, now + self.ttl_for(method), now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones until under both limits."""
+        self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed = 0
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+            removed += 1
+        logging.info(f"LLM cache: evicted {removed} least recently used entries")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            return {"hits": self.hits, "misses": self.misses, "entries": count, "bytes": total}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,119 +1,290 @@
-import os
-import logging
-import time
-from google import genai
-from google.genai import types
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-# --- RATE LIMITING CONFIGURATION ---
-# Track the timestamp of the last API call globally
-_last_api_call = 0
-
-# Set to 6.0 seconds to stay safely under the 10-15 RPM (Requests Per Minute) limit
-_min_delay_seconds = 6.0 
-
-def rate_limit():
-    """
-    Throttles execution to ensure a minimum delay between API calls.
-    Call this function immediately before any client.models.generate_content call.
-    """
-    global _last_api_call
-    current_time = time.time()
-    time_since_last = current_time - _last_api_call
-    
-    if time_since_last < _min_delay_seconds:
-        sleep_time = _min_delay_seconds - time_since_last
-        logging.info(f"Rate limiting: Cooling down for {sleep_time:.1f}s to protect quota...")
-        time.sleep(sleep_time)
-    
-    # Update the timestamp AFTER the sleep
-    _last_api_call = time.time()
-
-def setup_api_key():
-    """
-    Retrieves the API key from environment variables or user input.
-    """
-    api_key = os.getenv('GEMINI_API_KEY')
-    
-    if not api_key:
-        api_key = input("\nPaste your Gemini API key: ").strip()
-        if not api_key:
-            logging.error("No API key provided")
-            raise ValueError("API key is required")  
-        os.environ['GEMINI_API_KEY'] = api_key
-    
-    logging.info("API key configured successfully")
-    return api_key
-
-def get_working_model():
-    """
-    Initializes the Gemini client and allows the user to select a model.
-    Skips the 'list_models' call to save initial quota.
-    """
-    try:
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            api_key = setup_api_key()
-            
-        client = genai.Client(api_key=api_key)
-        
-        default_models = [
-            'gemini-2.5-flash-lite',       # Best for Quota/Rate limits
-            'gemini-3-flash-preview',      # Latest and greatest
-            'gemini-2.5-flash',            # Standard performance
-            'gemini-2.0-flash-lite',       # Older lite version,
-        ]
-        
-        print("\n" + "="*70)
-        print("QUOTA-SAFE MODE: Model Selection")
-        print("="*70)
-        print("Using these models directly skips discovery calls to save quota.")
-        print("\nAvailable options:")
-        for i, model in enumerate(default_models, 1):
-            print(f"  {i}. {model}")
-        print("="*70)
-        
-        # User selection logic
-        while True:
-            try:
-                choice = input(f"\nSelect model (1-{len(default_models)}) or Enter for default [1]: ").strip()
-                
-                if choice == "":
-                    choice = 1
-                else:
-                    choice = int(choice)
-                
-                if 1 <= choice <= len(default_models):
-                    break
-                else:
-                    print(f"Please enter a number between 1 and {len(default_models)}")
-            except ValueError:
-                print("Please enter a valid number")
-        
-        selected_name = default_models[choice - 1]
-        
-        # The SDK expects just the model name string or 'models/name'
-        model_name = selected_name
-        
-        logging.info(f"✓ Selected: {selected_name}")
-        logging.info(f"  Throttling enabled: {_min_delay_seconds}s interval between calls")
-        
-        return client, model_name
-        
-    except Exception as e:
-        if '429' in str(e) or 'RESOURCE_EXHAUSTED' in str(e):
-            print("\n" + "="*70)
-            print("  QUOTA LIMIT REACHED")
-            print("="*70)
-            print("You've exceeded your free tier quota. Options:")
-            print("1. Wait 60 seconds (Free tier resets every minute).")
-            print("2. Upgrade to Pay-as-you-go in AI Studio.")
-            print(f"3. Current hard limit: ~10-15 Requests Per Minute.")
-            print("="*70)
-            
+import os
+import logging
+import threading
+from core.rate_limiter import RateLimiter, SharedRateLimiter
+from core.retry import CircuitBreaker
+from core.telemetry import Telemetry
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# --- RATE LIMITING CONFIGURATION ---
+# Fallback spacing for models without an entry in MODEL_LIMITS.
+# 6.0 seconds stays safely under the 10-15 RPM (Requests Per Minute) limit
+_min_delay_seconds = 6.0 
+
+# Free-tier budgets per model. Paid-tier users can raise them with the
+# GEMINI_RPM / GEMINI_TPM / GEMINI_RPD environment variables.
+MODEL_LIMITS = {
+    'gemini-2.5-flash-lite': {'rpm': 15, 'tpm': 250_000, 'rpd': 1000},
+    'gemini-3-flash-preview': {'rpm': 10, 'tpm': 250_000, 'rpd': 250},
+    'gemini-2.5-flash': {'rpm': 10, 'tpm': 250_000, 'rpd': 250},
+    'gemini-2.0-flash-lite': {'rpm': 30, 'tpm': 1_000_000, 'rpd': 200},
+}
+
+# Paid-tier list prices, USD per 1M (input, output) tokens, for the telemetry cost estimate
+MODEL_PRICES = {
+    'gemini-2.5-flash-lite': (0.10, 0.40),
+    'gemini-3-flash-preview': (0.50, 3.00),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.0-flash-lite': (0.075, 0.30),
+}
+
+DEFAULT_MODELS = [
+    'gemini-2.5-flash-lite',       # Best for Quota/Rate limits
+    'gemini-3-flash-preview',      # Latest and greatest
+    'gemini-2.5-flash',            # Standard performance
+    'gemini-2.0-flash-lite',       # Older lite version,
+]
+
+# Selecting this "model" routes every call across DEFAULT_MODELS (see core.router)
+AUTO_MODEL = 'auto'
+
+# Model preference per task for the router: lite models for high-volume
+# extraction, stronger models for taxonomy and grounded search.
+TASK_MODEL_PREFERENCES = {
+    'extract_product_data': ['gemini-2.5-flash-lite', 'gemini-2.0-flash-lite',
+                             'gemini-2.5-flash', 'gemini-3-flash-preview'],
+    'analyze_market': ['gemini-2.5-flash', 'gemini-3-flash-preview',
+                       'gemini-2.5-flash-lite', 'gemini-2.0-flash-lite'],
+    'search_and_analyze': ['gemini-2.5-flash', 'gemini-3-flash-preview',
+                           'gemini-2.5-flash-lite', 'gemini-2.0-flash-lite'],
+}
+
+# Persistent LLM response cache. Set LLM_CACHE_BYPASS=1 to force fresh calls.
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '.llm_cache.sqlite')
+LLM_CACHE_BYPASS = os.getenv('LLM_CACHE_BYPASS', '') not in ('', '0', 'false', 'False')
+
+# On-disk HTTP cache used for conditional GETs when re-scraping vendors
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', '.http_cache.sqlite')
+
+# Per-URL page fingerprints and last extracted Product for change detection
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', '.snapshots.sqlite')
+
+# Input tokens of page text packed into each extraction call
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', '2000'))
+
+# Pages fetched per vendor (pricing, features, customers...); 1 disables crawling
+CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', '5'))
+
+# HTML-to-text extractor: 'lxml' (fast streaming pass) or 'bs4'; empty picks lxml when installed
+HTML_EXTRACTOR = os.getenv('HTML_EXTRACTOR', '') or None
+
+# Vendors packed into one extraction request in bulk mode (1 disables batching)
+EXTRACT_BATCH_SIZE = int(os.getenv('EXTRACT_BATCH_SIZE', '4'))
+
+# Persistent store of taxonomies, competitors and products, and the export format (csv, jsonl, parquet)
+LANDSCAPE_DB_PATH = os.getenv('LANDSCAPE_DB_PATH', '.landscape.sqlite')
+LANDSCAPE_EXPORT_FORMAT = os.getenv('LANDSCAPE_EXPORT_FORMAT', 'csv').lower()
+
+# Grounded searches run at once in per-division discovery
+DISCOVERY_WORKERS = int(os.getenv('DISCOVERY_WORKERS', '4'))
+
+# Offline batch mode: where request spools are written and how often jobs are polled
+BATCH_SPOOL_DIR = os.getenv('BATCH_SPOOL_DIR', 'batches')
+BATCH_POLL_SECONDS = float(os.getenv('BATCH_POLL_SECONDS', '30'))
+
+# Multi-process mode: worker processes pulling scrape/extract jobs, and the ledger file
+# through which every process shares one RPM/TPM budget per model
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', '0'))
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', '.jobs.sqlite')
+QUOTA_LEDGER_PATH = os.getenv('QUOTA_LEDGER_PATH', '')
+
+# Telemetry: JSON-lines event log and Prometheus text snapshot (both off when empty)
+TELEMETRY_EVENTS_PATH = os.getenv('TELEMETRY_EVENTS_PATH', '')
+TELEMETRY_PROM_PATH = os.getenv('TELEMETRY_PROM_PATH', '')
+
+_limiters = {}
+_breakers = {}
+_limiters_lock = threading.Lock()
+_ledger_path = QUOTA_LEDGER_PATH or None
+_telemetry = None
+
+def get_model_limits(model_name: str = None) -> dict:
+    """
+    Returns the RPM/TPM/RPD budget for a model, applying environment overrides.
+    """
+    name = (model_name or '').split('/')[-1]
+    limits = dict(MODEL_LIMITS.get(name, {'rpm': 60.0 / _min_delay_seconds, 'tpm': None, 'rpd': None}))
+    if os.getenv('GEMINI_RPM'):
+        limits['rpm'] = float(os.environ['GEMINI_RPM'])
+    if os.getenv('GEMINI_TPM'):
+        limits['tpm'] = float(os.environ['GEMINI_TPM'])
+    if os.getenv('GEMINI_RPD'):
+        limits['rpd'] = int(os.environ['GEMINI_RPD'])
+    return limits
+
+def set_quota_ledger(path: str = None):
+    """
+    Share every model's RPM/TPM budget with other processes through a ledger
+    file (None goes back to per-process limiters). Limiters created before
+    the call are discarded.
+    """
+    global _ledger_path
+    with _limiters_lock:
+        _ledger_path = path or None
+        _limiters.clear()
+
+def get_rate_limiter(model_name: str = None) -> RateLimiter:
+    """
+    Returns the process-wide RateLimiter for a model, creating it on first use.
+    Every LLMEngine (and every thread) calling the same model shares it.
+    With a quota ledger configured (QUOTA_LEDGER_PATH or set_quota_ledger),
+    the budget is also shared with every other process using that ledger.
+    """
+    key = model_name or ''
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limits = get_model_limits(model_name)
+            if _ledger_path:
+                limiter = SharedRateLimiter(_ledger_path, limits['rpm'], limits['tpm'], name=key)
+            else:
+                limiter = RateLimiter(limits['rpm'], limits['tpm'], name=key)
+            _limiters[key] = limiter
+        return limiter
+
+def get_circuit_breaker(model_name: str = None) -> CircuitBreaker:
+    """
+    Returns the process-wide CircuitBreaker for a model, so concurrent
+    workers back off together when the model is down.
+    """
+    key = model_name or ''
+    with _limiters_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker()
+            _breakers[key] = breaker
+        return breaker
+
+def get_telemetry() -> Telemetry:
+    """
+    Returns the process-wide Telemetry recorder, creating it on first use.
+    The session id is exported as TELEMETRY_SESSION so worker processes
+    started later log their events under the same session.
+    """
+    global _telemetry
+    with _limiters_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry(TELEMETRY_EVENTS_PATH or None, MODEL_PRICES,
+                                   session=os.getenv('TELEMETRY_SESSION') or None)
+            os.environ.setdefault('TELEMETRY_SESSION', _telemetry.session)
+        return _telemetry
+
+def rate_limit(model_name: str = None, tokens: int = 0):
+    """
+    Throttles execution to stay within the model's RPM/TPM budget.
+    Kept for callers outside LLMEngine; LLMEngine uses its limiter directly.
+    """
+    get_rate_limiter(model_name).acquire(tokens)
+
+def setup_api_key(interactive: bool = True):
+    """
+    Retrieves the API key from environment variables or user input.
+
+    Args:
+        interactive: Prompt for a missing key; when False (scheduled runs)
+                     a missing GEMINI_API_KEY raises ValueError instead
+    """
+    api_key = os.getenv('GEMINI_API_KEY')
+    
+    if not api_key:
+        if not interactive:
+            raise ValueError("GEMINI_API_KEY is not set")
+        api_key = input("\nPaste your Gemini API key: ").strip()
+        if not api_key:
+            logging.error("No API key provided")
+            raise ValueError("API key is required")  
+        os.environ['GEMINI_API_KEY'] = api_key
+    
+    logging.info("API key configured successfully")
+    return api_key
+
+def get_working_model(interactive: bool = True):
+    """
+    Initializes the Gemini client and allows the user to select a model.
+    Skips the 'list_models' call to save initial quota.
+    
+    Set GEMINI_MODEL (a model name or 'auto') to skip the prompt. 'auto'
+    routes each call across all default models (see core.router).
+
+    Args:
+        interactive: Prompt for the model; when False the first default
+                     model is used unless GEMINI_MODEL is set
+    """
+    try:
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            api_key = setup_api_key(interactive)
+            
+        # Imported here: the SDK takes most of the startup time and commands
+        # that never call the API should not pay for it
+        from google import genai
+        client = genai.Client(api_key=api_key)
+        
+        default_models = DEFAULT_MODELS + [AUTO_MODEL]
+        
+        preset = os.getenv('GEMINI_MODEL', '').strip()
+        if preset:
+            logging.info(f"✓ Using model from GEMINI_MODEL: {preset}")
+            return client, preset
+        if not interactive:
+            logging.info(f"✓ Using default model: {DEFAULT_MODELS[0]}")
+            return client, DEFAULT_MODELS[0]
+        
+        print("\n" + "="*70)
+        print("QUOTA-SAFE MODE: Model Selection")
+        print("="*70)
+        print("Using these models directly skips discovery calls to save quota.")
+        print("\nAvailable options:")
+        for i, model in enumerate(default_models, 1):
+            label = " (route across all models by task and quota)" if model == AUTO_MODEL else ""
+            print(f"  {i}. {model}{label}")
+        print("="*70)
+        
+        # User selection logic
+        while True:
+            try:
+                choice = input(f"\nSelect model (1-{len(default_models)}) or Enter for default [1]: ").strip()
+                
+                if choice == "":
+                    choice = 1
+                else:
+                    choice = int(choice)
+                
+                if 1 <= choice <= len(default_models):
+                    break
+                else:
+                    print(f"Please enter a number between 1 and {len(default_models)}")
+            except ValueError:
+                print("Please enter a valid number")
+        
+        selected_name = default_models[choice - 1]
+        
+        # The SDK expects just the model name string or 'models/name'
+        model_name = selected_name
+        
+        logging.info(f"✓ Selected: {selected_name}")
+        if model_name == AUTO_MODEL:
+            return client, model_name
+        limits = get_model_limits(model_name)
+        logging.info(f"  Throttling enabled: {limits['rpm']:g} RPM"
+                     + (f", {limits['tpm']:,.0f} TPM" if limits['tpm'] else ""))
+        
+        return client, model_name
+        
+    except Exception as e:
+        if '429' in str(e) or 'RESOURCE_EXHAUSTED' in str(e):
+            print("\n" + "="*70)
+            print("  QUOTA LIMIT REACHED")
+            print("="*70)
+            print("You've exceeded your free tier quota. Options:")
+            print("1. Wait 60 seconds (Free tier resets every minute).")
+            print("2. Upgrade to Pay-as-you-go in AI Studio.")
+            print(f"3. Current hard limit: ~10-15 Requests Per Minute.")
+            print("="*70)
+            
         raise Exception(f"Could not initialize Gemini Client: {e}")
\ No newline at end of file
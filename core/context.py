@@ -0,0 +1,138 @@
+import math
+import re
+from collections import Counter
+from typing import List, Optional
+
+from core.rate_limiter import estimate_tokens
+
+# Default input budget for one page of extraction context (~8000 characters)
+DEFAULT_TOKEN_BUDGET = 2000
+
+# Cues for the Product fields that tend to sit low on a vendor page
+PRICING_CUES = ["pricing", "price", "prices", "plan", "plans", "tier", "tiers", "month", "monthly",
+                "annual", "annually", "year", "billed", "seat", "user", "free", "trial",
+                "starter", "pro", "business", "enterprise", "contact", "sales", "quote"]
+CASE_STUDY_CUES = ["case", "study", "studies", "customer", "customers", "story", "stories",
+                   "success", "testimonial", "trusted", "results", "increased", "reduced"]
+PRODUCT_CUES = ["feature", "features", "integration", "integrations", "platform", "api",
+                "security", "acquired", "acquisition", "partnership"]
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_PRICE_PATTERN = re.compile(r"[$€£¥]\s?\d|\d\s?(?:usd|eur|gbp)\b|/\s?(?:mo|month|user|seat)\b", re.IGNORECASE)
+
+PRICE_BONUS = 2.0
+SEPARATOR = " ... "
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def split_passages(text: str, target_chars: int = 400) -> List[str]:
+    """Split cleaned page text into passages of roughly `target_chars`, on sentence boundaries."""
+    passages = []
+    current = []
+    length = 0
+    for sentence in _SENTENCE_SPLIT.split(text):
+        # Scraped text often has very long runs without punctuation
+        while len(sentence) > target_chars * 2:
+            cut = sentence.rfind(" ", 0, target_chars)
+            cut = cut if cut > 0 else target_chars
+            if current:
+                passages.append(" ".join(current))
+                current, length = [], 0
+            passages.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if not sentence:
+            continue
+        current.append(sentence)
+        length += len(sentence) + 1
+        if length >= target_chars:
+            passages.append(" ".join(current))
+            current, length = [], 0
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def bm25_scores(passages: List[str], query_terms: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 score of each passage against a bag of query terms."""
+    docs = [Counter(_tokenize(p)) for p in passages]
+    if not docs:
+        return []
+    n = len(docs)
+    avgdl = sum(sum(d.values()) for d in docs) / n or 1.0
+    query = Counter(query_terms)
+    df = {t: sum(1 for d in docs if t in d) for t in query}
+    idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in query}
+
+    scores = []
+    for d in docs:
+        dl = sum(d.values())
+        score = 0.0
+        for term, qf in query.items():
+            tf = d.get(term, 0)
+            if tf:
+                score += qf * idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        scores.append(score)
+    return scores
+
+
+def build_query(features_to_check: List[str]) -> List[str]:
+    """Query terms: the requested feature names (weighted double) plus pricing/case-study/product cues."""
+    terms = []
+    for feature in features_to_check:
+        terms.extend(_tokenize(feature) * 2)
+    return terms + PRICING_CUES + CASE_STUDY_CUES + PRODUCT_CUES
+
+
+def pack_context(text: str, features_to_check: List[str], token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 passage_chars: int = 400, query_terms: Optional[List[str]] = None) -> str:
+    """
+    Select the most extraction-relevant passages of a page within a token budget.
+
+    The opening passage is always kept (it usually names the company and
+    product); the remaining budget goes to the passages that score highest
+    against the feature list and pricing/case-study cues. Selected passages
+    are returned in page order.
+
+    Args:
+        text: Cleaned page text
+        features_to_check: Feature names the extractor will look for
+        token_budget: Maximum input tokens for the packed context
+        passage_chars: Approximate passage size
+        query_terms: Override the default ranking query
+
+    Returns:
+        The original text if it fits the budget, otherwise the packed passages
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    passages = split_passages(text, passage_chars)
+    scores = bm25_scores(passages, query_terms or build_query(features_to_check))
+    for i, passage in enumerate(passages):
+        if _PRICE_PATTERN.search(passage):
+            scores[i] += PRICE_BONUS
+
+    order = [0] + sorted(range(1, len(passages)), key=lambda i: scores[i], reverse=True)
+    selected = []
+    seen = set()
+    used = 0
+    sep_tokens = estimate_tokens(SEPARATOR)
+    for i in order:
+        passage = passages[i]
+        if passage in seen:
+            continue
+        cost = estimate_tokens(passage) + sep_tokens
+        if used + cost > token_budget:
+            continue
+        selected.append(i)
+        seen.add(passage)
+        used += cost
+
+    if not selected:
+        # A single passage larger than the budget: fall back to truncation
+        return text[:token_budget * 4]
+    return SEPARATOR.join(passages[i] for i in sorted(selected))
@@ -0,0 +1,226 @@
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from core.config import get_telemetry
+from core.discovery import site_key
+from core.extractors import html_to_text, extract_links
+from core.snapshots import PageFingerprint
+
+if TYPE_CHECKING:
+    # Type hints only: importing the fetcher would pull in requests
+    from core.fetcher import FetchResult, HttpFetcher
+
+# URL path keywords for the pages that fill in a Product record, by priority
+PAGE_CATEGORIES = [
+    ("pricing", ["pricing", "prices", "plans", "plan", "buy", "editions"]),
+    ("features", ["features", "feature", "product", "products", "platform", "capabilities", "integrations"]),
+    ("customers", ["case-studies", "case-study", "casestudies", "customers", "customer-stories",
+                   "success-stories", "testimonials"]),
+    ("about", ["about", "company", "newsroom", "press"]),
+]
+
+_LOC_PATTERN = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+_SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".mp4", ".xml", ".css", ".js")
+# Sitemap files fetched per vendor: /sitemap.xml plus nested sitemaps it lists
+MAX_SITEMAPS = 3
+
+
+def categorize(url: str) -> Optional[Tuple[int, str]]:
+    """Return (priority, category) for a likely product page URL, or None."""
+    path = urlparse(url).path.lower()
+    if path.endswith(_SKIP_EXTENSIONS):
+        return None
+    words = set(re.split(r"[/_.\-]", path))
+    for priority, (category, keywords) in enumerate(PAGE_CATEGORIES):
+        if any((k in path) if '-' in k else (k in words) for k in keywords):
+            return priority, category
+    return None
+
+
+class CrawlResult:
+    """Pages fetched for one vendor and their combined text."""
+
+    def __init__(self, start_url: str, pages: List[Tuple[str, str]], bytes_fetched: int):
+        self.start_url = start_url
+        # (url, text) in fetch priority order, start page first
+        self.pages = pages
+        self.bytes_fetched = bytes_fetched
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(f"[Page: {urlparse(url).path or '/'}] {text}" for url, text in self.pages)
+
+
+class _ByteBudget:
+    """Download bytes left for one vendor's crawl, shared by its fetch threads."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def remaining(self) -> int:
+        with self._lock:
+            return max(0, self.limit - self.spent)
+
+    def spend(self, size: int):
+        with self._lock:
+            self.spent += size
+
+
+class SiteCrawler:
+    """
+    Bounded same-site crawler that gathers a vendor's pricing, features and
+    customer pages alongside the given product URL.
+
+    Candidates come from the start page's links and the site's sitemap.xml,
+    ranked by URL keywords so each category is covered before seconds are
+    added. Pages are fetched in parallel through the shared HttpFetcher
+    under a per-vendor page and byte budget, and near-duplicates are dropped.
+    Every download, sitemaps included, is capped at the bytes left in the
+    budget when it starts; pages cut short by the cap are dropped.
+    """
+
+    def __init__(self, fetcher: 'HttpFetcher', max_pages: int = 5, max_bytes: int = 3 * 1024 * 1024,
+                 workers: int = 4, use_sitemap: bool = True, duplicate_threshold: float = 0.9,
+                 html_backend: str = None):
+        """
+        Args:
+            fetcher: Shared HTTP layer
+            max_pages: Page budget per vendor, including the start page
+            max_bytes: Download budget per vendor, sitemaps included
+            workers: Concurrent fetches per vendor
+            use_sitemap: Also look for candidates in /sitemap.xml
+            duplicate_threshold: Shingle similarity above which a page is a duplicate
+            html_backend: HTML-to-text extractor ("lxml" or "bs4", see core.extractors)
+        """
+        self.fetcher = fetcher
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.use_sitemap = use_sitemap
+        self.duplicate_threshold = duplicate_threshold
+        self.html_backend = html_backend
+
+    def _page_text(self, url: str, result: 'FetchResult') -> str:
+        """Text of a fetched page, reusing cached text on a 304."""
+        if result.not_modified and result.text is not None:
+            return result.text
+        with get_telemetry().span("parse", "html", url=url, backend=self.html_backend) as event:
+            text = html_to_text(result.content, self.html_backend)
+            event.update(bytes=len(result.content), chars=len(text))
+        self.fetcher.save_text(url, text)
+        return text
+
+    def _fetch_page(self, url: str, budget: _ByteBudget) -> Optional[str]:
+        """Text of a candidate page, or None when the byte budget is spent or runs out during the download."""
+        remaining = budget.remaining()
+        if remaining <= 0:
+            logging.info(f"Byte budget reached for {site_key(url)}, skipping {url}")
+            return None
+        result = self.fetcher.fetch(url, max_bytes=remaining)
+        budget.spend(result.bytes_downloaded)
+        if result.truncated and result.bytes_downloaded >= remaining:
+            logging.info(f"Byte budget reached for {site_key(url)} while fetching {url}, skipping it")
+            return None
+        return self._page_text(url, result)
+
+    def _sitemap_urls(self, start_url: str, budget: _ByteBudget) -> List[str]:
+        """Page URLs listed in the site's sitemaps; fetches at most MAX_SITEMAPS files, charged to `budget`."""
+        parsed = urlparse(start_url)
+        pending = [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+        urls = []
+        for _ in range(MAX_SITEMAPS):
+            if not pending or budget.remaining() <= 0:
+                break
+            sitemap = pending.pop(0)
+            try:
+                result = self.fetcher.fetch(sitemap, max_bytes=budget.remaining())
+            except Exception as e:
+                logging.info(f"No sitemap at {sitemap}: {e}")
+                continue
+            budget.spend(result.bytes_downloaded)
+            content = result.content.decode('utf-8', errors='ignore')
+            for loc in _LOC_PATTERN.findall(content):
+                (pending if loc.lower().endswith('.xml') else urls).append(loc)
+        return urls
+
+    def select_candidates(self, start_url: str, links: List[str], limit: int) -> List[str]:
+        """Pick up to `limit` same-site URLs, covering every category before adding seconds."""
+        site = site_key(start_url)
+        start = start_url.rstrip('/')
+        ranked = {}
+        for order, url in enumerate(links):
+            if site_key(url) != site or url.rstrip('/') == start:
+                continue
+            match = categorize(url)
+            if match is None:
+                continue
+            # Prefer shallow paths within a category
+            depth = len([s for s in urlparse(url).path.split('/') if s])
+            key = url.rstrip('/')
+            if key not in ranked:
+                ranked[key] = (match[0], depth, order, match[1], url)
+
+        by_rank = sorted(ranked.values())
+        chosen, seen_categories, rest = [], set(), []
+        for priority, depth, order, category, url in by_rank:
+            if category not in seen_categories:
+                seen_categories.add(category)
+                chosen.append(url)
+            else:
+                rest.append(url)
+        return (chosen + rest)[:limit]
+
+    def crawl(self, start_url: str) -> CrawlResult:
+        """
+        Crawl a vendor site starting from its product URL.
+
+        Raises:
+            requests.exceptions.RequestException: If the start page can't be fetched
+        """
+        budget = _ByteBudget(self.max_bytes)
+        # The start page is kept even when the cap truncates it
+        result = self.fetcher.fetch(start_url, max_bytes=self.max_bytes)
+        budget.spend(result.bytes_downloaded)
+        text = self._page_text(start_url, result)
+        pages = [(start_url, text)]
+        fingerprints = [PageFingerprint.from_text(text)]
+
+        if self.max_pages <= 1:
+            return CrawlResult(start_url, pages, budget.spent)
+
+        links = extract_links(result.content, start_url, self.html_backend)
+        if self.use_sitemap:
+            links += self._sitemap_urls(start_url, budget)
+        candidates = self.select_candidates(start_url, links, self.max_pages - 1)
+        logging.info(f"Crawling {len(candidates)} extra pages for {site_key(start_url)}")
+
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            futures = {pool.submit(self._fetch_page, url, budget): url for url in candidates}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    fetched[url] = future.result()
+                except Exception as e:
+                    logging.warning(f"Skipping {url}: {e}")
+
+        # Keep candidate priority order; drop near-identical pages
+        for url in candidates:
+            page_text = fetched.get(url)
+            if not page_text:
+                continue
+            fingerprint = PageFingerprint.from_text(page_text)
+            if any(fingerprint.similarity(f) >= self.duplicate_threshold for f in fingerprints):
+                logging.info(f"Skipping near-duplicate page {url}")
+                continue
+            fingerprints.append(fingerprint)
+            pages.append((url, page_text))
+
+        logging.info(f"✓ Crawled {len(pages)} pages ({budget.spent} bytes) for {site_key(start_url)}")
+        return CrawlResult(start_url, pages, budget.spent)
@@ -1,62 +1,228 @@
-from typing import TYPE_CHECKING, List, Dict
-import json
-
-if TYPE_CHECKING:
-    from utils.llm_handler import LLMEngine
-
-class LandscapeCreator:
-    def __init__(self, llm: 'LLMEngine'):
-        """
-        Initialize the Landscape Creator with an LLM engine.
-        
-        Args:
-            llm: An instance of LLMEngine for market analysis
-        """
-        self.llm = llm
-
-    def build_taxonomy(self, topic: str) -> dict:
-        """
-        Generate a market taxonomy for the given topic.
-        
-        Args:
-            topic: The market topic to analyze (e.g., "Chatbots")
-            
-        Returns:
-            Dictionary with market structure including divisions and features
-        """
-        return self.llm.analyze_market(topic)
-
-    def find_competitors(self, topic: str, divisions: List[str]) -> List[Dict]:
-        """
-        Use Gemini's built-in Google Search to find current market players.
-        
-        Args:
-            topic: The market topic
-            divisions: List of market divisions/channels
-            
-        Returns:
-            List of competitor dictionaries with company info
-        """
-        query = f"""
-        Search for the top {topic} companies and products in these categories: {', '.join(divisions)}.
-        
-        For each company/product you find, return a JSON array with this structure:
-        [
-          {{
-            "company_name": "Company Name",
-            "product_name": "Product Name",
-            "official_website_url": "https://example.com",
-            "description": "Brief description"
-          }}
-        ]
-        
-        Find 10-20 major players in this market. Use Google Search to find current, real companies.
-        """
-        
-        try:
-            result = self.llm.search_and_analyze(query)
-            return result
-        except Exception as e:
-            print(f"Search failed: {e}")
-            print("Try using manual research or wait for quota reset")
-            return []
\ No newline at end of file
+from typing import TYPE_CHECKING, List, Dict, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import json
+import logging
+
+from core.discovery import CompetitorIndex
+
+if TYPE_CHECKING:
+    from utils.llm_handler import LLMEngine
+    from core.batch import OfflineBatch
+    from core.async_engine import AsyncLLMEngine
+    from core.updater import AsyncLandscapeUpdater
+
+class LandscapeCreator:
+    def __init__(self, llm: 'LLMEngine'):
+        """
+        Initialize the Landscape Creator with an LLM engine.
+        
+        Args:
+            llm: An instance of LLMEngine for market analysis
+        """
+        self.llm = llm
+
+    def build_taxonomy(self, topic: str) -> dict:
+        """
+        Generate a market taxonomy for the given topic.
+        
+        Args:
+            topic: The market topic to analyze (e.g., "Chatbots")
+            
+        Returns:
+            Dictionary with market structure including divisions and features
+        """
+        return self.llm.analyze_market(topic)
+
+    def find_competitors_stream(self, topic: str, divisions: List[str]) -> Iterator[Dict]:
+        """
+        Streaming variant of find_competitors: yields each competitor as
+        soon as the model has written it, so enrichment of the first players
+        can start while the search response is still being generated.
+        
+        Args:
+            topic: The market topic
+            divisions: List of market divisions/channels
+            
+        Yields:
+            Competitor dictionaries with company info
+        """
+        query = self._competitor_query(topic, divisions)
+        for competitor in self.llm.search_and_analyze_stream(query):
+            if competitor.get('company_name'):
+                yield competitor
+
+    def find_competitors_sharded(self, topic: str, shards: List[str], workers: int = 4,
+                                 index: CompetitorIndex = None) -> Iterator[Dict]:
+        """
+        Broad discovery: one grounded search per division or sub-division,
+        run concurrently under the shared rate limiter and merged through a
+        CompetitorIndex so each vendor appears once.
+        
+        Args:
+            topic: The market topic
+            shards: Divisions and/or sub-divisions to search separately
+            workers: Searches in flight at once
+            index: Dedup index to merge into (pass one to read the merged
+                   records, with every matching division, afterwards)
+            
+        Yields:
+            Each new competitor as soon as the search that found it completes
+        """
+        index = index if index is not None else CompetitorIndex()
+        shards = [s for s in dict.fromkeys(shards) if s]
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(self.llm.search_and_analyze, self._shard_query(topic, shard)): shard
+                       for shard in shards}
+            for future in as_completed(futures):
+                shard = futures[future]
+                found = future.result()
+                new = [c for c in found if index.add(c, shard)]
+                logging.info(f"Shard '{shard}': {len(found)} results, {len(new)} new, {len(index)} total")
+                yield from new
+
+    @staticmethod
+    def _shard_query(topic: str, shard: str) -> str:
+        """Grounded search prompt for one division of the market."""
+        return f"""
+        Search for {topic} companies and products in this specific segment: {shard}.
+        
+        Include established vendors, challengers and newer startups. For each one, return a JSON array with this structure:
+        [
+          {{
+            "company_name": "Company Name",
+            "product_name": "Product Name",
+            "official_website_url": "https://example.com",
+            "description": "Brief description"
+          }}
+        ]
+        
+        List every notable player in this segment (up to 40). Use Google Search to find current, real companies.
+        """
+
+    def build_taxonomies_offline(self, topics: List[str], batch: 'OfflineBatch') -> Dict[str, dict]:
+        """
+        Generate taxonomies for several topics in one offline batch job.
+        
+        Args:
+            topics: Market topics to analyze
+            batch: OfflineBatch wrapping the backend that runs the job
+            
+        Returns:
+            Dictionary of topic -> taxonomy for every topic that succeeded
+        """
+        for topic in topics:
+            batch.add_taxonomy(topic, topic)
+        results, errors = batch.run()
+        for topic, error in errors.items():
+            print(f"Taxonomy for {topic} failed: {error}")
+        return results
+
+    @staticmethod
+    def _competitor_query(topic: str, divisions: List[str]) -> str:
+        """Grounded search prompt used by find_competitors."""
+        return f"""
+        Search for the top {topic} companies and products in these categories: {', '.join(divisions)}.
+        
+        For each company/product you find, return a JSON array with this structure:
+        [
+          {{
+            "company_name": "Company Name",
+            "product_name": "Product Name",
+            "official_website_url": "https://example.com",
+            "description": "Brief description"
+          }}
+        ]
+        
+        Find 10-20 major players in this market. Use Google Search to find current, real companies.
+        """
+
+    def find_competitors(self, topic: str, divisions: List[str]) -> List[Dict]:
+        """
+        Use Gemini's built-in Google Search to find current market players.
+        
+        Args:
+            topic: The market topic
+            divisions: List of market divisions/channels
+            
+        Returns:
+            List of competitor dictionaries with company info
+        """
+        query = self._competitor_query(topic, divisions)
+        
+        try:
+            result = self.llm.search_and_analyze(query)
+            return result
+        except Exception as e:
+            print(f"Search failed: {e}")
+            print("Try using manual research or wait for quota reset")
+            return []
+
+
+class AsyncLandscapeCreator(LandscapeCreator):
+    """LandscapeCreator for an AsyncLLMEngine; the methods are coroutines."""
+
+    def __init__(self, llm: 'AsyncLLMEngine'):
+        """
+        Initialize the Landscape Creator with an async LLM engine.
+        
+        Args:
+            llm: An instance of AsyncLLMEngine for market analysis
+        """
+        self.llm = llm
+
+    async def build_taxonomy(self, topic: str) -> dict:
+        return await self.llm.analyze_market(topic)
+
+    async def find_competitors(self, topic: str, divisions: List[str]) -> List[Dict]:
+        query = self._competitor_query(topic, divisions)
+        
+        try:
+            return await self.llm.search_and_analyze(query)
+        except Exception as e:
+            print(f"Search failed: {e}")
+            print("Try using manual research or wait for quota reset")
+            return []
+
+    async def find_competitors_sharded(self, topic: str, shards: List[str], workers: int = 4,
+                                       index: CompetitorIndex = None) -> List[Dict]:
+        """
+        Async variant of LandscapeCreator.find_competitors_sharded; the
+        engine's max_concurrency bounds the searches in flight, so `workers`
+        is unused. Returns the merged competitors.
+        """
+        index = index if index is not None else CompetitorIndex()
+        shards = [s for s in dict.fromkeys(shards) if s]
+        results = await asyncio.gather(*(self.llm.search_and_analyze(self._shard_query(topic, shard))
+                                         for shard in shards))
+
+        def merge():
+            for shard, found in zip(shards, results):
+                for competitor in found:
+                    index.add(competitor, shard)
+            return index.competitors()
+
+        # Resolving redirects does blocking HTTP requests
+        return await asyncio.to_thread(merge)
+
+    async def build_landscape(self, topic: str, updater: 'AsyncLandscapeUpdater',
+                              features_to_check: List[str] = None) -> Dict:
+        """
+        Discovery plus enrichment in one event loop: taxonomy, competitor
+        search, then concurrent scraping and extraction of every player.
+        
+        Args:
+            topic: The market topic
+            updater: AsyncLandscapeUpdater sharing this creator's engine or quota
+            features_to_check: Features to check (the taxonomy's suggested
+                               features by default)
+            
+        Returns:
+            Dictionary with "taxonomy", "competitors" and "products" rows
+        """
+        taxonomy = await self.build_taxonomy(topic)
+        competitors = await self.find_competitors(topic, taxonomy.get('divisions', []))
+        features = features_to_check or taxonomy.get('suggested_features', [])
+        urls = [c['official_website_url'] for c in competitors if c.get('official_website_url')]
+        products = await updater.update_many(urls, features) if urls else []
+        return {"taxonomy": taxonomy, "competitors": competitors, "products": products}
@@ -0,0 +1,209 @@
+import difflib
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+# Legal-form and filler words ignored when comparing company names
+_COMPANY_SUFFIXES = re.compile(
+    r"\b(inc|incorporated|llc|ltd|limited|corp|corporation|co|company|gmbh|ag|sa|sas|bv|plc|pty|"
+    r"technologies|technology|software|labs|group|holdings)\b"
+)
+_INDEX_PAGES = {"index.html", "index.htm", "index.php", "default.aspx", "home"}
+# Language codes sites use as a path prefix (/de/pricing, /en-us/crm); only
+# these count as locales, so /hr or /ai product paths keep their first segment
+_LOCALE_LANGUAGES = frozenset(
+    "ar bg cs da de el en es et fi fr he hi hr hu id it ja ko lt lv ms nb nl no pl pt ro ru sk sl sr sv "
+    "th tr uk vi zh".split()
+)
+_LOCALE_SEGMENT = re.compile(r"^([a-z]{2})(?:[-_][a-z]{2}|[-_]hans|[-_]hant)?$")
+
+
+def _is_locale(segment: str) -> bool:
+    match = _LOCALE_SEGMENT.match(segment)
+    return bool(match) and match.group(1) in _LOCALE_LANGUAGES
+
+
+def site_key(url: str) -> str:
+    """Host without a leading www., used to keep the crawl on one site."""
+    host = urlparse(url).netloc.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def url_key(url: str) -> str:
+    """
+    Canonical key for a vendor URL: host without www. or port, path without
+    locale prefix, index page, trailing slash, query or fragment. The scheme
+    is ignored, so http/https variants of one page share a key.
+
+    A first segment is only a locale prefix when it is a known language
+    code (optionally with a region) and more of the path follows it:
+    acme.com/de/crm keys as acme.com/crm, but acme.com/hr stays as is.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "https://" + url
+    segments = [s for s in urlparse(url).path.lower().split("/") if s]
+    if len(segments) > 1 and _is_locale(segments[0]):
+        segments = segments[1:]
+    if segments and segments[-1] in _INDEX_PAGES:
+        segments = segments[:-1]
+    host = site_key(url)
+    return f"{host}/{'/'.join(segments)}" if segments else host
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase name without punctuation or legal-form suffixes."""
+    name = re.sub(r"[^\w\s]", " ", (name or "").lower())
+    return " ".join(_COMPANY_SUFFIXES.sub(" ", name).split())
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarity of two normalized names in [0, 1]."""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+class CompetitorIndex:
+    """
+    Dedup index merging competitor records found by several searches.
+
+    Two records are the same entity when the product names match on the
+    same host (a shared url_key is enough only when one record has no
+    product name), or when both company and product names match across
+    hosts (regional or vanity domains).
+    Within one company, product names are compared with the company name
+    removed, so "Acme CRM" and "Acme Helpdesk" stay separate; across
+    companies the full names are compared. Names whose numbers differ
+    ("Product 1" / "Product 2") never match.
+
+    Later duplicates only fill fields the first record left empty; the
+    searches (divisions) that found an entity are listed in `divisions`.
+    Safe to share between discovery worker threads.
+    """
+
+    def __init__(self, resolver: Optional[Callable[[str], str]] = None,
+                 product_threshold: float = 0.85, company_threshold: float = 0.9):
+        """
+        Args:
+            resolver: Optional callable returning the final URL after redirects
+            product_threshold: Minimum product name similarity for a match
+            company_threshold: Minimum company name similarity for a cross-host match
+        """
+        self.resolver = resolver
+        self.product_threshold = product_threshold
+        self.company_threshold = company_threshold
+        self.merged = 0
+        self._entries = []
+        self._by_key = {}
+        self._by_host = {}
+        self._by_company = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _resolve(self, url: str) -> str:
+        if self.resolver is None or not url:
+            return url
+        if url not in self._resolved:
+            try:
+                self._resolved[url] = self.resolver(url) or url
+            except Exception as e:
+                logging.info(f"Could not resolve {url}: {e}")
+                self._resolved[url] = url
+        return self._resolved[url]
+
+    def _names(self, competitor: dict):
+        company = normalize_name(competitor.get("company_name"))
+        product = normalize_name(competitor.get("product_name"))
+        # Drop the company's own words from the product name ("Acme CRM" -> "crm")
+        stripped = " ".join(w for w in product.split() if w not in company.split())
+        numbers = tuple(w for w in product.split() if w.isdigit())
+        return company, (stripped or product, product, product.replace(" ", ""), numbers)
+
+    def _same_product(self, a, b, same_company: bool) -> bool:
+        # Numbered editions or fixtures ("Product 1" / "Product 2") are different products
+        if a[3] != b[3]:
+            return False
+        # Spacing variants ("BetaDesk" / "Beta Desk")
+        if a[2] and a[2] == b[2]:
+            return True
+        # Stripped names can shrink to a shared generic word, so they are only compared within one company
+        if same_company:
+            return name_similarity(a[0], b[0]) >= self.product_threshold
+        return name_similarity(a[1], b[1]) >= self.product_threshold
+
+    def _same_company(self, a: str, b: str) -> bool:
+        return name_similarity(a, b) >= self.company_threshold
+
+    def _find(self, key: str, host: str, company: str, product) -> Optional[int]:
+        # One page can list several products, so a shared URL alone does not make a match
+        for i in self._by_key.get(key, []):
+            if not product[0] or not self._entries[i]["_product"][0]:
+                return i
+        for i in self._by_host.get(host, []):
+            entry = self._entries[i]
+            if self._same_product(product, entry["_product"], self._same_company(company, entry["_company"])):
+                return i
+        first_word = company.split()[0] if company else ""
+        for i in self._by_company.get(first_word, []):
+            entry = self._entries[i]
+            if (self._same_company(company, entry["_company"])
+                    and self._same_product(product, entry["_product"], True)):
+                return i
+        return None
+
+    def add(self, competitor: dict, division: str = None) -> bool:
+        """
+        Add one search result.
+
+        Args:
+            competitor: Competitor record (company_name, product_name,
+                        official_website_url, description)
+            division: Search shard that found it
+
+        Returns:
+            True for a new entity, False when merged into an existing one
+        """
+        url = self._resolve(competitor.get("official_website_url") or "")
+        key = url_key(url)
+        host = site_key(f"https://{key}") if key else ""
+        company, product = self._names(competitor)
+
+        with self._lock:
+            index = self._find(key, host, company, product)
+            if index is None:
+                entry = dict(competitor, official_website_url=url, divisions=[division] if division else [],
+                             _company=company, _product=product)
+                self._entries.append(entry)
+                index = len(self._entries) - 1
+                self._by_host.setdefault(host, []).append(index)
+                if company:
+                    self._by_company.setdefault(company.split()[0], []).append(index)
+                if key:
+                    self._by_key.setdefault(key, []).append(index)
+                return True
+
+            entry = self._entries[index]
+            for field, value in competitor.items():
+                if value and not entry.get(field):
+                    entry[field] = value
+            if division and division not in entry["divisions"]:
+                entry["divisions"].append(division)
+            if key and index not in self._by_key.setdefault(key, []):
+                self._by_key[key].append(index)
+            self.merged += 1
+            return False
+
+    def competitors(self) -> List[Dict]:
+        """Merged records in the order they were first found."""
+        with self._lock:
+            return [{k: v for k, v in entry.items() if not k.startswith("_")} for entry in self._entries]
@@ -0,0 +1,181 @@
+import re
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin, urldefrag
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; the BeautifulSoup backend is used instead
+    etree = None
+
+# Elements dropped together with everything inside them
+BOILERPLATE_TAGS = frozenset(["script", "style", "nav", "footer"])
+
+# Anything str.splitlines() breaks on, or a double space
+_BREAKS = re.compile("[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]|  ")
+
+
+def _clean_chunk(text: str) -> str:
+    """Collapse line breaks and runs of spaces in one stripped text node."""
+    if not _BREAKS.search(text):
+        return text
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def html_to_text_bs4(content) -> str:
+    """
+    Convert an HTML document to cleaned plain text with BeautifulSoup.
+
+    Drops script/style/nav/footer elements and collapses whitespace. This
+    is the reference implementation the lxml backend is compared against.
+    """
+    # Imported on first use: the lxml backend never needs it
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # Remove script and style elements
+    for script in soup(list(BOILERPLATE_TAGS)):
+        script.decompose()
+
+    # Get text
+    text = soup.get_text(separator=' ', strip=True)
+
+    # Clean up whitespace
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def _decode(content) -> str:
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        # Declared charset, then the usual single-byte fallbacks, as BeautifulSoup does
+        from bs4.dammit import UnicodeDammit
+        return UnicodeDammit(content, is_html=True).unicode_markup or ''
+
+
+class _PageTarget:
+    """
+    lxml parser target collecting text outside boilerplate elements (and,
+    optionally, link targets) as the document streams through the parser.
+    No tree is built.
+    """
+
+    def __init__(self, collect_links: bool = False):
+        self.chunks = []
+        self.hrefs = [] if collect_links else None
+        self._buffer = []
+        self._skip = 0
+
+    def _flush(self):
+        # libxml2 delivers one text node in several pieces (around entities)
+        if self._buffer:
+            if not self._skip:
+                text = ''.join(self._buffer).strip()
+                if text:
+                    self.chunks.append(_clean_chunk(text))
+            self._buffer = []
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in BOILERPLATE_TAGS:
+            self._skip += 1
+        elif self.hrefs is not None and tag == 'a' and 'href' in attrib:
+            self.hrefs.append(attrib['href'])
+
+    def end(self, tag):
+        self._flush()
+        if tag in BOILERPLATE_TAGS and self._skip:
+            self._skip -= 1
+
+    def data(self, data):
+        self._buffer.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self
+
+
+def _parse_lxml(content, collect_links: bool = False) -> _PageTarget:
+    target = _PageTarget(collect_links)
+    parser = etree.HTMLParser(target=target)
+    parser.feed(_decode(content))
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        # Empty document or one without any element
+        return target.close()
+
+
+def html_to_text_lxml(content) -> str:
+    """
+    Convert an HTML document to cleaned plain text in one streaming lxml
+    pass, without building or mutating a tree. Output matches
+    html_to_text_bs4 except where the two parsers repair broken markup
+    differently.
+    """
+    return ' '.join(_parse_lxml(content).chunks)
+
+
+EXTRACTOR_BACKENDS: Dict[str, Callable] = {"bs4": html_to_text_bs4}
+if etree is not None:
+    EXTRACTOR_BACKENDS["lxml"] = html_to_text_lxml
+
+DEFAULT_BACKEND = "lxml" if etree is not None else "bs4"
+
+
+def get_extractor(backend: Optional[str] = None) -> Callable:
+    """
+    HTML-to-text function for a backend name ("lxml" or "bs4"; None picks
+    lxml when it is installed).
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    name = backend or DEFAULT_BACKEND
+    if name not in EXTRACTOR_BACKENDS:
+        raise ValueError(f"Unknown or unavailable HTML extractor '{name}' "
+                         f"(available: {', '.join(EXTRACTOR_BACKENDS)})")
+    return EXTRACTOR_BACKENDS[name]
+
+
+def html_to_text(content, backend: Optional[str] = None) -> str:
+    """
+    Convert an HTML document to cleaned plain text.
+
+    Drops script/style/nav/footer elements and collapses whitespace.
+
+    Args:
+        content: HTML as bytes or str
+        backend: "lxml" (fast, default when installed) or "bs4"
+    """
+    return get_extractor(backend)(content)
+
+
+def extract_links(content, base_url: str, backend: Optional[str] = None) -> List[str]:
+    """Absolute http(s) link targets of an HTML document, fragments removed, in page order."""
+    if (backend or DEFAULT_BACKEND) == "lxml" and etree is not None:
+        hrefs = _parse_lxml(content, collect_links=True).hrefs
+    else:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, 'html.parser')
+        hrefs = [a['href'] for a in soup.find_all('a', href=True)]
+    links = []
+    seen = set()
+    for href in hrefs:
+        url = urldefrag(urljoin(base_url, href.strip()))[0]
+        if url.startswith(('http://', 'https://')) and url not in seen:
+            seen.add(url)
+            links.append(url)
+    return links
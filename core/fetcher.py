@@ -0,0 +1,211 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import get_telemetry
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+
+class FetchResult:
+    """Outcome of HttpFetcher.fetch()."""
+
+    def __init__(self, url: str, status_code: int, content: bytes = b"",
+                 not_modified: bool = False, text: Optional[str] = None,
+                 bytes_downloaded: int = 0, truncated: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        # True when the server answered 304 and `content` came from the disk cache
+        self.not_modified = not_modified
+        # Previously extracted text for this URL, only set on a 304
+        self.text = text
+        self.bytes_downloaded = bytes_downloaded
+        self.truncated = truncated
+
+
+class HttpFetcher:
+    """
+    Shared HTTP layer for scraping.
+
+    - One pooled requests.Session with a per-host connection limit
+    - Optional on-disk cache storing ETag/Last-Modified, used to send
+      conditional requests; a 304 returns the cached body and text
+    - Per-domain politeness delay between requests
+    - Streaming download capped at `max_bytes`
+
+    Safe to share between the scrape worker threads.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, max_per_host: int = 4,
+                 politeness_delay: float = 1.0, max_bytes: int = 5 * 1024 * 1024,
+                 timeout: float = 10):
+        """
+        Args:
+            cache_path: SQLite file for the HTTP cache (None disables it)
+            max_per_host: Maximum concurrent connections to a single host
+            politeness_delay: Minimum seconds between requests to the same domain
+            max_bytes: Stop downloading a response body after this many bytes
+            timeout: Connect/read timeout in seconds
+        """
+        self.politeness_delay = politeness_delay
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max_per_host, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._next_allowed = {}
+        self._host_lock = threading.Lock()
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if cache_path:
+            directory = os.path.dirname(cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content BLOB,
+                    text TEXT,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    def _wait_for_host(self, url: str) -> float:
+        """Sleep until the politeness delay for this URL's domain has elapsed; returns seconds slept."""
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = slot + self.politeness_delay
+        if slot > now:
+            time.sleep(slot - now)
+            return slot - now
+        return 0.0
+
+    def _cached(self, url: str):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT etag, last_modified, content, text FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def fetch(self, url: str, max_bytes: Optional[int] = None) -> FetchResult:
+        """
+        Fetch a URL, using a conditional GET when a cached copy exists.
+        Recorded as an "http" telemetry event with the bytes downloaded.
+
+        Args:
+            url: Page to fetch
+            max_bytes: Lower download cap for this call (e.g. a caller's remaining budget)
+
+        Raises:
+            requests.exceptions.RequestException: On network or HTTP errors
+        """
+        limit = self.max_bytes if max_bytes is None else min(self.max_bytes, max_bytes)
+        with get_telemetry().span("http", "fetch", url=url) as event:
+            start = time.perf_counter()
+            try:
+                result = self._fetch(url, limit, event)
+            finally:
+                event["request_s"] = time.perf_counter() - start - event.get("throttle_s", 0.0)
+            event.update(status=result.status_code, bytes=result.bytes_downloaded,
+                         not_modified=result.not_modified, truncated=result.truncated)
+            return result
+
+    def _fetch(self, url: str, max_bytes: int, event: dict) -> FetchResult:
+        cached = self._cached(url)
+        headers = {}
+        if cached:
+            etag, last_modified = cached[0], cached[1]
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        event["throttle_s"] = self._wait_for_host(url)
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and cached:
+                logging.info(f"Not modified since last fetch: {url}")
+                return FetchResult(response.url, 304, cached[2] or b"", not_modified=True, text=cached[3])
+
+            response.raise_for_status()
+
+            chunks = []
+            downloaded = 0
+            truncated = False
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                downloaded += len(chunk)
+                if downloaded >= max_bytes:
+                    truncated = True
+                    logging.warning(f"Response from {url} exceeds {max_bytes} bytes, truncating")
+                    break
+            content = b"".join(chunks)[:max_bytes]
+
+            # A truncated body must not be served back later on a 304
+            if not truncated:
+                self._store(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), content)
+            return FetchResult(response.url, response.status_code, content,
+                               bytes_downloaded=downloaded, truncated=truncated)
+
+    def resolve(self, url: str) -> str:
+        """
+        Final URL after redirects, found with a HEAD request.
+
+        Returns the input URL unchanged when the request fails.
+        """
+        self._wait_for_host(url)
+        try:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            return response.url or url
+        except requests.exceptions.RequestException as e:
+            logging.info(f"Could not resolve redirects for {url}: {e}")
+            return url
+
+    def _store(self, url: str, etag: Optional[str], last_modified: Optional[str], content: bytes):
+        if self._db is None or not (etag or last_modified):
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content, text, fetched_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?)",
+                (url, etag, last_modified, content, time.time())
+            )
+            self._db.commit()
+
+    def save_text(self, url: str, text: str):
+        """Remember the extracted text for a cached page so a later 304 can skip parsing."""
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute("UPDATE pages SET text = ? WHERE url = ?", (text, url))
+            self._db.commit()
+
+    def close(self):
+        self.session.close()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+JOB_SCRAPE = "scrape"
+JOB_EXTRACT = "extract"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class Job:
+    """One claimed job."""
+
+    def __init__(self, job_id: int, run_id: str, kind: str, url: str, payload: dict, attempts: int):
+        self.id = job_id
+        self.run_id = run_id
+        self.kind = kind
+        self.url = url
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue shared by the worker processes of a run.
+
+    Workers claim the oldest queued job in a `BEGIN IMMEDIATE` transaction,
+    so each job goes to exactly one process. A finished job may carry a
+    result row for the parent to report; jobs held by a worker that died
+    are put back with requeue_worker.
+    """
+
+    def __init__(self, path: str = ".jobs.sqlite"):
+        """
+        Args:
+            path: SQLite file location, shared by all processes
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                reported INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(run_id, state, id)")
+
+    def enqueue_many(self, run_id: str, kind: str, urls: List[str], payload: dict = None):
+        """Queue one job per URL, all with the same payload."""
+        now, data = time.time(), json.dumps(payload or {})
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO jobs (run_id, kind, url, payload, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, kind, url, data, JOB_QUEUED, now) for url in urls]
+            )
+            self._conn.execute("COMMIT")
+
+    def claim(self, run_id: str, worker: str, batch_size: int = 1) -> List[Job]:
+        """
+        Take the oldest queued job of a run, extractions first so page text
+        does not pile up. When it is an extraction, up to `batch_size` queued
+        extractions are taken together.
+
+        Returns:
+            The claimed jobs (empty when nothing is queued)
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                first = self._conn.execute(
+                    "SELECT kind FROM jobs WHERE run_id = ? AND state = ? ORDER BY kind = ?, id LIMIT 1",
+                    (run_id, JOB_QUEUED, JOB_SCRAPE)
+                ).fetchone()
+                rows = []
+                if first is not None:
+                    limit = max(1, batch_size) if first[0] == JOB_EXTRACT else 1
+                    rows = self._conn.execute(
+                        "SELECT id, kind, url, payload, attempts FROM jobs WHERE run_id = ? AND state = ? AND kind = ? "
+                        "ORDER BY id LIMIT ?", (run_id, JOB_QUEUED, first[0], limit)
+                    ).fetchall()
+                    self._conn.executemany(
+                        "UPDATE jobs SET state = ?, worker = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        [(JOB_RUNNING, worker, time.time(), row[0]) for row in rows]
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [Job(row[0], run_id, row[1], row[2], json.loads(row[3]), row[4] + 1) for row in rows]
+
+    def finish(self, job: Job, result: dict = None, failed: bool = False, follow_up: dict = None):
+        """
+        Close a job, optionally with a result row to report and a follow-up
+        job ({"kind", "payload"}) queued in the same transaction.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET state = ?, result = ?, updated_at = ? WHERE id = ?",
+                    (JOB_FAILED if failed else JOB_DONE, json.dumps(result) if result is not None else None,
+                     time.time(), job.id)
+                )
+                if follow_up is not None:
+                    self._conn.execute(
+                        "INSERT INTO jobs (run_id, kind, url, payload, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (job.run_id, follow_up["kind"], job.url, json.dumps(follow_up.get("payload") or {}),
+                         JOB_QUEUED, time.time())
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def requeue_worker(self, run_id: str, worker: str, max_attempts: int = 3) -> int:
+        """
+        Put the running jobs of a dead worker back in the queue. A job that
+        was already tried `max_attempts` times fails instead, with a
+        "<kind>_failed" result row, so one page cannot crash workers forever.
+
+        Returns:
+            Number of jobs requeued
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, kind, url, attempts FROM jobs WHERE run_id = ? AND worker = ? AND state = ?",
+                    (run_id, worker, JOB_RUNNING)
+                ).fetchall()
+                now = time.time()
+                requeued = 0
+                for job_id, kind, url, attempts in rows:
+                    if attempts >= max_attempts:
+                        result = {"url": url, "status": f"{kind}_failed",
+                                  "error": f"Worker process died {attempts} times on this job"}
+                        self._conn.execute("UPDATE jobs SET state = ?, result = ?, updated_at = ? WHERE id = ?",
+                                           (JOB_FAILED, json.dumps(result), now, job_id))
+                    else:
+                        self._conn.execute("UPDATE jobs SET state = ?, worker = NULL, updated_at = ? WHERE id = ?",
+                                           (JOB_QUEUED, now, job_id))
+                        requeued += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return requeued
+
+    def take_results(self, run_id: str) -> List[dict]:
+        """Result rows not yet reported, marking them reported."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, result FROM jobs WHERE run_id = ? AND reported = 0 AND result IS NOT NULL ORDER BY id",
+                    (run_id,)
+                ).fetchall()
+                self._conn.executemany("UPDATE jobs SET reported = 1 WHERE id = ?", [(row[0],) for row in rows])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [json.loads(row[1]) for row in rows]
+
+    def counts(self, run_id: str) -> Dict[str, int]:
+        """Job counts by state for a run."""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT state, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY state", (run_id,)
+            ).fetchall())
+
+    def purge(self, run_id: str):
+        """Delete every job of a finished or abandoned run."""
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE run_id = ?", (run_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
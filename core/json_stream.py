@@ -0,0 +1,126 @@
+import json
+import logging
+from typing import List, Optional
+
+
+class JSONObjectStreamParser:
+    """
+    Incrementally extracts top-level JSON objects from streamed model text.
+
+    Objects are emitted as soon as their closing brace arrives, whether
+    they sit inside a JSON array, a ```json fence or surrounding prose.
+    Text outside objects is ignored, so citation markers like "[1]" or
+    apostrophes in prose can't confuse it. If the stream is cut off,
+    finish() tries to repair the trailing partial object.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.emitted = 0
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Consume a chunk of text and return the objects completed by it."""
+        objects = []
+        for ch in chunk:
+            if self._depth == 0:
+                if ch == '{':
+                    self._buffer = [ch]
+                    self._depth = 1
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._load(''.join(self._buffer))
+                    self._buffer = []
+                    if obj is not None:
+                        objects.append(obj)
+        self.emitted += len(objects)
+        return objects
+
+    def _load(self, text: str) -> Optional[dict]:
+        try:
+            obj = json.loads(text)
+        except ValueError as e:
+            logging.warning(f"Skipping malformed JSON object in stream: {e}")
+            return None
+        return obj if isinstance(obj, dict) else None
+
+    def finish(self) -> List[dict]:
+        """
+        Flush at end of stream. Returns the repaired trailing object if the
+        stream stopped mid-object and a valid prefix can be recovered.
+        """
+        if self._depth == 0 or not self._buffer:
+            return []
+        partial = ''.join(self._buffer)
+        self._buffer = []
+        repaired = _repair_truncated_object(partial)
+        if repaired is not None:
+            logging.info("Recovered a partial object from a truncated stream")
+            self.emitted += 1
+            return [repaired]
+        return []
+
+
+def _repair_truncated_object(text: str) -> Optional[dict]:
+    """Close a truncated JSON object, dropping the last incomplete member if needed."""
+    # Try progressively shorter prefixes ending at a member boundary
+    cut_points = [len(text)] + [i for i in range(len(text) - 1, 0, -1) if text[i] == ',']
+    for cut in cut_points[:50]:
+        candidate = text[:cut].rstrip().rstrip(',')
+        closers = _closers_for(candidate)
+        if closers is None:
+            continue
+        try:
+            obj = json.loads(candidate + closers)
+        except ValueError:
+            continue
+        if isinstance(obj, dict) and obj:
+            return obj
+    return None
+
+
+def _closers_for(text: str) -> Optional[str]:
+    """Brackets (and a quote) needed to close `text`; None if it ends inside a string."""
+    stack = []
+    in_string = False
+    escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]' and stack:
+            stack.pop()
+    if in_string:
+        return None
+    return ''.join(reversed(stack))
+
+
+def parse_json_objects(text: str) -> List[dict]:
+    """All top-level JSON objects in a complete (or truncated) text."""
+    parser = JSONObjectStreamParser()
+    return parser.feed(text) + parser.finish()
@@ -1,105 +1,565 @@
-import json
-import time
-import logging
-import re
-from typing import List, Dict, Any
-from google.genai import types
-from core.config import rate_limit
-
-class LLMEngine:
-    def __init__(self, client, model_name: str):
-        self.client = client
-        self.model_name = model_name
-
-    def _safe_generate(self, prompt: str, config: types.GenerateContentConfig):
-        """
-        Infinite Patience logic: waits for quota resets and handles server busy errors.
-        """
-        max_attempts = 15 
-        
-        for attempt in range(1, max_attempts + 1):
-            try:
-                rate_limit()
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt,
-                    config=config
-                )
-                return response
-            
-            except Exception as e:
-                err_msg = str(e).upper()
-                
-                # Handle Quota (429) or Server Overload (503)
-                if any(x in err_msg for x in ["429", "RESOURCE_EXHAUSTED", "503", "UNAVAILABLE", "OVERLOADED"]):
-                    wait_time = 65 
-                    logging.warning(f"\n[!] Limit hit. Waiting {wait_time}s for reset... (Attempt {attempt}/{max_attempts})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    # If it's a 400 or other fatal error, raise it immediately
-                    raise e
-                    
-        raise Exception("Max patience reached. Please try again later.")
-
-    def analyze_market(self, topic: str) -> dict:
-        prompt = f"Analyze the market for: {topic}. Return JSON with: market_name, definition, divisions, suggested_features, sub_divisions."
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            tools=[], 
-            temperature=0.2
-        )
-        response = self._safe_generate(prompt, config)
-        return json.loads(response.text)
-
-    def search_and_analyze(self, query: str) -> list:
-        """
-        Uses the corrected Google Search tool (google_search).
-        """
-        logging.info("Initiating Google Search grounding...")
-        
-        # Changed 'google_search_retrieval' to 'google_search'
-        search_tool = types.Tool(
-            google_search=types.GoogleSearch()
-        )
-
-        config = types.GenerateContentConfig(
-            tools=[search_tool],
-            temperature=0.0 
-        )
-
-        try:
-            response = self._safe_generate(query, config)
-            if response and response.text:
-                return self._parse_json_from_text(response.text)
-            return []
-        except Exception as e:
-            logging.error(f"Search failed: {e}")
-            return []
-
-    def extract_product_data(self, raw_text: str, features_to_check: List[str]) -> dict:
-        prompt = f"Analyze: {raw_text[:8000]}. Check features: {features_to_check}."
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            tools=[],
-            temperature=0.1
-        )
-        response = self._safe_generate(prompt, config)
-        return json.loads(response.text)
-
-    def _parse_json_from_text(self, text_content: str) -> list:
-        """Extracts JSON array even if the model provides conversational context."""
-        try:
-            # Look for the JSON block [...]
-            json_match = re.search(r'\[\s*\{.*\}\s*\]', text_content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
-            
-            # Look for single JSON object {...}
-            json_obj_match = re.search(r'\{\s*".*":.*\s*\}', text_content, re.DOTALL)
-            if json_obj_match:
-                return [json.loads(json_obj_match.group(0))]
-        except Exception as e:
-            logging.error(f"JSON Parsing failed: {e}")
-
-        return []
+import json
+import logging
+import time
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Type
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+from core.config import get_rate_limiter, get_circuit_breaker, get_telemetry, AUTO_MODEL
+from core.rate_limiter import RateLimiter, estimate_tokens, usage_prompt_tokens, usage_output_tokens
+from core.retry import RetryPolicy
+from core.router import ModelRouter
+from core.cache import LLMCache, make_cache_key
+from core.context import pack_context, DEFAULT_TOKEN_BUDGET
+from core.json_stream import JSONObjectStreamParser, parse_json_objects
+from core.structured import (
+    ValidationStats, response_schema, load_record, load_records, try_validate,
+    build_repair_request, build_list_repair_request, merge_patch
+)
+from models.schemas import Product, LandscapeTaxonomy, Competitor
+
+# Input tokens per multi-vendor extraction request
+DEFAULT_BATCH_TOKENS = 16000
+
+def record_usage(event: dict, response):
+    """Add a response's token counts to a telemetry event."""
+    event["prompt_tokens"] = usage_prompt_tokens(response) or 0
+    event["output_tokens"] = usage_output_tokens(response) or 0
+
+class LLMEngine:
+    def __init__(self, client, model_name: str, limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, cache: LLMCache = None,
+                 router: ModelRouter = None, max_repairs: int = 1):
+        self.client = client
+        self.model_name = model_name
+        # model_name 'auto' routes each call across the default models
+        if router is None and model_name == AUTO_MODEL:
+            router = ModelRouter()
+        self.router = router
+        # Shared per-model limiter and circuit breaker unless the caller supplies its own.
+        # With a router, limits and breakers are tracked per routed model instead.
+        self.limiter = None if router else limiter or get_rate_limiter(model_name)
+        self.retry_policy = retry_policy or RetryPolicy(
+            breaker=None if router else get_circuit_breaker(model_name))
+        # Optional persistent response cache; None disables caching
+        self.cache = cache
+        # Follow-up calls allowed per record that fails schema validation
+        self.max_repairs = max_repairs
+        self.validation_stats = ValidationStats()
+
+    def cache_model(self, method: str = None) -> str:
+        """Model name used in cache keys (the task's first-choice model when routing)."""
+        return self.router.primary(method) if self.router else self.model_name
+
+    def _safe_generate(self, prompt: str, config: types.GenerateContentConfig, method: str = None):
+        """
+        Calls the model under the shared rate limiter, retrying transient
+        quota and server errors according to self.retry_policy.
+
+        When a cache is configured, responses are looked up under a hash of
+        model, prompt and config. Nothing is written here: callers store the
+        validated result with store_validated, so a malformed answer is never
+        served from the cache. Each call is recorded as an "llm" telemetry event.
+        """
+        with get_telemetry().span("llm", method or "request") as event:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = make_cache_key(self.cache_model(method), prompt, config)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    logging.info(f"Cache hit for {method or 'request'}, skipping API call")
+                    event["cache_hits"] = 1
+                    return cached
+
+            est_tokens = estimate_tokens(prompt)
+            event.update(throttle_s=0.0, request_s=0.0, attempts=0)
+
+            def call_model(model_name: str, limiter: RateLimiter):
+                event["throttle_s"] += limiter.acquire(est_tokens)
+                event["attempts"] += 1
+                event["model"] = model_name
+                start = time.perf_counter()
+                try:
+                    response = self.client.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=config
+                    )
+                except Exception:
+                    # Rejected calls don't consume input tokens
+                    limiter.record_usage(est_tokens, 0)
+                    raise
+                finally:
+                    event["request_s"] += time.perf_counter() - start
+                limiter.record_usage(est_tokens, usage_prompt_tokens(response))
+                return response
+
+            def attempt():
+                if self.router is None:
+                    return call_model(self.model_name, self.limiter)
+                return self.router.call(method, est_tokens, lambda m: call_model(m, get_rate_limiter(m)))
+
+            try:
+                response = self.retry_policy.call(attempt)
+            finally:
+                event["retries"] = max(0, event["attempts"] - 1)
+            record_usage(event, response)
+            return response
+
+    def store_validated(self, prompt: str, config: types.GenerateContentConfig, method: str, data, response=None):
+        """
+        Cache a validated record (or list of records) as the answer to a
+        request, with the TTL for `method`. Skipped when `response` was
+        itself served from the cache.
+        """
+        if self.cache is None or getattr(response, "from_cache", False):
+            return
+        self.cache.put(make_cache_key(self.cache_model(method), prompt, config), json.dumps(data), method)
+
+    def build_market_request(self, topic: str) -> Tuple[str, types.GenerateContentConfig]:
+        """Prompt and config for analyze_market; shared with the offline batch mode."""
+        prompt = f"Analyze the market for: {topic}. Return JSON with: market_name, definition, divisions, suggested_features, sub_divisions."
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_json_schema=response_schema(LandscapeTaxonomy),
+            tools=[], 
+            temperature=0.2
+        )
+        return prompt, config
+
+    def analyze_market(self, topic: str) -> dict:
+        prompt, config = self.build_market_request(topic)
+        response = self._safe_generate(prompt, config, method="analyze_market")
+        taxonomy = self.validate_record(LandscapeTaxonomy, load_record(response.text), prompt, config, "analyze_market")
+        self.store_validated(prompt, config, "analyze_market", taxonomy, response)
+        return taxonomy
+
+    def validate_record(self, model_cls: Type[BaseModel], record: dict, prompt: str,
+                        config: types.GenerateContentConfig, method: str = None) -> dict:
+        """
+        Validate a response record against a schema, re-asking for bad fields.
+
+        When validation fails, a follow-up request with the same prompt asks
+        only for the missing or invalid fields (at most `max_repairs` times)
+        and the answer is merged into the record.
+
+        Args:
+            model_cls: Pydantic model the record must satisfy
+            record: Parsed response object
+            prompt: Prompt that produced the record
+            config: Config that produced the record
+            method: Task name, for routing, caching and counters
+
+        Returns:
+            The validated record as a dictionary
+
+        Raises:
+            ValidationError: If the record is still invalid after the repairs
+        """
+        for attempt in range(self.max_repairs + 1):
+            result, repair = self._validation_step(model_cls, record, prompt, config, method, attempt)
+            if repair is None:
+                return result
+            repair_prompt, repair_config, fields = repair
+            response = self._safe_generate(repair_prompt, repair_config, method=method)
+            record = merge_patch(record, load_record(response.text), fields)
+
+    def _validation_step(self, model_cls: Type[BaseModel], record: dict, prompt: str,
+                         config: types.GenerateContentConfig, method: str, attempt: int):
+        """
+        One pass of validate_record, shared with AsyncLLMEngine.
+
+        Returns:
+            (validated record, None), or (None, (prompt, config, fields)) for
+            the repair request to send next
+
+        Raises:
+            ValidationError: If the record is invalid and `attempt` was the last repair
+        """
+        model, error = try_validate(model_cls, record)
+        if model is not None:
+            if attempt:
+                self.validation_stats.record_repair_result(1, 0)
+            else:
+                self.validation_stats.record_valid()
+            return model.model_dump(), None
+        if not attempt:
+            self.validation_stats.record_failure(method)
+        if attempt == self.max_repairs:
+            self.validation_stats.record_repair_result(0, 1)
+            raise error
+        repair_prompt, repair_config, fields = build_repair_request(model_cls, prompt, config, record, error)
+        logging.info(f"{model_cls.__name__} from {method or 'request'} failed validation, "
+                     f"re-asking for: {', '.join(fields)}")
+        self.validation_stats.record_repair_call()
+        return None, (repair_prompt, repair_config, fields)
+
+    def validate_records(self, model_cls: Type[BaseModel], records: List[dict], prompt: str,
+                         config: types.GenerateContentConfig, method: str = None,
+                         key_field: str = "company_name") -> List[dict]:
+        """
+        List counterpart of validate_record: invalid records are completed in
+        one follow-up request and matched back by `key_field`. Records that
+        stay invalid are dropped.
+
+        Returns:
+            Validated records as dictionaries, in input order
+        """
+        results, invalid = self._split_valid(model_cls, records, method)
+        if invalid:
+            repaired = self._repair_records(model_cls, [r for _, r in invalid], prompt, config, method, key_field)
+            for (index, _), record in zip(invalid, repaired):
+                results[index] = record
+        return [r for r in results if r is not None]
+
+    def _split_valid(self, model_cls: Type[BaseModel], records: List[dict],
+                     method: str) -> Tuple[List[Optional[dict]], List[Tuple[int, dict]]]:
+        """Validated records (None where invalid) and the (index, record) pairs that failed."""
+        results, invalid = [], []
+        for record in records:
+            model, _ = try_validate(model_cls, record)
+            if model is not None:
+                results.append(model.model_dump())
+            else:
+                results.append(None)
+                invalid.append((len(results) - 1, record))
+        self.validation_stats.record_valid(len(records) - len(invalid))
+        if invalid:
+            self.validation_stats.record_failure(method, len(invalid))
+        return results, invalid
+
+    def _repair_records(self, model_cls: Type[BaseModel], records: List[dict], prompt: str,
+                        config: types.GenerateContentConfig, method: str, key_field: str) -> List[dict]:
+        """One follow-up request for several invalid records; None for each one left invalid."""
+        patches = []
+        repair = self._list_repair_request(model_cls, records, prompt, config, method, key_field)
+        if repair is not None:
+            try:
+                patches = load_records(self._safe_generate(*repair, method=method).text or "")
+            except Exception as e:
+                logging.warning(f"Repair request failed: {e}")
+        return self._merge_repairs(model_cls, records, patches, key_field)
+
+    def _list_repair_request(self, model_cls: Type[BaseModel], records: List[dict], prompt: str,
+                             config: types.GenerateContentConfig, method: str,
+                             key_field: str) -> Optional[Tuple[str, types.GenerateContentConfig]]:
+        """The follow-up request for _repair_records, or None when nothing can be re-asked."""
+        keyed = [r for r in records if r.get(key_field)]
+        if not keyed or not self.max_repairs:
+            return None
+        logging.info(f"{len(keyed)} {model_cls.__name__} records from {method or 'request'} "
+                     f"failed validation, re-asking in one request")
+        self.validation_stats.record_repair_call()
+        return build_list_repair_request(model_cls, prompt, config, keyed, key_field)
+
+    def _merge_repairs(self, model_cls: Type[BaseModel], records: List[dict], patches: List[dict],
+                       key_field: str) -> List[Optional[dict]]:
+        """Merge repair answers into their records by `key_field`; None for each one left invalid."""
+        by_key = {str(p.get(key_field)): p for p in patches}
+        repaired = []
+        for record in records:
+            merged = merge_patch(record, by_key.get(str(record.get(key_field)), {}), model_cls.model_fields)
+            model, _ = try_validate(model_cls, merged)
+            repaired.append(model.model_dump() if model is not None else None)
+        fixed = sum(1 for r in repaired if r is not None)
+        self.validation_stats.record_repair_result(fixed, len(records) - fixed)
+        return repaired
+
+    def build_search_config(self) -> types.GenerateContentConfig:
+        """Config for grounded search calls."""
+        # Changed 'google_search_retrieval' to 'google_search'
+        search_tool = types.Tool(
+            google_search=types.GoogleSearch()
+        )
+
+        return types.GenerateContentConfig(
+            tools=[search_tool],
+            temperature=0.0 
+        )
+
+    def search_and_analyze(self, query: str) -> list:
+        """
+        Uses the corrected Google Search tool (google_search).
+        """
+        logging.info("Initiating Google Search grounding...")
+        config = self.build_search_config()
+
+        try:
+            response = self._safe_generate(query, config, method="search_and_analyze")
+            if response and response.text:
+                competitors = self.validate_records(Competitor, self._parse_json_from_text(response.text),
+                                                    query, config, "search_and_analyze")
+                self.store_validated(query, config, "search_and_analyze", competitors, response)
+                return competitors
+            return []
+        except Exception as e:
+            logging.error(f"Search failed: {e}")
+            return []
+
+    def build_extract_request(self, raw_text: str, features_to_check: List[str],
+                              token_budget: int = DEFAULT_TOKEN_BUDGET) -> Tuple[str, types.GenerateContentConfig]:
+        """
+        Prompt and config for extract_product_data; shared with the offline
+        batch mode. Callers pass the scraped text as-is: this is where it is
+        packed into `token_budget`.
+        """
+        return self._extract_request(self._pack(raw_text, features_to_check, token_budget), features_to_check)
+
+    @staticmethod
+    def _pack(raw_text: str, features_to_check: List[str], token_budget: int) -> str:
+        """The most relevant passages of a page, fitted into the TPM-safe budget."""
+        context = pack_context(raw_text, features_to_check, token_budget)
+        if len(context) < len(raw_text):
+            logging.info(f"Packed {len(raw_text)} characters into {len(context)} "
+                         f"relevant characters to save TPM quota")
+        return context
+
+    def _extract_request(self, context: str, features_to_check: List[str]) -> Tuple[str, types.GenerateContentConfig]:
+        """Prompt and config for an already packed context."""
+        prompt = f"Analyze: {context}. Check features: {features_to_check}."
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_json_schema=response_schema(Product),
+            tools=[],
+            temperature=0.1
+        )
+        return prompt, config
+
+    def search_and_analyze_stream(self, query: str) -> Iterator[dict]:
+        """
+        Streaming variant of search_and_analyze: yields each JSON object as
+        soon as the model finishes writing it.
+
+        Quota and availability errors raised before the first chunk are
+        retried like any other call. If the stream breaks later, the objects
+        already received are kept and a trailing partial object is
+        recovered where possible. Objects that fail Competitor validation are
+        held back and repaired together once the stream ends.
+
+        Recorded as an "llm" telemetry event once the stream ends; its wall
+        time includes the time the consumer spent between results.
+        """
+        logging.info("Initiating streamed Google Search grounding...")
+        method = "search_and_analyze"
+        stage = "search_and_analyze_stream"
+        config = self.build_search_config()
+        telemetry = get_telemetry()
+        started = time.perf_counter()
+
+        cached = None
+        if self.cache is not None:
+            cached = self.cache.get(make_cache_key(self.cache_model(method), query, config))
+        if cached is not None:
+            logging.info(f"Cache hit for {method}, skipping API call")
+            telemetry.record("llm", stage, time.perf_counter() - started, cache_hits=1)
+            yield from self.validate_records(Competitor, self._parse_json_from_text(cached.text),
+                                             query, config, method)
+            return
+
+        est_tokens = estimate_tokens(query)
+        event = {"throttle_s": 0.0, "attempts": 0}
+
+        def open_stream(model_name: str, limiter: RateLimiter):
+            event["throttle_s"] += limiter.acquire(est_tokens)
+            event["attempts"] += 1
+            event["model"] = model_name
+            try:
+                stream = iter(self.client.models.generate_content_stream(
+                    model=model_name,
+                    contents=query,
+                    config=config
+                ))
+                # Pull the first chunk so quota errors surface inside the retry loop
+                first = next(stream, None)
+            except Exception:
+                limiter.record_usage(est_tokens, 0)
+                raise
+            return first, stream, limiter
+
+        def attempt():
+            if self.router is None:
+                return open_stream(self.model_name, self.limiter)
+            return self.router.call(method, est_tokens, lambda m: open_stream(m, get_rate_limiter(m)))
+
+        try:
+            first, stream, limiter = self.retry_policy.call(attempt)
+        except Exception as e:
+            logging.error(f"Search failed: {e}")
+            telemetry.record("llm", stage, time.perf_counter() - started, error=type(e).__name__,
+                             retries=max(0, event["attempts"] - 1), **event)
+            return
+        event["first_chunk_s"] = round(time.perf_counter() - started, 4)
+
+        parser = JSONObjectStreamParser()
+        found = []
+        invalid = []
+        last = first
+        complete = False
+
+        def validated(objects: List[dict]) -> Iterator[dict]:
+            for obj in objects:
+                model, _ = try_validate(Competitor, obj)
+                if model is None:
+                    invalid.append(obj)
+                    continue
+                self.validation_stats.record_valid()
+                found.append(model.model_dump())
+                yield found[-1]
+
+        try:
+            chunk = first
+            while chunk is not None:
+                last = chunk
+                if chunk.text:
+                    yield from validated(parser.feed(chunk.text))
+                chunk = next(stream, None)
+            complete = True
+        except Exception as e:
+            logging.error(f"Search stream interrupted after {parser.emitted} results: {e}")
+            event["error"] = type(e).__name__
+        yield from validated(parser.finish())
+
+        limiter.record_usage(est_tokens, usage_prompt_tokens(last) if last is not None else None)
+        event["retries"] = max(0, event["attempts"] - 1)
+        record_usage(event, last)
+        telemetry.record("llm", stage, time.perf_counter() - started, results=parser.emitted, **event)
+
+        if invalid:
+            self.validation_stats.record_failure(method, len(invalid))
+            for record in self._repair_records(Competitor, invalid, query, config, method, "company_name"):
+                if record is not None:
+                    found.append(record)
+                    yield record
+        # Only a complete answer is cached, after validation and repair
+        if complete and found:
+            self.store_validated(query, config, method, found)
+
+    def extract_product_data(self, raw_text: str, features_to_check: List[str],
+                             token_budget: int = DEFAULT_TOKEN_BUDGET) -> dict:
+        return self._extract_packed(self._pack(raw_text, features_to_check, token_budget), features_to_check)
+
+    def _extract_packed(self, context: str, features_to_check: List[str]) -> dict:
+        prompt, config = self._extract_request(context, features_to_check)
+        response = self._safe_generate(prompt, config, method="extract_product_data")
+        product = self.validate_record(Product, load_record(response.text), prompt, config, "extract_product_data")
+        self.store_validated(prompt, config, "extract_product_data", product, response)
+        return product
+
+    def extract_products_batch(self, texts: Dict[str, str], features_to_check: List[str],
+                               token_budget: int = DEFAULT_TOKEN_BUDGET,
+                               max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+                               max_batch_size: int = 8) -> Tuple[Dict[str, dict], Dict[str, Exception]]:
+        """
+        Extract several vendors per request.
+
+        Each vendor's page text is packed to `token_budget`, then vendors are
+        grouped into prompts of at most `max_batch_size` vendors and
+        `max_batch_tokens` input tokens. The model returns one keyed record
+        per vendor; records that are missing or fail Product validation are
+        individually repaired: missing records are re-extracted with
+        extract_product_data, invalid ones only have their bad fields re-asked.
+        Validated products are cached under each vendor's single-extraction
+        key, and vendors already cached there are not sent again.
+
+        Args:
+            texts: {vendor key: scraped page text}
+            features_to_check: Feature names to check for every vendor
+            token_budget: Input tokens of page text per vendor
+            max_batch_tokens: Input tokens per batched request
+            max_batch_size: Vendors per batched request
+
+        Returns:
+            (products by key, errors by key) covering every input key
+        """
+        method = "extract_product_data"
+        contexts = {key: self._pack(text, features_to_check, token_budget) for key, text in texts.items()}
+
+        products, errors, retry, pending = {}, {}, [], {}
+        for key, context in contexts.items():
+            prompt, config = self._extract_request(context, features_to_check)
+            cached = self.cache.get(make_cache_key(self.cache_model(method), prompt, config)) if self.cache else None
+            if cached is None:
+                pending[key] = context
+                continue
+            try:
+                products[key] = self.validate_record(Product, load_record(cached.text), prompt, config, method)
+            except Exception as e:
+                errors[key] = e
+
+        batches, current, current_tokens = [], [], 0
+        for key, context in pending.items():
+            tokens = estimate_tokens(context)
+            if current and (len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(key)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+
+        for batch in batches:
+            records = {}
+            try:
+                records = self._extract_batch_records({key: contexts[key] for key in batch}, features_to_check)
+            except Exception as e:
+                logging.warning(f"Batched extraction of {len(batch)} vendors failed: {e}")
+            for key in batch:
+                record = records.get(key)
+                if record is None:
+                    retry.append(key)
+                    continue
+                prompt, config = self._extract_request(contexts[key], features_to_check)
+                try:
+                    products[key] = self.validate_record(Product, record, prompt, config, method)
+                except Exception as e:
+                    errors[key] = e
+                    continue
+                self.store_validated(prompt, config, method, products[key])
+
+        if retry:
+            logging.info(f"Re-extracting {len(retry)} vendors individually")
+        for key in retry:
+            try:
+                products[key] = self._extract_packed(contexts[key], features_to_check)
+            except Exception as e:
+                errors[key] = e
+        return products, errors
+
+    def _extract_batch_records(self, contexts: Dict[str, str], features_to_check: List[str]) -> Dict[str, dict]:
+        """One request for several vendors; returns the raw records by vendor key."""
+        fields = ", ".join(Product.model_fields)
+        schema = response_schema(Product, many=True)
+        schema["items"]["properties"] = {"vendor_key": {"type": "string"}, **schema["items"]["properties"]}
+        schema["items"]["required"] = ["vendor_key"] + schema["items"]["required"]
+        sections = "\n\n".join(f"### VENDOR {key}\n{context}" for key, context in contexts.items())
+        prompt = (
+            f"Analyze each vendor page below. Check features: {features_to_check}.\n"
+            f"Return a JSON array with one object per vendor, each with \"vendor_key\" set to the "
+            f"vendor's key and the fields: {fields}. Use null for unknown optional values.\n\n"
+            f"{sections}"
+        )
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_json_schema=schema,
+            tools=[],
+            temperature=0.1
+        )
+        response = self._safe_generate(prompt, config, method="extract_product_data")
+        data = load_records(response.text)
+        if len(data) == 1 and "vendor_key" not in data[0]:
+            # Tolerate {"vendors": [...]} style wrappers
+            data = next((v for v in data[0].values() if isinstance(v, list)), data)
+        records = {}
+        for record in data:
+            if isinstance(record, dict) and str(record.get("vendor_key")) in contexts:
+                key = str(record.pop("vendor_key"))
+                records[key] = record
+        return records
+
+    def _parse_json_from_text(self, text_content: str) -> list:
+        """Extracts JSON objects even if the model provides conversational context."""
+        try:
+            return parse_json_objects(text_content)
+        except Exception as e:
+            logging.error(f"JSON Parsing failed: {e}")
+
+        return []
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills at
+    `rate` tokens per second.
+
+    The level may go negative when a caller reserves more than is
+    available; the deficit tells the caller how long to wait before its
+    reservation becomes valid. Not thread-safe on its own, RateLimiter
+    guards it with a lock.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.level = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.level = min(self.capacity, self.level + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Debit `amount` and return the seconds until the debit is covered."""
+        self._refill(now)
+        self.level -= amount
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+
+    def peek(self, amount: float, now: float) -> float:
+        """Seconds until `amount` could be debited without waiting, without debiting it."""
+        self._refill(now)
+        deficit = amount - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def credit(self, amount: float, now: float):
+        """Return (or, with a negative amount, further debit) tokens."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget for one model.
+
+    Both buckets refill continuously at the configured RPM/TPM, so naturally
+    spaced calls never wait and sustained throughput is the full budget.
+    Short bursts up to the bucket capacity go through immediately.
+
+    One instance is meant to be shared by every thread and asyncio task
+    that calls the same model; see core.config.get_rate_limiter.
+    """
+
+    def __init__(self, rpm: float, tpm: Optional[float] = None,
+                 burst_fraction: float = 0.2, name: str = ""):
+        """
+        Args:
+            rpm: Requests allowed per minute
+            tpm: Input tokens allowed per minute (None disables the TPM bucket)
+            burst_fraction: Share of the per-minute budget that may be spent at once
+            name: Label used in log messages (usually the model name)
+        """
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = self._make_bucket(rpm, burst_fraction)
+        self._tokens = self._make_bucket(tpm, burst_fraction) if tpm else None
+        self._lock = threading.Lock()
+
+        # Counters for reporting
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.total_wait_seconds = 0.0
+
+    @staticmethod
+    def _make_bucket(per_minute: float, burst_fraction: float) -> TokenBucket:
+        capacity = max(1.0, per_minute * burst_fraction)
+        rate = per_minute / 60.0
+        return TokenBucket(capacity, rate)
+
+    def _reserve(self, tokens: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = self._requests.reserve(1, now)
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            self.total_requests += 1
+            self.total_tokens += tokens
+            self.total_wait_seconds += wait
+        return wait
+
+    def time_until_available(self, tokens: int = 0) -> float:
+        """Seconds acquire(tokens) would currently wait; nothing is reserved."""
+        now = time.monotonic()
+        with self._lock:
+            wait = self._requests.peek(1, now)
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.peek(tokens, now))
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request and `tokens` input tokens are available.
+
+        Args:
+            tokens: Estimated input tokens for the upcoming call
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logging.info(f"Rate limiting{f' [{self.name}]' if self.name else ''}: "
+                         f"Cooling down for {wait:.1f}s to protect quota...")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """Asyncio counterpart of acquire() that yields to the event loop while waiting."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logging.info(f"Rate limiting{f' [{self.name}]' if self.name else ''}: "
+                         f"Cooling down for {wait:.1f}s to protect quota...")
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Correct the TPM bucket once the real token count is known.
+
+        Args:
+            estimated_tokens: Tokens reserved by acquire()
+            actual_tokens: Tokens reported in usage_metadata (0 for a failed
+                call, None when the response carried no usage data)
+        """
+        if self._tokens is None or actual_tokens is None:
+            return
+        delta = estimated_tokens - actual_tokens
+        if delta:
+            with self._lock:
+                self._tokens.credit(delta, time.monotonic())
+                self.total_tokens -= delta
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose buckets live in a SQLite ledger file, so every process
+    using the same ledger and model draws from one RPM/TPM budget.
+
+    Each reservation is one short `BEGIN IMMEDIATE` transaction (the file
+    lock serializes processes), and bucket timestamps use wall-clock time
+    so they mean the same thing in every process. Waiting happens outside
+    the transaction. Usage counters remain per process.
+    """
+
+    def __init__(self, ledger_path: str, rpm: float, tpm: Optional[float] = None,
+                 burst_fraction: float = 0.2, name: str = ""):
+        """
+        Args:
+            ledger_path: SQLite file shared by all processes
+            rpm, tpm, burst_fraction, name: As for RateLimiter
+        """
+        super().__init__(rpm, tpm, burst_fraction, name)
+        self.ledger_path = ledger_path
+        directory = os.path.dirname(ledger_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(ledger_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                level REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (name, kind)
+            )
+        """)
+
+    def _transact(self, fn):
+        """Run fn(now) with both buckets loaded from the ledger, then write them back."""
+        buckets = {"rpm": self._requests, "tpm": self._tokens}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                for kind, bucket in buckets.items():
+                    if bucket is None:
+                        continue
+                    row = self._conn.execute("SELECT level, updated_at FROM buckets WHERE name = ? AND kind = ?",
+                                             (self.name, kind)).fetchone()
+                    bucket.level, bucket._updated = row if row else (bucket.capacity, now)
+                result = fn(now)
+                for kind, bucket in buckets.items():
+                    if bucket is not None:
+                        self._conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)",
+                                           (self.name, kind, bucket.level, bucket._updated))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def _reserve(self, tokens: int) -> float:
+        def reserve(now):
+            wait = self._requests.reserve(1, now)
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            return wait
+
+        wait = self._transact(reserve)
+        with self._lock:
+            self.total_requests += 1
+            self.total_tokens += tokens
+            self.total_wait_seconds += wait
+        return wait
+
+    def time_until_available(self, tokens: int = 0) -> float:
+        def peek(now):
+            wait = self._requests.peek(1, now)
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.peek(tokens, now))
+            return wait
+
+        return self._transact(peek)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if self._tokens is None or actual_tokens is None:
+            return
+        delta = estimated_tokens - actual_tokens
+        if delta:
+            self._transact(lambda now: self._tokens.credit(delta, now))
+            with self._lock:
+                self.total_tokens -= delta
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough input-token estimate (~4 characters per token) used before a call."""
+    return max(1, len(text) // 4)
+
+
+def usage_output_tokens(response) -> Optional[int]:
+    """Output token count from a response's usage_metadata, if present."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    return getattr(usage, "candidates_token_count", None)
+
+
+def usage_prompt_tokens(response) -> Optional[int]:
+    """Input token count from a response's usage_metadata, if present."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    return getattr(usage, "prompt_token_count", None) or getattr(usage, "total_token_count", None)
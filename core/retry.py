@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+# Error kinds returned by classify_error
+RATE_LIMITED = "rate_limited"      # per-minute quota, worth waiting for
+DAILY_QUOTA = "daily_quota"        # per-day quota, waiting won't help today
+UNAVAILABLE = "unavailable"        # 503 / overloaded model
+FATAL = "fatal"                    # 400s and anything unexpected
+
+_QUOTA_PATTERN = re.compile(r"\b429\b|RESOURCE_EXHAUSTED")
+_UNAVAILABLE_PATTERN = re.compile(r"\b50[034]\b|UNAVAILABLE|OVERLOADED|INTERNAL|DEADLINE_EXCEEDED")
+
+_RETRY_DELAY_PATTERNS = [
+    re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", re.IGNORECASE),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+
+class DailyQuotaExceeded(Exception):
+    """Raised when the per-day quota is exhausted; retrying before the reset is pointless."""
+
+
+class RetryExhausted(Exception):
+    """Raised when a call keeps failing after every allowed attempt."""
+
+
+def classify_error(exc: Exception) -> str:
+    """
+    Sort an API exception into one of the retry kinds.
+
+    Works on both google.genai APIError instances and plain exceptions,
+    since only the string form is inspected.
+    """
+    upper = str(exc).upper()
+    if _QUOTA_PATTERN.search(upper):
+        if "PERDAY" in upper or "PER DAY" in upper or "DAILY" in upper:
+            return DAILY_QUOTA
+        return RATE_LIMITED
+    if _UNAVAILABLE_PATTERN.search(upper):
+        return UNAVAILABLE
+    return FATAL
+
+
+def parse_retry_delay(exc: Exception) -> Optional[float]:
+    """Extract the server-suggested retry delay (RetryInfo.retryDelay) in seconds, if any."""
+    err_msg = str(exc)
+    for pattern in _RETRY_DELAY_PATTERNS:
+        match = pattern.search(err_msg)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class CircuitBreaker:
+    """
+    Stops every worker from hammering a model that is down.
+
+    After `failure_threshold` consecutive UNAVAILABLE errors the breaker
+    opens and callers wait out `reset_timeout`. Then a single probe call is
+    let through (half-open); success closes the breaker, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """True while the breaker is rejecting calls (read-only, never grants a probe)."""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() < self._opened_at + self.reset_timeout
+
+    def time_until_allowed(self) -> float:
+        """Return 0 if a call may proceed now, otherwise the seconds to wait before asking again."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - now
+                if remaining > 0:
+                    return remaining
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if not self._probe_in_flight:
+                self._probe_in_flight = True
+                return 0.0
+            return min(self.reset_timeout, 1.0)
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"Circuit opened after {self._failures} consecutive failures; "
+                                    f"pausing calls for {self.reset_timeout:.0f}s")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class RetryStats:
+    """Thread-safe counters describing how much retrying cost."""
+
+    def __init__(self):
+        self.calls = 0
+        self.retries = 0
+        self.sleep_seconds = 0.0
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def record_retry(self, kind: str, delay: float):
+        with self._lock:
+            self.retries += 1
+            self.sleep_seconds += delay
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def record_error(self, kind: str):
+        with self._lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "sleep_seconds": round(self.sleep_seconds, 2),
+                "errors": dict(self.errors),
+            }
+
+
+class RetryPolicy:
+    """
+    Adaptive retry policy for Gemini calls.
+
+    - UNAVAILABLE: exponential backoff with jitter, guarded by a circuit breaker
+    - RATE_LIMITED: honour the server's retryDelay, else back off towards the
+      one-minute quota window
+    - DAILY_QUOTA / FATAL: raise immediately
+    """
+
+    def __init__(self, max_attempts: int = 8, base_delay: float = 2.0,
+                 max_delay: float = 65.0, max_total_sleep: float = 600.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            max_attempts: Total attempts per call, including the first
+            base_delay: First backoff delay in seconds
+            max_delay: Upper bound for a single sleep
+            max_total_sleep: Give up once a single call has slept this long
+            breaker: Circuit breaker shared by every caller of the same model
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_total_sleep = max_total_sleep
+        self.breaker = breaker
+        self.stats = RetryStats()
+
+    def next_delay(self, kind: str, attempt: int, exc: Exception) -> float:
+        """Seconds to sleep before the next attempt (attempt is 1-based)."""
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if kind == RATE_LIMITED:
+            hint = parse_retry_delay(exc)
+            if hint is not None:
+                return min(self.max_delay, hint) + random.uniform(0, 1.0)
+            # Without a hint, start well into the one-minute quota window
+            backoff = min(self.max_delay, max(backoff, 10.0 * attempt))
+        return random.uniform(backoff / 2, backoff)
+
+    def _breaker_wait(self, slept: float) -> float:
+        """Seconds to wait for the circuit breaker before the next attempt (0 = go)."""
+        if self.breaker is None:
+            return 0.0
+        wait = self.breaker.time_until_allowed()
+        if wait > 0 and slept + wait > self.max_total_sleep:
+            raise RetryExhausted("Circuit open: model unavailable. Please try again later.")
+        return wait
+
+    def _handle_error(self, e: Exception, attempt: int, slept: float) -> float:
+        """Classify a failure and return the delay before retrying, or raise."""
+        kind = classify_error(e)
+        if self.breaker is not None:
+            if kind == UNAVAILABLE:
+                self.breaker.record_failure()
+            else:
+                # The model answered, so it isn't down
+                self.breaker.record_success()
+
+        if kind == DAILY_QUOTA:
+            self.stats.record_error(kind)
+            logging.error("[!] Daily quota exhausted; not retrying.")
+            raise DailyQuotaExceeded(f"Daily quota exhausted (RESOURCE_EXHAUSTED): {e}") from e
+        if kind == FATAL:
+            self.stats.record_error(kind)
+            raise e
+
+        delay = self.next_delay(kind, attempt, e)
+        if attempt >= self.max_attempts or slept + delay > self.max_total_sleep:
+            self.stats.record_error(kind)
+            raise RetryExhausted(f"Max patience reached. Please try again later. Last error: {e}") from e
+
+        self.stats.record_retry(kind, delay)
+        logging.warning(f"[!] {kind.replace('_', ' ').capitalize()}. Retrying in {delay:.1f}s... "
+                        f"(Attempt {attempt}/{self.max_attempts})")
+        return delay
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs), retrying transient failures."""
+        self.stats.record_call()
+        slept = 0.0
+        for attempt in range(1, self.max_attempts + 1):
+            wait = self._breaker_wait(slept)
+            while wait > 0:
+                time.sleep(wait)
+                slept += wait
+                wait = self._breaker_wait(slept)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._handle_error(e, attempt, slept)
+                time.sleep(delay)
+                slept += delay
+                continue
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
+        raise RetryExhausted("Max patience reached. Please try again later.")
+
+    async def call_async(self, fn: Callable, *args, **kwargs):
+        """Asyncio counterpart of call(): awaits fn(*args, **kwargs) and sleeps without blocking the loop."""
+        self.stats.record_call()
+        slept = 0.0
+        for attempt in range(1, self.max_attempts + 1):
+            wait = self._breaker_wait(slept)
+            while wait > 0:
+                await asyncio.sleep(wait)
+                slept += wait
+                wait = self._breaker_wait(slept)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._handle_error(e, attempt, slept)
+                await asyncio.sleep(delay)
+                slept += delay
+                continue
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
+        raise RetryExhausted("Max patience reached. Please try again later.")
@@ -0,0 +1,206 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from core.config import (
+    DEFAULT_MODELS, TASK_MODEL_PREFERENCES, get_model_limits, get_rate_limiter, get_circuit_breaker
+)
+from core.retry import (
+    classify_error, parse_retry_delay, DailyQuotaExceeded, RATE_LIMITED, DAILY_QUOTA, UNAVAILABLE, FATAL
+)
+
+try:
+    from zoneinfo import ZoneInfo
+    # Gemini daily quotas reset at midnight Pacific time
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:
+    _QUOTA_TZ = timezone.utc
+
+_NOT_FOUND_PATTERN = re.compile(r"\b404\b|NOT_FOUND")
+
+# Cool-down after a per-minute 429 when the server gives no retry hint
+DEFAULT_COOLDOWN = 60.0
+
+
+def _quota_day() -> str:
+    return datetime.now(_QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+class ModelRouter:
+    """
+    Spreads calls across several models, each with its own quota.
+
+    Every task type has a model preference list (lite models for
+    extraction, stronger ones for taxonomy and search). A call goes to the
+    first preferred model that is not cooling down after a 429, not behind
+    an open circuit breaker, not out of daily requests and has RPM/TPM
+    budget free right now; otherwise to the one whose budget frees up
+    soonest. When a model fails with a quota or availability error the
+    call fails over to the next model immediately instead of sleeping.
+    """
+
+    def __init__(self, models: List[str] = None, preferences: Dict[str, List[str]] = None):
+        """
+        Args:
+            models: Models this API key may use (DEFAULT_MODELS by default)
+            preferences: Per-task model preference order (TASK_MODEL_PREFERENCES by default)
+        """
+        self.models = list(models or DEFAULT_MODELS)
+        self.preferences = preferences or TASK_MODEL_PREFERENCES
+        self._lock = threading.Lock()
+        self._cooldown_until = {}
+        self._disabled = set()
+        self._day = _quota_day()
+        self._daily = Counter()
+
+        # Counters for reporting
+        self.calls_by_model = Counter()
+        self.failovers = 0
+
+    def candidates(self, task: Optional[str]) -> List[str]:
+        """Models in preference order for a task; unlisted models follow in default order."""
+        preferred = [m for m in self.preferences.get(task, []) if m in self.models]
+        return preferred + [m for m in self.models if m not in preferred]
+
+    def primary(self, task: Optional[str]) -> str:
+        """The task's first-choice model (used to key cached responses)."""
+        return self.candidates(task)[0]
+
+    def _daily_left(self, model: str) -> bool:
+        today = _quota_day()
+        if today != self._day:
+            self._day = today
+            self._daily.clear()
+            self._cooldown_until.clear()
+        rpd = get_model_limits(model).get('rpd')
+        return rpd is None or self._daily[model] < rpd
+
+    def is_available(self, model: str) -> bool:
+        with self._lock:
+            if model in self._disabled or not self._daily_left(model):
+                return False
+            if self._cooldown_until.get(model, 0.0) > time.monotonic():
+                return False
+        return not get_circuit_breaker(model).is_open()
+
+    def choose(self, task: Optional[str], tokens: int = 0, exclude: List[str] = ()) -> Optional[str]:
+        """Pick the model for the next call, or None if every candidate is unavailable."""
+        best, best_wait = None, float('inf')
+        for model in self.candidates(task):
+            if model in exclude or not self.is_available(model):
+                continue
+            wait = get_rate_limiter(model).time_until_available(tokens)
+            if wait <= 0:
+                return model
+            if wait < best_wait:
+                best, best_wait = model, wait
+        return best
+
+    def next_available_in(self) -> Optional[float]:
+        """Seconds until some cooling-down model is usable again; None if all are out for the day."""
+        now = time.monotonic()
+        with self._lock:
+            waits = [max(0.0, self._cooldown_until.get(m, 0.0) - now)
+                     for m in self.models if m not in self._disabled and self._daily_left(m)]
+        return min(waits) if waits else None
+
+    def record_request(self, model: str):
+        with self._lock:
+            self._daily[model] += 1
+            self.calls_by_model[model] += 1
+
+    def report_success(self, model: str):
+        get_circuit_breaker(model).record_success()
+
+    def report_failure(self, model: str, exc: Exception) -> str:
+        """Update the model's state after a failed call; returns the error kind."""
+        kind = classify_error(exc)
+        with self._lock:
+            if kind == RATE_LIMITED:
+                cooldown = parse_retry_delay(exc) or DEFAULT_COOLDOWN
+                self._cooldown_until[model] = time.monotonic() + cooldown
+            elif kind == DAILY_QUOTA:
+                rpd = get_model_limits(model).get('rpd')
+                self._daily[model] = max(self._daily[model], rpd or 0)
+                # No known RPD: sit the model out until the quota day changes
+                if rpd is None:
+                    self._disabled.add(model)
+            elif kind == FATAL and _NOT_FOUND_PATTERN.search(str(exc).upper()):
+                logging.warning(f"Model {model} is not available for this key; removing it from rotation")
+                self._disabled.add(model)
+        if kind == UNAVAILABLE:
+            get_circuit_breaker(model).record_failure()
+        return kind
+
+    def _exhausted_error(self, errors: List[tuple]) -> Exception:
+        retryable = [e for kind, e in errors if kind in (RATE_LIMITED, UNAVAILABLE)]
+        if retryable:
+            return retryable[-1]
+        wait = self.next_available_in()
+        if wait is None:
+            return DailyQuotaExceeded("Daily quota exhausted on every model (RESOURCE_EXHAUSTED)")
+        # Phrased so RetryPolicy treats it as a per-minute 429 and honours the hint
+        return Exception(f"429 RESOURCE_EXHAUSTED: all models cooling down, retry in {wait:.1f}s")
+
+    def call(self, task: Optional[str], tokens: int, call_model: Callable[[str], object]):
+        """
+        Run call_model(model) on the best model, failing over on quota or
+        availability errors.
+
+        Raises:
+            The last retryable error (for the RetryPolicy to back off on) when
+            every model failed, DailyQuotaExceeded when all are out for the day,
+            or any fatal error as-is
+        """
+        tried, errors = [], []
+        while True:
+            model = self.choose(task, tokens, exclude=tried)
+            if model is None:
+                raise self._exhausted_error(errors)
+            tried.append(model)
+            self.record_request(model)
+            try:
+                result = call_model(model)
+            except Exception as e:
+                kind = self.report_failure(model, e)
+                if kind == FATAL and model not in self._disabled:
+                    raise
+                errors.append((kind, e))
+                with self._lock:
+                    self.failovers += 1
+                logging.warning(f"[!] {model}: {kind.replace('_', ' ')}, failing over to the next model")
+                continue
+            self.report_success(model)
+            return result
+
+    async def call_async(self, task: Optional[str], tokens: int, call_model: Callable):
+        """Asyncio counterpart of call(); call_model(model) returns an awaitable."""
+        tried, errors = [], []
+        while True:
+            model = self.choose(task, tokens, exclude=tried)
+            if model is None:
+                raise self._exhausted_error(errors)
+            tried.append(model)
+            self.record_request(model)
+            try:
+                result = await call_model(model)
+            except Exception as e:
+                kind = self.report_failure(model, e)
+                if kind == FATAL and model not in self._disabled:
+                    raise
+                errors.append((kind, e))
+                with self._lock:
+                    self.failovers += 1
+                logging.warning(f"[!] {model}: {kind.replace('_', ' ')}, failing over to the next model")
+                continue
+            self.report_success(model)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls_by_model": dict(self.calls_by_model), "failovers": self.failovers,
+                    "disabled": sorted(self._disabled)}
@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Item states; ITEM_DONE states are skipped when a run is resumed
+ITEM_PENDING = "pending"
+ITEM_DONE = ("ok", "unchanged")
+
+RUN_RUNNING = "running"
+RUN_FINISHED = "finished"
+RUN_INCOMPLETE = "incomplete"
+RUN_INTERRUPTED = "interrupted"
+
+
+def new_run_id() -> str:
+    """Sortable, human-typeable run id, e.g. 20250301-142233-a1b2."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+
+
+class RunJournal:
+    """
+    Per-item journal of a pipeline run, so an interrupted run can resume.
+
+    Every item (vendor URL) is recorded as pending when queued and updated
+    as it is scraped, extracted or fails, with the reason. Each update is
+    committed immediately. Resuming a run (RunJournal.load) returns only the
+    items that did not finish, together with the parameters the run was
+    started with. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = ".landscape.sqlite", run_id: str = None,
+                 kind: str = "refresh", params: dict = None):
+        """
+        Start a new run.
+
+        Args:
+            path: SQLite file location (shared with the LandscapeStore by default)
+            run_id: Id for the run (generated by default)
+            kind: What the run does, e.g. "refresh" or "discovery"
+            params: JSON-serializable settings needed to resume the run
+        """
+        self._open(path)
+        self.run_id = run_id or new_run_id()
+        self.kind = kind
+        self.params = params or {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, kind, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.run_id, kind, json.dumps(self.params), RUN_RUNNING, now, now)
+            )
+            self._conn.commit()
+
+    def _open(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS run_items (
+                run_id TEXT NOT NULL,
+                item TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                error TEXT NOT NULL DEFAULT '',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, item)
+            );
+            CREATE INDEX IF NOT EXISTS idx_run_items_state ON run_items(run_id, state);
+        """)
+        self._conn.commit()
+
+    @classmethod
+    def load(cls, path: str, run_id: str) -> 'RunJournal':
+        """
+        Reopen an existing run for resuming.
+
+        Raises:
+            KeyError: If no run with this id exists
+        """
+        journal = cls.__new__(cls)
+        journal._open(path)
+        with journal._lock:
+            row = journal._conn.execute("SELECT kind, params FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                journal._conn.close()
+                raise KeyError(f"Unknown run id: {run_id}")
+            journal._conn.execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                                  (RUN_RUNNING, time.time(), run_id))
+            journal._conn.commit()
+        journal.run_id = run_id
+        journal.kind = row[0]
+        journal.params = json.loads(row[1])
+        return journal
+
+    @staticmethod
+    def list_runs(path: str, limit: int = 20) -> List[Dict]:
+        """Most recent runs with their item counts by state."""
+        if not os.path.exists(path):
+            return []
+        conn = sqlite3.connect(path)
+        try:
+            if conn.execute("SELECT name FROM sqlite_master WHERE name = 'runs'").fetchone() is None:
+                return []
+            runs = conn.execute(
+                "SELECT run_id, kind, status, created_at FROM runs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+            result = []
+            for run_id, kind, status, created_at in runs:
+                counts = dict(conn.execute(
+                    "SELECT state, COUNT(*) FROM run_items WHERE run_id = ? GROUP BY state", (run_id,)
+                ).fetchall())
+                result.append({"run_id": run_id, "kind": kind, "status": status,
+                               "created_at": created_at, "items": counts})
+            return result
+        finally:
+            conn.close()
+
+    def add_items(self, items: Iterable[str]):
+        """Queue items as pending; items already in the journal keep their state."""
+        now = time.time()
+        with self._lock:
+            seq = self._conn.execute("SELECT COUNT(*) FROM run_items WHERE run_id = ?",
+                                     (self.run_id,)).fetchone()[0]
+            for item in items:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO run_items (run_id, item, seq, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.run_id, item, seq, ITEM_PENDING, now)
+                )
+                seq += cursor.rowcount
+            self._conn.commit()
+
+    def track(self, items: Iterable[str]) -> Iterator[str]:
+        """Pass items through unchanged, queueing each one as it is produced (for lazy inputs)."""
+        for item in items:
+            self.add_items([item])
+            yield item
+
+    def record(self, item: str, state: str, error: str = ""):
+        """Update an item's state (scraped, ok, unchanged, scrape_failed...) and commit."""
+        attempted = int(state in ITEM_DONE or state.endswith("failed"))
+        with self._lock:
+            self._conn.execute(
+                "UPDATE run_items SET state = ?, error = ?, updated_at = ?, attempts = attempts + ? "
+                "WHERE run_id = ? AND item = ?",
+                (state, error or "", time.time(), attempted, self.run_id, item)
+            )
+            self._conn.commit()
+
+    def record_row(self, row: dict):
+        """on_progress callback for LandscapeUpdater.update_many rows."""
+        self.record(row["url"], row["status"], row.get("error", ""))
+
+    def items(self) -> List[str]:
+        """Every item of the run, in the order it was queued."""
+        with self._lock:
+            rows = self._conn.execute("SELECT item FROM run_items WHERE run_id = ? ORDER BY seq",
+                                      (self.run_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def unfinished(self) -> List[str]:
+        """Items that are pending, in progress or failed, in queue order."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT item FROM run_items WHERE run_id = ? AND state NOT IN ({', '.join('?' * len(ITEM_DONE))}) "
+                "ORDER BY seq", (self.run_id, *ITEM_DONE)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def failures(self) -> Dict[str, str]:
+        """{item: reason} for items whose last attempt failed."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item, error FROM run_items WHERE run_id = ? AND state LIKE '%failed' ORDER BY seq",
+                (self.run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def summary(self) -> Dict[str, int]:
+        """Item counts by state."""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT state, COUNT(*) FROM run_items WHERE run_id = ? GROUP BY state", (self.run_id,)
+            ).fetchall())
+
+    def set_param(self, key: str, value):
+        """Add a resume parameter discovered during the run (e.g. the taxonomy's features)."""
+        self.params[key] = value
+        with self._lock:
+            self._conn.execute("UPDATE runs SET params = ?, updated_at = ? WHERE run_id = ?",
+                               (json.dumps(self.params), time.time(), self.run_id))
+            self._conn.commit()
+
+    def finish(self, interrupted: bool = False):
+        """Mark the run finished, incomplete (items left to retry) or interrupted (stopped early)."""
+        if interrupted:
+            status = RUN_INTERRUPTED
+        else:
+            status = RUN_INCOMPLETE if self.unfinished() else RUN_FINISHED
+        with self._lock:
+            self._conn.execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                               (status, time.time(), self.run_id))
+            self._conn.commit()
+        logging.info(f"Run {self.run_id} {status}: {self.summary()}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
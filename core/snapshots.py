@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Boilerplate that changes between fetches without the page really changing
+_DATE_PATTERNS = [
+    re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[t ]\d{2}:\d{2}(?::\d{2})?)?\b"),
+    re.compile(r"\b\d{1,2}[/.]\d{1,2}[/.]\d{2,4}\b"),
+    re.compile(r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.? \d{1,2},? \d{4}\b"),
+    re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\s*(?:am|pm)?\b"),
+    re.compile(r"(?:©|\(c\)|copyright)\s*\d{4}(?:\s*[-–]\s*\d{4})?"),
+]
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_COOKIE_WORDS = ("cookie", "consent", "privacy preferences")
+_PRICE_PATTERN = re.compile(r"(?:[$€£¥]\s?\d[\d,.]*|\d[\d,.]*\s?(?:usd|eur|gbp))")
+
+SKETCH_SIZE = 128
+SHINGLE_WORDS = 5
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop dates/times/copyright years and cookie-banner sentences, collapse whitespace."""
+    text = text.lower()
+    for pattern in _DATE_PATTERNS:
+        text = pattern.sub(" ", text)
+    sentences = [s for s in _SENTENCE_SPLIT.split(text) if not any(w in s for w in _COOKIE_WORDS)]
+    return " ".join(" ".join(sentences).split())
+
+
+def _hash64(data: str) -> int:
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class PageFingerprint:
+    """
+    Change-detection fingerprint of a page's cleaned text.
+
+    Holds an exact hash of the normalized text, a bottom-k MinHash sketch of
+    word shingles (for near-duplicate detection) and the set of price
+    mentions, since a changed price must never be treated as noise.
+    """
+
+    def __init__(self, content_hash: str, sketch: List[int], prices: List[str]):
+        self.content_hash = content_hash
+        self.sketch = sketch
+        self.prices = prices
+
+    @classmethod
+    def from_text(cls, text: str) -> 'PageFingerprint':
+        normalized = normalize_text(text)
+        words = normalized.split()
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS])
+                    for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+        sketch = sorted({_hash64(s) for s in shingles})[:SKETCH_SIZE]
+        prices = sorted(set(_PRICE_PATTERN.findall(normalized)))
+        content_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return cls(content_hash, sketch, prices)
+
+    def similarity(self, other: 'PageFingerprint') -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        if not self.sketch or not other.sketch:
+            return 1.0 if self.sketch == other.sketch else 0.0
+        union = sorted(set(self.sketch) | set(other.sketch))[:SKETCH_SIZE]
+        both = set(self.sketch) & set(other.sketch)
+        return sum(1 for h in union if h in both) / len(union)
+
+    def matches(self, other: 'PageFingerprint', threshold: float = 0.97) -> bool:
+        """True when the page should be considered unchanged."""
+        if self.content_hash == other.content_hash:
+            return True
+        if self.prices != other.prices:
+            return False
+        return self.similarity(other) >= threshold
+
+    def to_json(self) -> str:
+        return json.dumps({"content_hash": self.content_hash, "sketch": self.sketch, "prices": self.prices})
+
+    @classmethod
+    def from_json(cls, data: str) -> 'PageFingerprint':
+        d = json.loads(data)
+        return cls(d["content_hash"], d["sketch"], d["prices"])
+
+
+def diff_products(old: dict, new: dict) -> Dict[str, dict]:
+    """
+    Field-level diff between two extracted Product dicts.
+
+    Returns:
+        {field: {"old": ..., "new": ...}} for scalar fields,
+        {field: {"added": [...], "removed": [...]}} for list fields and
+        {field: {key: {"old": ..., "new": ...}}} for dict fields (feature_flags)
+    """
+    changes = {}
+    for field in sorted(set(old) | set(new)):
+        before, after = old.get(field), new.get(field)
+        if before == after:
+            continue
+        if isinstance(before, list) and isinstance(after, list):
+            changes[field] = {
+                "added": [x for x in after if x not in before],
+                "removed": [x for x in before if x not in after],
+            }
+        elif isinstance(before, dict) and isinstance(after, dict):
+            changes[field] = {
+                k: {"old": before.get(k), "new": after.get(k)}
+                for k in sorted(set(before) | set(after)) if before.get(k) != after.get(k)
+            }
+        else:
+            changes[field] = {"old": before, "new": after}
+    return changes
+
+
+def features_key(features: List[str]) -> str:
+    """Stable hash of the feature list, so a new checklist forces re-extraction."""
+    return hashlib.sha256(json.dumps(sorted(features)).encode("utf-8")).hexdigest()[:16]
+
+
+class SnapshotStore:
+    """
+    Local SQLite store of the last fingerprint and extracted Product per URL.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str = ".snapshots.sqlite", threshold: float = 0.97):
+        """
+        Args:
+            path: SQLite file location
+            threshold: Minimum shingle similarity for a page to count as unchanged
+        """
+        self.threshold = threshold
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                features_key TEXT NOT NULL,
+                product TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[dict]:
+        """Return {"fingerprint", "features_key", "product"} for a URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, features_key, product FROM snapshots WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": PageFingerprint.from_json(row[0]),
+                "features_key": row[1],
+                "product": json.loads(row[2])}
+
+    def unchanged_product(self, url: str, fingerprint: PageFingerprint,
+                          features: List[str]) -> Optional[dict]:
+        """Previous Product for the URL if its page and feature list are unchanged, else None."""
+        previous = self.get(url)
+        if previous is None or previous["features_key"] != features_key(features):
+            return None
+        if previous["fingerprint"].matches(fingerprint, self.threshold):
+            return previous["product"]
+        return None
+
+    def save(self, url: str, fingerprint: PageFingerprint, features: List[str], product: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                (url, fingerprint.to_json(), features_key(features), json.dumps(product), time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,450 @@
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from core.config import get_telemetry
+from core.discovery import site_key, url_key, normalize_name, name_similarity
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_KINDS = ("taxonomies", "competitors", "products", "history")
+
+# Columns kept outside the JSON payload of products/history rows
+_PRODUCT_COLUMNS = ("url", "domain", "topic", "extracted_at")
+
+# Minimum similarity for a re-extracted product name ("Acme CRM Suite") to
+# replace the stored product at the same URL ("Acme CRM") instead of adding one
+PRODUCT_MATCH_THRESHOLD = 0.85
+
+# Indexes dropped with their tables when an older schema is upgraded
+_LEGACY_INDEXES = ("idx_competitors_domain", "idx_products_domain", "idx_products_topic", "idx_history_vendor")
+
+
+def topic_key(topic: Optional[str]) -> str:
+    """Case- and whitespace-insensitive key for a market topic."""
+    return " ".join((topic or "").lower().split())
+
+
+def product_key(name: Optional[str]) -> str:
+    """Normalized product name; with the URL it identifies a stored product."""
+    return normalize_name(name)
+
+
+def flatten_for_csv(row: dict) -> dict:
+    """Flatten lists/dicts so they fit into single CSV cells."""
+    csv_data = row.copy()
+    for key, value in csv_data.items():
+        if isinstance(value, dict):
+            # Convert dict to string "Feature1: True; Feature2: False"
+            csv_data[key] = "; ".join([f"{k}: {v}" for k, v in value.items()])
+        elif isinstance(value, list):
+            csv_data[key] = "; ".join(str(v) for v in value)
+    return csv_data
+
+
+class LandscapeStore:
+    """
+    Persistent SQLite store of taxonomies, competitors and Product records.
+
+    - taxonomies: every generated taxonomy, newest last, by topic
+    - competitors: one row per (topic, normalized URL, product name), upserted
+    - products: the latest Product per (normalized URL, product name), upserted,
+      so several products listed on one vendor page are kept apart
+    - product_history: a row per extraction that changed the Product
+
+    Rows are indexed by normalized domain, topic and extraction time.
+    Writes are batched into transactions of `batch_size` rows; exports
+    stream from a separate read connection. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = ".landscape.sqlite", batch_size: int = 500):
+        """
+        Args:
+            path: SQLite file location
+            batch_size: Rows per transaction for bulk upserts and per export chunk
+        """
+        self.path = path
+        self.batch_size = batch_size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        legacy = self._rename_legacy_tables()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS taxonomies (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                topic_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_taxonomies_topic ON taxonomies(topic_key, created_at);
+
+            CREATE TABLE IF NOT EXISTS competitors (
+                topic_key TEXT NOT NULL,
+                url_key TEXT NOT NULL,
+                product_key TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                data TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (topic_key, url_key, product_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_competitors_domain ON competitors(domain);
+
+            CREATE TABLE IF NOT EXISTS products (
+                url_key TEXT NOT NULL,
+                product_key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                topic_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                extracted_at REAL NOT NULL,
+                PRIMARY KEY (url_key, product_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_products_domain ON products(domain);
+            CREATE INDEX IF NOT EXISTS idx_products_topic ON products(topic_key, extracted_at);
+
+            CREATE TABLE IF NOT EXISTS product_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url_key TEXT NOT NULL,
+                product_key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                topic_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                changed_fields TEXT NOT NULL,
+                extracted_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_vendor ON product_history(url_key, extracted_at);
+            CREATE INDEX IF NOT EXISTS idx_history_domain ON product_history(domain);
+        """)
+        self._copy_legacy_rows(legacy)
+        self._conn.commit()
+
+    def _rename_legacy_tables(self) -> List[str]:
+        """
+        Move tables from before products were keyed by name (URL only) out
+        of the way, so the current schema can be created next to them.
+
+        Returns:
+            The renamed tables (copied back by _copy_legacy_rows)
+        """
+        legacy = []
+        for table in ("competitors", "products", "product_history"):
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if columns and "product_key" not in columns:
+                legacy.append(table)
+        if legacy:
+            for index in _LEGACY_INDEXES:
+                self._conn.execute(f"DROP INDEX IF EXISTS {index}")
+            for table in legacy:
+                self._conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+            logging.info(f"Upgrading landscape store tables: {', '.join(legacy)}")
+        return legacy
+
+    def _copy_legacy_rows(self, legacy: List[str]):
+        for table in legacy:
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table}_legacy)")]
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM {table}_legacy ORDER BY rowid").fetchall()
+            data_at = columns.index("data")
+            for row in rows:
+                # Competitor and Product records both carry the product name
+                key = product_key(json.loads(row[data_at]).get("product_name"))
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}, product_key) "
+                    f"VALUES ({', '.join('?' * len(columns))}, ?)", (*row, key))
+            self._conn.execute(f"DROP TABLE {table}_legacy")
+
+    def _chunks(self, rows: Iterable) -> Iterator[list]:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def save_taxonomy(self, topic: str, taxonomy: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO taxonomies (topic, topic_key, data, created_at) VALUES (?, ?, ?, ?)",
+                (topic, topic_key(topic), json.dumps(taxonomy), time.time())
+            )
+            self._conn.commit()
+
+    def latest_taxonomy(self, topic: str) -> Optional[dict]:
+        """Most recently stored taxonomy for a topic, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM taxonomies WHERE topic_key = ? ORDER BY created_at DESC LIMIT 1",
+                (topic_key(topic),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert_competitors(self, topic: str, competitors: Iterable[dict]) -> int:
+        """
+        Insert or update competitor records for a topic, keyed by normalized
+        URL and product name.
+
+        Returns:
+            Number of records written
+        """
+        key, now, written = topic_key(topic), time.time(), 0
+        rows = ((key, url_key(c.get("official_website_url")) or c.get("company_name", ""),
+                 product_key(c.get("product_name")), site_key(c.get("official_website_url") or ""),
+                 json.dumps(c), now, now)
+                for c in competitors)
+        for chunk in self._chunks(rows):
+            with self._lock, self._conn:
+                self._conn.executemany("""
+                    INSERT INTO competitors (topic_key, url_key, product_key, domain, data, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (topic_key, url_key, product_key) DO UPDATE SET
+                        domain = excluded.domain, data = excluded.data, last_seen = excluded.last_seen
+                """, chunk)
+            written += len(chunk)
+        return written
+
+    def competitors(self, topic: str) -> List[dict]:
+        """Stored competitors for a topic, in the order they were first seen."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM competitors WHERE topic_key = ? ORDER BY first_seen, rowid",
+                (topic_key(topic),)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _match_product(self, ukey: str, pkey: str) -> Optional[tuple]:
+        """
+        The stored (product_key, data, topic_key) row at a URL that `pkey`
+        names: the same product name, a close variant of it, or the only
+        row when either side has no product name. None for a new product.
+        """
+        rows = self._conn.execute(
+            "SELECT product_key, data, topic_key FROM products WHERE url_key = ? ORDER BY rowid", (ukey,)
+        ).fetchall()
+        for row in rows:
+            if row[0] == pkey:
+                return row
+        if len(rows) == 1 and not (pkey and rows[0][0]):
+            return rows[0]
+        scored = [(name_similarity(pkey, row[0]), row) for row in rows]
+        best = max(scored, key=lambda item: item[0], default=(0.0, None))
+        return best[1] if best[0] >= PRODUCT_MATCH_THRESHOLD else None
+
+    def upsert_products(self, products: Iterable[dict], topic: str = None) -> int:
+        """
+        Store extracted products; each needs a "url" key (update_many rows
+        work as-is, failed rows without product data are skipped).
+
+        The latest record per normalized URL and product name is replaced,
+        and a history row is added whenever the stored Product changes.
+        Products with different names on one page are stored separately; a
+        slightly reworded name on a later extraction updates the same row.
+
+        Returns:
+            Number of products whose data changed
+        """
+        key, changed = topic_key(topic), 0
+        for chunk in self._chunks(p for p in products if p.get("url") and p.get("company_name")):
+            now = time.time()
+            with self._lock, self._conn:
+                for row in chunk:
+                    url = row["url"]
+                    ukey, pkey = url_key(url), product_key(row.get("product_name"))
+                    product = {k: v for k, v in row.items() if k not in ("url", "status", "error", "changed_fields")}
+                    data = json.dumps(product, sort_keys=True)
+                    previous = self._match_product(ukey, pkey)
+                    row_topic = key or (previous[2] if previous else "")
+                    if previous is not None and previous[1] == data:
+                        continue
+                    changed += 1
+                    if previous is None:
+                        self._conn.execute("""
+                            INSERT INTO products (url_key, product_key, url, domain, topic_key, data, extracted_at)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """, (ukey, pkey, url, site_key(url), row_topic, data, now))
+                    else:
+                        self._conn.execute("""
+                            UPDATE products SET product_key = ?, url = ?, topic_key = ?, data = ?, extracted_at = ?
+                            WHERE url_key = ? AND product_key = ?
+                        """, (pkey, url, row_topic, data, now, ukey, previous[0]))
+                    self._conn.execute("""
+                        INSERT INTO product_history (url_key, product_key, url, domain, topic_key, data,
+                                                     changed_fields, extracted_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (ukey, pkey, url, site_key(url), row_topic, data,
+                          json.dumps(row.get("changed_fields") or []), now))
+        return changed
+
+    def get_product(self, url: str, product_name: str = None) -> Optional[dict]:
+        """
+        Latest stored Product for a URL (matched by normalized URL), or None.
+        When the page lists several products, `product_name` picks one;
+        otherwise the most recently extracted one is returned.
+        """
+        with self._lock:
+            if product_name is not None:
+                row = self._match_product(url_key(url), product_key(product_name))
+                return json.loads(row[1]) if row else None
+            row = self._conn.execute(
+                "SELECT data FROM products WHERE url_key = ? ORDER BY extracted_at DESC LIMIT 1", (url_key(url),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, url: str, product_name: str = None) -> List[dict]:
+        """
+        Every stored version of a vendor's Products (only `product_name`'s
+        when given), oldest first, with extracted_at and changed_fields.
+        """
+        query = "SELECT data, changed_fields, extracted_at FROM product_history WHERE url_key = ?"
+        params = [url_key(url)]
+        if product_name is not None:
+            query += " AND product_key = ?"
+            params.append(product_key(product_name))
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY extracted_at, id", params).fetchall()
+        return [{**json.loads(data), "changed_fields": json.loads(changed), "extracted_at": at}
+                for data, changed, at in rows]
+
+    def iter_rows(self, kind: str, topic: str = None, urls: Iterable[str] = None) -> Iterator[dict]:
+        """
+        Stream stored rows of one kind (see EXPORT_KINDS) from a separate
+        read connection, optionally filtered by topic and/or URLs.
+        """
+        if kind not in EXPORT_KINDS:
+            raise ValueError(f"Unknown export kind '{kind}', expected one of {EXPORT_KINDS}")
+        table = {"taxonomies": "taxonomies", "competitors": "competitors",
+                 "products": "products", "history": "product_history"}[kind]
+        columns = {
+            "taxonomies": "topic, data, created_at",
+            "competitors": "topic_key, data, last_seen",
+            "products": "url, domain, topic_key, data, extracted_at",
+            "history": "url, domain, topic_key, data, extracted_at, changed_fields",
+        }[kind]
+        where, params = [], []
+        if topic is not None:
+            where.append("topic_key = ?")
+            params.append(topic_key(topic))
+        if urls is not None and kind in ("products", "history"):
+            keys = [url_key(u) for u in urls]
+            where.append(f"url_key IN ({', '.join('?' * len(keys))})" if keys else "0")
+            params.extend(keys)
+        query = f"SELECT {columns} FROM {table}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY rowid"
+
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    if kind == "taxonomies":
+                        yield {"topic": row[0], **json.loads(row[1]), "created_at": row[2]}
+                    elif kind == "competitors":
+                        yield {"topic": row[0], **json.loads(row[1]), "last_seen": row[2]}
+                    else:
+                        record = dict(zip(_PRODUCT_COLUMNS, (row[0], row[1], row[2], row[4])))
+                        record.update(json.loads(row[3]))
+                        if kind == "history":
+                            record["changed_fields"] = json.loads(row[5])
+                        yield record
+        finally:
+            conn.close()
+
+    def export(self, kind: str, path: str, fmt: str = None, topic: str = None,
+               urls: Iterable[str] = None) -> int:
+        """
+        Stream stored rows to a CSV, JSONL or Parquet file.
+
+        Args:
+            kind: One of EXPORT_KINDS
+            path: Output file
+            fmt: One of EXPORT_FORMATS (taken from the file extension by default)
+            topic: Only rows for this topic
+            urls: Only products/history for these URLs
+
+        Returns:
+            Number of rows written
+        """
+        fmt = (fmt or os.path.splitext(path)[1].lstrip(".") or "csv").lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+        with get_telemetry().span("export", kind, format=fmt, path=path) as event:
+            count = self._export(kind, path, fmt, topic, urls)
+            event.update(rows=count, bytes=os.path.getsize(path))
+        logging.info(f"Exported {count} {kind} rows to {path}")
+        return count
+
+    def _export(self, kind: str, path: str, fmt: str, topic: Optional[str], urls: Optional[Iterable[str]]) -> int:
+        if fmt == "jsonl":
+            count = 0
+            with open(path, "w", encoding="utf-8") as f:
+                for row in self.iter_rows(kind, topic, urls):
+                    f.write(json.dumps(row) + "\n")
+                    count += 1
+        else:
+            # A first pass finds every column (and a sample value for its type) without holding rows
+            columns = {}
+            for row in self.iter_rows(kind, topic, urls):
+                for key, value in row.items():
+                    if columns.get(key) is None:
+                        columns[key] = value
+            rows = self.iter_rows(kind, topic, urls)
+            if fmt == "csv":
+                count = self._export_csv(rows, path, list(columns))
+            else:
+                count = self._export_parquet(rows, path, columns)
+        return count
+
+    def _export_csv(self, rows: Iterator[dict], path: str, columns: List[str]) -> int:
+        count = 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for chunk in self._chunks(rows):
+                writer.writerows(flatten_for_csv(r) for r in chunk)
+                count += len(chunk)
+        return count
+
+    def _export_parquet(self, rows: Iterator[dict], path: str, columns: Dict[str, object]) -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+        def arrow_type(sample):
+            if isinstance(sample, bool):
+                return pa.bool_()
+            if isinstance(sample, (int, float)):
+                return pa.float64()
+            if isinstance(sample, list):
+                return pa.list_(pa.string())
+            return pa.string()
+
+        # Nested dicts (feature_flags) are stored as JSON strings; lists stay lists
+        schema = pa.schema([pa.field(name, arrow_type(sample)) for name, sample in columns.items()])
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in self._chunks(rows):
+                chunk = [{k: json.dumps(v) if isinstance(v, dict) else v for k, v in r.items()} for r in chunk]
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                count += len(chunk)
+        return count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
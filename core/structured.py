@@ -0,0 +1,170 @@
+import json
+import threading
+from typing import Dict, List, Optional, Tuple, Type
+
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+from core.json_stream import parse_json_objects
+
+
+def response_schema(model_cls: Type[BaseModel], fields: List[str] = None, many: bool = False) -> dict:
+    """
+    JSON schema for a Pydantic model, usable as `response_json_schema`.
+
+    Args:
+        model_cls: Model describing one record
+        fields: Restrict the schema to these fields (used by repair calls)
+        many: Schema for a JSON array of records instead of one record
+
+    Returns:
+        JSON schema dictionary
+    """
+    schema = model_cls.model_json_schema()
+    schema.pop("title", None)
+    if fields is not None:
+        schema["properties"] = {k: v for k, v in schema["properties"].items() if k in fields}
+        schema["required"] = [k for k in schema.get("required", []) if k in fields]
+    if many:
+        defs = schema.pop("$defs", None)
+        schema = {"type": "array", "items": schema}
+        if defs:
+            schema["$defs"] = defs
+    return schema
+
+
+def load_records(text: str) -> List[dict]:
+    """JSON objects in a response: a bare object, an array of objects, or objects embedded in prose."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return parse_json_objects(text or "")
+    if isinstance(data, dict):
+        return [data]
+    if isinstance(data, list):
+        return [item for item in data if isinstance(item, dict)]
+    return []
+
+
+def load_record(text: str) -> dict:
+    """First JSON object in a response, or an empty dict when there is none."""
+    records = load_records(text)
+    return records[0] if records else {}
+
+
+def invalid_fields(model_cls: Type[BaseModel], error: ValidationError) -> List[str]:
+    """Top-level fields named in a validation error (every field when none can be attributed)."""
+    fields = []
+    for err in error.errors():
+        loc = err.get("loc") or ()
+        if loc and loc[0] in model_cls.model_fields and loc[0] not in fields:
+            fields.append(loc[0])
+    return fields or list(model_cls.model_fields)
+
+
+def describe_errors(error: ValidationError) -> str:
+    """Short 'field: message' summary of a validation error for repair prompts."""
+    return "; ".join(f"{'.'.join(str(p) for p in err.get('loc', ()))}: {err.get('msg')}"
+                     for err in error.errors())
+
+
+def try_validate(model_cls: Type[BaseModel], record: dict) -> Tuple[Optional[BaseModel], Optional[ValidationError]]:
+    """Validate one record; returns (model, None) or (None, error)."""
+    try:
+        return model_cls.model_validate(record), None
+    except ValidationError as e:
+        return None, e
+
+
+def build_repair_request(model_cls: Type[BaseModel], prompt: str, config: types.GenerateContentConfig,
+                         record: dict, error: ValidationError) -> Tuple[str, types.GenerateContentConfig, List[str]]:
+    """
+    Follow-up request asking only for the fields that failed validation.
+
+    The original prompt is kept so the model still has its source material;
+    the fields that did validate are shown as already answered, and a
+    schema-constrained config is narrowed to the missing fields.
+
+    Returns:
+        (prompt, config, fields being requested)
+    """
+    fields = invalid_fields(model_cls, error)
+    kept = {k: v for k, v in record.items() if k in model_cls.model_fields and k not in fields}
+    repair_prompt = (
+        f"{prompt}\n\n"
+        f"A previous answer was incomplete. These fields are already known: {json.dumps(kept, default=str)}.\n"
+        f"Problems: {describe_errors(error)}.\n"
+        f"Return a JSON object with only these fields: {', '.join(fields)}."
+    )
+    repair_config = config
+    if config is not None and config.response_json_schema is not None:
+        repair_config = config.model_copy(update={"response_json_schema": response_schema(model_cls, fields)})
+    return repair_prompt, repair_config, fields
+
+
+def build_list_repair_request(model_cls: Type[BaseModel], prompt: str, config: types.GenerateContentConfig,
+                              records: List[dict], key_field: str) -> Tuple[str, types.GenerateContentConfig]:
+    """
+    One follow-up request completing several invalid records of a list response.
+
+    Records are matched back by `key_field`, so it is always requested.
+    """
+    fields = list(model_cls.model_fields)
+    repair_prompt = (
+        f"{prompt}\n\n"
+        f"Some entries of a previous answer were incomplete or invalid: {json.dumps(records, default=str)}.\n"
+        f"Return a JSON array with one complete object per entry above, keeping each \"{key_field}\" "
+        f"unchanged, with the fields: {', '.join(fields)}."
+    )
+    repair_config = config
+    if config is not None and config.response_json_schema is not None:
+        repair_config = config.model_copy(update={"response_json_schema": response_schema(model_cls, many=True)})
+    return repair_prompt, repair_config
+
+
+def merge_patch(record: dict, patch: dict, fields) -> dict:
+    """`record` updated with the repair answer's values for `fields` only."""
+    return {**record, **{k: v for k, v in patch.items() if k in fields}}
+
+
+class ValidationStats:
+    """Thread-safe counters describing how much quota malformed output costs."""
+
+    def __init__(self):
+        self.validated = 0
+        self.failures = 0
+        self.repair_calls = 0
+        self.repaired = 0
+        self.unrepaired = 0
+        self.failures_by_method = {}
+        self._lock = threading.Lock()
+
+    def record_valid(self, count: int = 1):
+        with self._lock:
+            self.validated += count
+
+    def record_failure(self, method: str, count: int = 1):
+        with self._lock:
+            self.failures += count
+            key = method or "request"
+            self.failures_by_method[key] = self.failures_by_method.get(key, 0) + count
+
+    def record_repair_call(self):
+        with self._lock:
+            self.repair_calls += 1
+
+    def record_repair_result(self, repaired: int, unrepaired: int):
+        with self._lock:
+            self.repaired += repaired
+            self.unrepaired += unrepaired
+
+    def as_dict(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "validated": self.validated,
+                "failures": self.failures,
+                "repair_calls": self.repair_calls,
+                "repaired": self.repaired,
+                "unrepaired": self.unrepaired,
+                "failures_by_method": dict(self.failures_by_method),
+            }
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Summed per stage; every other event field is only kept in the JSON-lines file
+COUNTER_FIELDS = ("throttle_s", "request_s", "prompt_tokens", "output_tokens", "retries",
+                  "cache_hits", "bytes", "cost_usd")
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class StageStats:
+    """Aggregated events of one (kind, stage) pair, e.g. ("llm", "extract_product_data")."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.wall_s = 0.0
+        self.latencies = []
+        self.counters = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    def add(self, event: dict):
+        self.calls += 1
+        self.errors += int(bool(event.get("error")))
+        self.wall_s += event["wall_s"]
+        self.latencies.append(event["wall_s"])
+        for field in COUNTER_FIELDS:
+            value = event.get(field)
+            if value:
+                self.counters[field] += value
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wall_s": round(self.wall_s, 3),
+            "p50_s": round(_percentile(self.latencies, 0.5), 3),
+            "p95_s": round(_percentile(self.latencies, 0.95), 3),
+            **{field: round(value, 6) if isinstance(value, float) else value
+               for field, value in self.counters.items()},
+        }
+
+
+class Telemetry:
+    """
+    Per-call performance instrumentation for the pipeline.
+
+    Each instrumented operation (LLM call, HTTP fetch, HTML parse, vendor
+    scrape, export) becomes one event with its wall time and whatever the
+    caller measured: time throttled by the rate limiter versus time in the
+    request, prompt/output tokens, retries, cache hits, bytes and estimated
+    cost. Events are appended to a JSON-lines file when `events_path` is set
+    and aggregated per (kind, stage) for the end-of-run summary table and
+    the Prometheus text snapshot.
+
+    Events carry a session id so the file can be shared by several runs and
+    by the worker processes of one run (see from_events). Thread-safe.
+    """
+
+    def __init__(self, events_path: Optional[str] = None, prices: Optional[Dict[str, Tuple[float, float]]] = None,
+                 session: Optional[str] = None):
+        """
+        Args:
+            events_path: JSON-lines file events are appended to (None keeps them in memory only)
+            prices: {model: (USD per 1M input tokens, USD per 1M output tokens)} for cost estimates
+            session: Id written on every event (generated by default)
+        """
+        self.events_path = events_path
+        self.prices = prices or {}
+        self.session = session or uuid.uuid4().hex[:12]
+        self._stats: Dict[Tuple[str, str], StageStats] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if events_path:
+            directory = os.path.dirname(events_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(events_path, "a", encoding="utf-8")
+
+    def cost(self, model: Optional[str], prompt_tokens: int, output_tokens: int) -> float:
+        """Estimated USD cost of a call at the configured list prices (0 for unknown models)."""
+        price = self.prices.get((model or "").split("/")[-1])
+        if price is None:
+            return 0.0
+        return (prompt_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+    def record(self, kind: str, stage: str, wall_s: float, **fields):
+        """Record one finished operation."""
+        event = {"ts": round(time.time(), 3), "session": self.session, "pid": os.getpid(),
+                 "kind": kind, "stage": stage, "wall_s": round(wall_s, 4),
+                 **{k: round(v, 6) if isinstance(v, float) else v for k, v in fields.items()}}
+        if kind == "llm" and "cost_usd" not in event:
+            event["cost_usd"] = self.cost(event.get("model"), event.get("prompt_tokens") or 0,
+                                          event.get("output_tokens") or 0)
+        with self._lock:
+            self._stats.setdefault((kind, stage), StageStats()).add(event)
+            if self._file is not None:
+                self._file.write(json.dumps(event, default=str) + "\n")
+                self._file.flush()
+
+    @contextmanager
+    def span(self, kind: str, stage: str, **fields) -> Iterator[dict]:
+        """
+        Time a block and record it as one event. The yielded dict is the
+        event: add measurements to it inside the block. An exception is
+        recorded as the event's `error` and re-raised.
+        """
+        event = dict(fields)
+        start = time.perf_counter()
+        try:
+            yield event
+        except BaseException as e:
+            event.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            self.record(kind, stage, time.perf_counter() - start, **event)
+
+    def stats(self) -> List[dict]:
+        """Aggregates per stage, sorted by kind and stage."""
+        with self._lock:
+            return [{"kind": kind, "stage": stage, **stats.as_dict()}
+                    for (kind, stage), stats in sorted(self._stats.items())]
+
+    def summary_table(self) -> str:
+        """Fixed-width end-of-run summary, one line per stage."""
+        rows = self.stats()
+        if not rows:
+            return "No telemetry recorded"
+        header = (f"{'Stage':<34}{'calls':>7}{'err':>5}{'p50 s':>8}{'p95 s':>8}{'wall s':>9}"
+                  f"{'throttle s':>11}{'request s':>10}{'tok in':>9}{'tok out':>9}{'retry':>6}"
+                  f"{'cached':>7}{'MB':>8}{'cost $':>9}")
+        lines = [header, "-" * len(header)]
+        for row in rows:
+            lines.append(
+                f"{(row['kind'] + ':' + row['stage'])[:33]:<34}{row['calls']:>7}{row['errors']:>5}"
+                f"{row['p50_s']:>8.2f}{row['p95_s']:>8.2f}{row['wall_s']:>9.1f}{row['throttle_s']:>11.1f}"
+                f"{row['request_s']:>10.1f}{row['prompt_tokens']:>9}{row['output_tokens']:>9}{row['retries']:>6}"
+                f"{row['cache_hits']:>7}{row['bytes'] / 1e6:>8.2f}{row['cost_usd']:>9.4f}")
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """Snapshot of the aggregates in the Prometheus text exposition format."""
+        metrics = [
+            ("calls_total", "counter", "Operations per pipeline stage", lambda r: r["calls"]),
+            ("errors_total", "counter", "Failed operations per pipeline stage", lambda r: r["errors"]),
+            ("wall_seconds_total", "counter", "Wall time per pipeline stage", lambda r: r["wall_s"]),
+            ("throttle_seconds_total", "counter", "Time spent waiting on the rate limiter", lambda r: r["throttle_s"]),
+            ("request_seconds_total", "counter", "Time spent inside API or HTTP requests", lambda r: r["request_s"]),
+            ("prompt_tokens_total", "counter", "Prompt tokens reported by the API", lambda r: r["prompt_tokens"]),
+            ("output_tokens_total", "counter", "Output tokens reported by the API", lambda r: r["output_tokens"]),
+            ("retries_total", "counter", "Retried attempts", lambda r: r["retries"]),
+            ("cache_hits_total", "counter", "Calls answered from the LLM cache", lambda r: r["cache_hits"]),
+            ("bytes_total", "counter", "Bytes downloaded or written", lambda r: r["bytes"]),
+            ("cost_usd_total", "counter", "Estimated cost at list prices", lambda r: r["cost_usd"]),
+        ]
+        rows = self.stats()
+        lines = []
+        for name, kind, help_text, value in metrics:
+            lines.append(f"# HELP landscape_stage_{name} {help_text}")
+            lines.append(f"# TYPE landscape_stage_{name} {kind}")
+            for row in rows:
+                lines.append(f'landscape_stage_{name}{{kind="{row["kind"]}",stage="{row["stage"]}"}} {value(row)}')
+        lines.append("# HELP landscape_stage_latency_seconds Latency quantiles per pipeline stage")
+        lines.append("# TYPE landscape_stage_latency_seconds summary")
+        for row in rows:
+            labels = f'kind="{row["kind"]}",stage="{row["stage"]}"'
+            lines.append(f'landscape_stage_latency_seconds{{{labels},quantile="0.5"}} {row["p50_s"]}')
+            lines.append(f'landscape_stage_latency_seconds{{{labels},quantile="0.95"}} {row["p95_s"]}')
+            lines.append(f"landscape_stage_latency_seconds_sum{{{labels}}} {row['wall_s']}")
+            lines.append(f"landscape_stage_latency_seconds_count{{{labels}}} {row['calls']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the snapshot atomically (e.g. for node_exporter's textfile collector)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+        logging.info(f"Telemetry snapshot written to {path}")
+
+    @classmethod
+    def from_events(cls, path: str, session: Optional[str] = None) -> 'Telemetry':
+        """
+        Aggregate a JSON-lines events file, optionally only one session
+        (e.g. a run and its worker processes).
+        """
+        telemetry = cls(session=session)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if session is not None and event.get("session") != session:
+                    continue
+                key = (event["kind"], event["stage"])
+                telemetry._stats.setdefault(key, StageStats()).add(event)
+        return telemetry
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
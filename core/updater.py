@@ -1,78 +1,474 @@
-from typing import TYPE_CHECKING, List
-import json
-import requests
-from bs4 import BeautifulSoup
-import logging
-
-if TYPE_CHECKING:
-    from core.llm_handler import LLMEngine
-
-logging.basicConfig(level=logging.INFO)
-
-class LandscapeUpdater:
-    def __init__(self, llm: 'LLMEngine'):
-        """
-        Initialize the Landscape Updater with an LLM engine.
-        
-        Args:
-            llm: An instance of LLMEngine for analyzing web content
-        """
-        self.llm = llm
-
-    def scrape_website(self, url: str) -> str:
-        """
-        Scrape content from a website URL.
-        
-        Args:
-            url: The website URL to scrape
-            
-        Returns:
-            Extracted text content from the website
-        """
-        try:
-            logging.info(f"Fetching content from: {url}")
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer"]):
-                script.decompose()
-            
-            # Get text
-            text = soup.get_text(separator=' ', strip=True)
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
-            
-            logging.info(f"✓ Successfully scraped {len(text)} characters")
-            return text
-            
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to scrape {url}: {e}")
-            raise Exception(f"Could not access website: {e}")
-        except Exception as e:
-            logging.error(f"Error parsing website: {e}")
-            raise
-
-def update_company(self, url: str, features_to_check: List[str]) -> dict:
-        raw_text = self.scrape_website(url)
-        
-        # Reduced from 15,000 to 8,000 to save "Tokens Per Minute" (TPM)
-        max_chars = 8000 
-        if len(raw_text) > max_chars:
-            logging.info(f"Truncating content to {max_chars} to save TPM quota")
-            raw_text = raw_text[:max_chars]
-        
-        logging.info("Analyzing content with LLM...")
-        product_data = self.llm.extract_product_data(raw_text, features_to_check)
-        return product_data
\ No newline at end of file
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Iterable, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import asyncio
+import csv
+import json
+import requests
+import logging
+import threading
+from core.config import get_telemetry
+from core.context import DEFAULT_TOKEN_BUDGET
+from core.batch import OfflineBatch
+from core.crawler import SiteCrawler
+from core.extractors import html_to_text
+from core.fetcher import HttpFetcher
+from core.snapshots import SnapshotStore, PageFingerprint, diff_products
+
+if TYPE_CHECKING:
+    from core.llm_handler import LLMEngine
+    from core.async_engine import AsyncLLMEngine
+
+logging.basicConfig(level=logging.INFO)
+
+# Per-row status values written by update_many
+STATUS_OK = "ok"
+STATUS_UNCHANGED = "unchanged"
+STATUS_SCRAPE_FAILED = "scrape_failed"
+STATUS_EXTRACT_FAILED = "extract_failed"
+# Intermediate progress state reported to on_progress callbacks, never a final row status
+STATUS_SCRAPED = "scraped"
+
+
+def load_urls(path: str) -> List[str]:
+    """
+    Load the URLs to refresh from a competitors CSV or a plain URL list.
+
+    Args:
+        path: Either a `*_competitors.csv` written by option 1 (the
+              `official_website_url` column is used) or a text file with
+              one URL per line
+
+    Returns:
+        List of unique URLs in file order
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        first_line = f.readline()
+        f.seek(0)
+        if "official_website_url" in first_line:
+            urls = [row.get("official_website_url", "") for row in csv.DictReader(f)]
+        else:
+            urls = [line for line in f]
+
+    seen = set()
+    unique = []
+    for url in (u.strip() for u in urls):
+        if url and not url.startswith("#") and url not in seen:
+            seen.add(url)
+            unique.append(url)
+    return unique
+
+
+class LandscapeUpdater:
+    def __init__(self, llm: 'LLMEngine', fetcher: HttpFetcher = None,
+                 snapshots: SnapshotStore = None, context_budget: int = DEFAULT_TOKEN_BUDGET,
+                 crawler: SiteCrawler = None, html_backend: str = None):
+        """
+        Initialize the Landscape Updater with an LLM engine.
+        
+        Args:
+            llm: An instance of LLMEngine for analyzing web content
+            fetcher: Shared HTTP layer (a pooled fetcher without disk cache by default)
+            snapshots: Optional change-detection store; unchanged pages reuse
+                       the previous Product instead of calling the LLM
+            context_budget: Input tokens of page text sent per extraction
+            crawler: Optional multi-page crawler; when set, each vendor's
+                     pricing/features/customer pages are combined into one
+                     extraction instead of using the single given URL
+            html_backend: HTML-to-text extractor ("lxml" or "bs4", see core.extractors)
+        """
+        self.llm = llm
+        self.fetcher = fetcher or HttpFetcher()
+        self.snapshots = snapshots
+        self.context_budget = context_budget
+        self.crawler = crawler
+        self.html_backend = html_backend
+
+    def scrape_website(self, url: str) -> str:
+        """
+        Scrape content from a website URL.
+        
+        Args:
+            url: The website URL to scrape
+            
+        Returns:
+            Extracted text content from the website
+        """
+        try:
+            logging.info(f"Fetching content from: {url}")
+            
+            result = self.fetcher.fetch(url)
+            if result.not_modified and result.text is not None:
+                logging.info(f"✓ Reusing {len(result.text)} cached characters (304 Not Modified)")
+                return result.text
+            
+            with get_telemetry().span("parse", "html", url=url, backend=self.html_backend) as event:
+                text = html_to_text(result.content, self.html_backend)
+                event.update(bytes=len(result.content), chars=len(text))
+            
+            self.fetcher.save_text(url, text)
+            logging.info(f"✓ Successfully scraped {len(text)} characters")
+            return text
+            
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Failed to scrape {url}: {e}")
+            raise Exception(f"Could not access website: {e}")
+        except Exception as e:
+            logging.error(f"Error parsing website: {e}")
+            raise
+
+    def scrape_vendor(self, url: str) -> str:
+        """
+        Scrape a vendor starting at `url`: the whole crawled site section when
+        a crawler is configured, otherwise just the one page. Recorded as a
+        "scrape" telemetry event.
+        """
+        with get_telemetry().span("scrape", "vendor", url=url) as event:
+            if self.crawler is None:
+                text = self.scrape_website(url)
+            else:
+                try:
+                    logging.info(f"Crawling vendor site from: {url}")
+                    crawl = self.crawler.crawl(url)
+                except requests.exceptions.RequestException as e:
+                    logging.error(f"Failed to scrape {url}: {e}")
+                    raise Exception(f"Could not access website: {e}")
+                text = crawl.text
+                event.update(pages=len(crawl.pages), bytes=crawl.bytes_fetched)
+            event["chars"] = len(text)
+            return text
+
+    def _check_snapshot(self, url: str, raw_text: str,
+                        features_to_check: List[str]) -> Tuple[Optional[PageFingerprint], Optional[dict]]:
+        """Fingerprint the page and return (fingerprint, previous product if the page is unchanged)."""
+        if self.snapshots is None:
+            return None, None
+        fingerprint = PageFingerprint.from_text(raw_text)
+        return fingerprint, self.snapshots.unchanged_product(url, fingerprint, features_to_check)
+
+    def _extract(self, url: str, raw_text: str, features_to_check: List[str],
+                 fingerprint: Optional[PageFingerprint] = None) -> Tuple[dict, dict]:
+        """
+        Run LLM extraction; the engine packs the most relevant passages into
+        the TPM-safe budget (see LLMEngine.build_extract_request).
+
+        Returns:
+            (product, field-level diff against the previous snapshot)
+        """
+        logging.info("Analyzing content with LLM...")
+        product = self.llm.extract_product_data(raw_text, features_to_check, self.context_budget)
+        return product, self._record_snapshot(url, product, fingerprint, features_to_check)
+
+    def _extract_batch(self, items: List[Tuple[int, str, str, Optional[PageFingerprint]]],
+                       features_to_check: List[str]) -> List[Tuple[int, object, dict]]:
+        """
+        Extract several vendors in one batched LLM request.
+
+        Args:
+            items: (row index, url, raw text, fingerprint) per vendor
+
+        Returns:
+            (row index, product dict or the exception raised, diff) per vendor
+        """
+        logging.info(f"Analyzing {len(items)} vendors in one batched LLM request...")
+        texts = {str(i): raw_text for i, _, raw_text, _ in items}
+        products, errors = self.llm.extract_products_batch(texts, features_to_check, self.context_budget)
+        outcomes = []
+        for i, url, _, fingerprint in items:
+            key = str(i)
+            if key in products:
+                changes = self._record_snapshot(url, products[key], fingerprint, features_to_check)
+                outcomes.append((i, products[key], changes))
+            else:
+                outcomes.append((i, errors.get(key, Exception("No result returned")), {}))
+        return outcomes
+
+    def _record_snapshot(self, url: str, product: dict, fingerprint: Optional[PageFingerprint],
+                         features_to_check: List[str]) -> dict:
+        """Diff against and replace the stored snapshot; returns the field-level diff."""
+        changes = {}
+        if fingerprint is not None:
+            previous = self.snapshots.get(url)
+            if previous is not None:
+                changes = diff_products(previous["product"], product)
+                if changes:
+                    logging.info(f"Changed fields for {url}: {', '.join(changes)}")
+            self.snapshots.save(url, fingerprint, features_to_check, product)
+        return changes
+
+    def update_company(self, url: str, features_to_check: List[str]) -> dict:
+        raw_text = self.scrape_vendor(url)
+        fingerprint, previous = self._check_snapshot(url, raw_text, features_to_check)
+        if previous is not None:
+            logging.info(f"✓ Page unchanged since last run, reusing previous result for {url}")
+            return previous
+        product, _ = self._extract(url, raw_text, features_to_check, fingerprint)
+        return product
+
+    def _scrape_and_check(self, url: str, features_to_check: List[str]):
+        raw_text = self.scrape_vendor(url)
+        fingerprint, previous = self._check_snapshot(url, raw_text, features_to_check)
+        return raw_text, fingerprint, previous
+
+    def update_many(self, urls: Iterable[str], features_to_check: List[str],
+                    scrape_workers: int = 8, extract_workers: int = 1,
+                    batch_size: int = 1, on_progress: Callable[[Dict], None] = None) -> List[Dict]:
+        """
+        Refresh many companies at once.
+
+        Pages are fetched by a bounded pool of scrape workers and handed to
+        a separate extraction pool as soon as each one arrives, so network
+        I/O overlaps with the LLM throttling instead of adding to it.
+        `urls` may be a lazy iterator (e.g. a streamed competitor search):
+        each URL starts scraping as soon as it is produced.
+
+        Args:
+            urls: Product URLs to refresh
+            features_to_check: Feature names passed to the extractor
+            scrape_workers: Maximum number of concurrent page fetches
+            extract_workers: Maximum number of concurrent LLM extractions
+            batch_size: Vendors packed into each LLM request (1 = one request per vendor)
+            on_progress: Called with {"url", "status": "scraped"} when a page
+                         is ready for extraction and with each final row as
+                         soon as it completes (one call at a time), so
+                         results can be journaled before the run ends
+
+        Returns:
+            One row per URL, in input order, with `url`, `status`,
+            `error` and `changed_fields` keys plus the product fields on
+            success. Pages whose snapshot is unchanged are not sent to the
+            LLM and get status "unchanged".
+        """
+        url_list: List[str] = []
+        results: Dict[int, Dict] = {}
+        lock = threading.Lock()
+        pending = []
+        extract_futures = []
+        scrape_futures = []
+        progress = {"done": 0}
+
+        def notify(row):
+            # Caller holds `lock`
+            if on_progress is not None:
+                try:
+                    on_progress(row)
+                except Exception as e:
+                    logging.error(f"Progress callback failed for {row['url']}: {e}")
+
+        def finish(i, row):
+            results[i] = row
+            notify(row)
+
+        with ThreadPoolExecutor(max_workers=max(1, scrape_workers)) as scrape_pool, \
+                ThreadPoolExecutor(max_workers=max(1, extract_workers)) as extract_pool:
+
+            def extraction_task(fn, indices, *args):
+                try:
+                    if batch_size > 1:
+                        outcomes = fn(*args)
+                    else:
+                        product, changes = fn(*args)
+                        outcomes = [(indices[0], product, changes)]
+                except Exception as e:
+                    outcomes = [(i, e, {}) for i in indices]
+
+                with lock:
+                    for i, product, changes in outcomes:
+                        if isinstance(product, Exception):
+                            logging.error(f"Extraction failed for {url_list[i]}: {product}")
+                            finish(i, {"url": url_list[i], "status": STATUS_EXTRACT_FAILED,
+                                       "error": str(product)})
+                        else:
+                            finish(i, {"url": url_list[i], "status": STATUS_OK, "error": "",
+                                       "changed_fields": list(changes), **product})
+                    progress["done"] += len(indices)
+                    logging.info(f"Extracted {progress['done']} changed pages ({len(url_list)} URLs so far)")
+
+            def submit_batch():
+                items = list(pending)
+                pending.clear()
+                extract_futures.append(extract_pool.submit(
+                    extraction_task, self._extract_batch, [i for i, _, _, _ in items], items, features_to_check))
+
+            def scrape_task(i, url):
+                try:
+                    raw_text, fingerprint, previous = self._scrape_and_check(url, features_to_check)
+                except Exception as e:
+                    with lock:
+                        finish(i, {"url": url, "status": STATUS_SCRAPE_FAILED, "error": str(e)})
+                    return
+                with lock:
+                    if previous is not None:
+                        finish(i, {"url": url, "status": STATUS_UNCHANGED, "error": "",
+                                   "changed_fields": [], **previous})
+                        return
+                    notify({"url": url, "status": STATUS_SCRAPED})
+                    if batch_size > 1:
+                        pending.append((i, url, raw_text, fingerprint))
+                        if len(pending) >= batch_size:
+                            submit_batch()
+                    else:
+                        extract_futures.append(extract_pool.submit(
+                            extraction_task, self._extract, [i], url, raw_text, features_to_check, fingerprint))
+
+            try:
+                for url in urls:
+                    with lock:
+                        i = len(url_list)
+                        url_list.append(url)
+                    scrape_futures.append(scrape_pool.submit(scrape_task, i, url))
+
+                wait(scrape_futures)
+                with lock:
+                    if pending:
+                        submit_batch()
+                # Extraction futures are only added by scrape tasks, all finished by now
+                wait(list(extract_futures))
+            except BaseException:
+                # Ctrl-C or a fatal error: drop queued work instead of draining it; rows
+                # already reported through on_progress are kept by the caller
+                with lock:
+                    for future in scrape_futures + extract_futures:
+                        future.cancel()
+                raise
+
+        return [results[i] for i in range(len(url_list))]
+
+    def update_many_offline(self, urls: List[str], features_to_check: List[str],
+                            batch: OfflineBatch, scrape_workers: int = 8,
+                            on_progress: Callable[[Dict], None] = None) -> List[Dict]:
+        """
+        Refresh many companies through an offline batch job instead of
+        interactive calls, so throughput isn't bound by the per-minute limit.
+
+        Pages are scraped concurrently, unchanged ones are reused, and the
+        rest are spooled as extraction requests, submitted, polled and
+        merged back by row.
+
+        Args:
+            urls: Product URLs to refresh
+            features_to_check: Feature names passed to the extractor
+            batch: OfflineBatch wrapping the backend that runs the job
+            scrape_workers: Maximum number of concurrent page fetches
+            on_progress: Progress callback, as in update_many
+
+        Returns:
+            Rows in the same format as update_many
+        """
+        results: List[Optional[Dict]] = [None] * len(urls)
+        fingerprints = {}
+
+        def finish(i, row):
+            results[i] = row
+            if on_progress is not None:
+                on_progress(row)
+
+        with ThreadPoolExecutor(max_workers=max(1, scrape_workers)) as scrape_pool:
+            scrape_futures = {
+                scrape_pool.submit(self._scrape_and_check, url, features_to_check): i
+                for i, url in enumerate(urls)
+            }
+            for future in as_completed(scrape_futures):
+                i = scrape_futures[future]
+                try:
+                    raw_text, fingerprint, previous = future.result()
+                except Exception as e:
+                    finish(i, {"url": urls[i], "status": STATUS_SCRAPE_FAILED, "error": str(e)})
+                    continue
+                if previous is not None:
+                    finish(i, {"url": urls[i], "status": STATUS_UNCHANGED, "error": "",
+                               "changed_fields": [], **previous})
+                    continue
+                if on_progress is not None:
+                    on_progress({"url": urls[i], "status": STATUS_SCRAPED})
+                fingerprints[i] = fingerprint
+                batch.add_extraction(str(i), raw_text, features_to_check, self.context_budget)
+
+        if fingerprints:
+            logging.info(f"Submitting {len(fingerprints)} extractions as a batch job...")
+            try:
+                products, errors = batch.run()
+            except Exception as e:
+                logging.error(f"Batch job failed: {e}")
+                products, errors = {}, {str(i): e for i in fingerprints}
+
+            for i, fingerprint in fingerprints.items():
+                product = products.get(str(i))
+                if product is None:
+                    error = errors.get(str(i), Exception("No result returned"))
+                    finish(i, {"url": urls[i], "status": STATUS_EXTRACT_FAILED, "error": str(error)})
+                    continue
+                changes = self._record_snapshot(urls[i], product, fingerprint, features_to_check)
+                finish(i, {"url": urls[i], "status": STATUS_OK, "error": "",
+                           "changed_fields": list(changes), **product})
+
+        return results
+
+
+class AsyncLandscapeUpdater(LandscapeUpdater):
+    """
+    LandscapeUpdater for an AsyncLLMEngine; update_company and update_many
+    are coroutines.
+
+    Scraping reuses the synchronous fetch layer in worker threads (keeping
+    its connection pool, HTTP cache and politeness delays) while the
+    extractions run as concurrent tasks on the event loop.
+    """
+
+    def __init__(self, llm: 'AsyncLLMEngine', fetcher: HttpFetcher = None,
+                 snapshots: SnapshotStore = None, context_budget: int = DEFAULT_TOKEN_BUDGET,
+                 crawler: SiteCrawler = None, scrape_workers: int = 8, html_backend: str = None):
+        super().__init__(llm, fetcher, snapshots, context_budget, crawler, html_backend)
+        self._scrape_semaphore = asyncio.Semaphore(max(1, scrape_workers))
+
+    async def _scrape_and_check_async(self, url: str, features_to_check: List[str]):
+        async with self._scrape_semaphore:
+            return await asyncio.to_thread(self._scrape_and_check, url, features_to_check)
+
+    async def _extract_async(self, url: str, raw_text: str, features_to_check: List[str],
+                             fingerprint: Optional[PageFingerprint] = None) -> Tuple[dict, dict]:
+        product = await self.llm.extract_product_data(raw_text, features_to_check, self.context_budget)
+        return product, self._record_snapshot(url, product, fingerprint, features_to_check)
+
+    async def update_company(self, url: str, features_to_check: List[str]) -> dict:
+        raw_text, fingerprint, previous = await self._scrape_and_check_async(url, features_to_check)
+        if previous is not None:
+            logging.info(f"✓ Page unchanged since last run, reusing previous result for {url}")
+            return previous
+        product, _ = await self._extract_async(url, raw_text, features_to_check, fingerprint)
+        return product
+
+    async def _update_row(self, url: str, features_to_check: List[str],
+                          on_progress: Callable[[Dict], None] = None) -> Dict:
+        row = await self._update_row_inner(url, features_to_check, on_progress)
+        if on_progress is not None:
+            on_progress(row)
+        return row
+
+    async def _update_row_inner(self, url: str, features_to_check: List[str],
+                                on_progress: Callable[[Dict], None] = None) -> Dict:
+        try:
+            raw_text, fingerprint, previous = await self._scrape_and_check_async(url, features_to_check)
+        except Exception as e:
+            return {"url": url, "status": STATUS_SCRAPE_FAILED, "error": str(e)}
+        if previous is not None:
+            return {"url": url, "status": STATUS_UNCHANGED, "error": "", "changed_fields": [], **previous}
+        if on_progress is not None:
+            on_progress({"url": url, "status": STATUS_SCRAPED})
+        try:
+            product, changes = await self._extract_async(url, raw_text, features_to_check, fingerprint)
+        except Exception as e:
+            logging.error(f"Extraction failed for {url}: {e}")
+            return {"url": url, "status": STATUS_EXTRACT_FAILED, "error": str(e)}
+        return {"url": url, "status": STATUS_OK, "error": "", "changed_fields": list(changes), **product}
+
+    async def update_many(self, urls: List[str], features_to_check: List[str],
+                          on_progress: Callable[[Dict], None] = None) -> List[Dict]:
+        """
+        Refresh many companies concurrently; each URL is scraped and then
+        extracted as soon as its page arrives.
+
+        Returns:
+            Rows in the same format as LandscapeUpdater.update_many
+        """
+        return list(await asyncio.gather(*(self._update_row(url, features_to_check, on_progress)
+                                           for url in urls)))
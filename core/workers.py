@@ -0,0 +1,237 @@
+import logging
+import multiprocessing
+import os
+import time
+from typing import Callable, Dict, Iterable, List
+
+from google import genai
+
+from core.cache import LLMCache
+from core.config import (
+    set_quota_ledger, get_telemetry, LLM_CACHE_PATH, LLM_CACHE_BYPASS, HTTP_CACHE_PATH, SNAPSHOT_PATH,
+    CONTEXT_TOKEN_BUDGET, CRAWL_MAX_PAGES, HTML_EXTRACTOR
+)
+from core.crawler import SiteCrawler
+from core.fetcher import HttpFetcher
+from core.jobqueue import JobQueue, Job, JOB_SCRAPE, JOB_EXTRACT
+from core.llm_handler import LLMEngine
+from core.runs import new_run_id
+from core.snapshots import SnapshotStore, PageFingerprint
+from core.updater import (
+    LandscapeUpdater, STATUS_OK, STATUS_UNCHANGED, STATUS_SCRAPED, STATUS_SCRAPE_FAILED, STATUS_EXTRACT_FAILED
+)
+
+
+def updater_settings(updater: LandscapeUpdater) -> Dict:
+    """
+    Picklable settings of an updater, for build_updater to rebuild the same
+    one in each worker process (CLI options such as --crawl-pages or
+    --no-cache apply there too, not only the core.config defaults).
+    """
+    cache = updater.llm.cache
+    return {
+        "cache_bypass": cache.bypass if cache is not None else LLM_CACHE_BYPASS,
+        "context_budget": updater.context_budget,
+        "crawl_pages": updater.crawler.max_pages if updater.crawler is not None else 1,
+        "html_backend": updater.html_backend,
+    }
+
+
+def build_updater(model_name: str, settings: Dict = None) -> LandscapeUpdater:
+    """
+    Default worker factory: the same updater main.py builds. Runs in the
+    worker process, so it must stay importable.
+
+    Args:
+        model_name: Model (or 'auto') the worker's LLMEngine uses
+        settings: Values from updater_settings(); missing keys fall back to core.config
+    """
+    settings = settings or {}
+    html_backend = settings.get("html_backend", HTML_EXTRACTOR)
+    client = genai.Client(api_key=os.environ['GEMINI_API_KEY'])
+    llm = LLMEngine(client, model_name,
+                    cache=LLMCache(LLM_CACHE_PATH, bypass=settings.get("cache_bypass", LLM_CACHE_BYPASS)))
+    fetcher = HttpFetcher(cache_path=HTTP_CACHE_PATH)
+    crawler = SiteCrawler(fetcher, max_pages=settings.get("crawl_pages", CRAWL_MAX_PAGES), html_backend=html_backend)
+    return LandscapeUpdater(llm, fetcher, SnapshotStore(SNAPSHOT_PATH),
+                            context_budget=settings.get("context_budget", CONTEXT_TOKEN_BUDGET),
+                            crawler=crawler, html_backend=html_backend)
+
+
+def _run_scrape(updater: LandscapeUpdater, queue: JobQueue, job: Job, features: List[str]):
+    try:
+        raw_text, fingerprint, previous = updater._scrape_and_check(job.url, features)
+    except Exception as e:
+        queue.finish(job, {"url": job.url, "status": STATUS_SCRAPE_FAILED, "error": str(e)}, failed=True)
+        return
+    if previous is not None:
+        queue.finish(job, {"url": job.url, "status": STATUS_UNCHANGED, "error": "",
+                           "changed_fields": [], **previous})
+        return
+    payload = {"text": raw_text, "fingerprint": fingerprint.to_json() if fingerprint else None}
+    queue.finish(job, {"url": job.url, "status": STATUS_SCRAPED},
+                 follow_up={"kind": JOB_EXTRACT, "payload": payload})
+
+
+def _run_extract(updater: LandscapeUpdater, queue: JobQueue, jobs: List[Job], features: List[str]):
+    fingerprints = {job.id: PageFingerprint.from_json(job.payload["fingerprint"])
+                    if job.payload.get("fingerprint") else None for job in jobs}
+    try:
+        if len(jobs) > 1:
+            outcomes = updater._extract_batch(
+                [(job.id, job.url, job.payload["text"], fingerprints[job.id]) for job in jobs], features)
+        else:
+            job = jobs[0]
+            product, changes = updater._extract(job.url, job.payload["text"], features, fingerprints[job.id])
+            outcomes = [(job.id, product, changes)]
+    except Exception as e:
+        outcomes = [(job.id, e, {}) for job in jobs]
+
+    by_id = {job.id: job for job in jobs}
+    for job_id, product, changes in outcomes:
+        job = by_id[job_id]
+        if isinstance(product, Exception):
+            logging.error(f"Extraction failed for {job.url}: {product}")
+            queue.finish(job, {"url": job.url, "status": STATUS_EXTRACT_FAILED, "error": str(product)},
+                         failed=True)
+        else:
+            queue.finish(job, {"url": job.url, "status": STATUS_OK, "error": "",
+                               "changed_fields": list(changes), **product})
+
+
+def worker_main(worker_id: str, run_id: str, queue_path: str, ledger_path: str, features: List[str],
+                batch_size: int, stop_event, factory: Callable[..., LandscapeUpdater], factory_args: tuple):
+    """
+    Worker process loop: claim scrape/extract jobs of a run until told to stop.
+
+    The parent can be interrupted with Ctrl-C (which also reaches the
+    workers); the worker then just exits, leaving its job to be purged.
+    """
+    try:
+        set_quota_ledger(ledger_path)
+        updater = factory(*factory_args)
+        queue = JobQueue(queue_path)
+        while not stop_event.is_set():
+            jobs = queue.claim(run_id, worker_id, batch_size)
+            if not jobs:
+                stop_event.wait(0.2)
+            elif jobs[0].kind == JOB_SCRAPE:
+                _run_scrape(updater, queue, jobs[0], features)
+            else:
+                _run_extract(updater, queue, jobs, features)
+        queue.close()
+    except KeyboardInterrupt:
+        pass
+
+
+class WorkerPool:
+    """
+    Multi-process bulk refresh.
+
+    Vendors are queued as scrape jobs in a SQLite JobQueue; N worker
+    processes claim them, parse the pages (using every core for the
+    CPU-bound HTML parsing) and queue an extract job for each changed page.
+    All processes take their RPM/TPM budget from one quota ledger
+    (see SharedRateLimiter), so together they never exceed the API key's
+    per-minute quota. The parent only collects result rows and replaces
+    workers that die, requeueing their jobs.
+    """
+
+    def __init__(self, processes: int, queue_path: str = ".jobs.sqlite", ledger_path: str = None,
+                 factory: Callable[..., LandscapeUpdater] = build_updater, factory_args: tuple = (),
+                 batch_size: int = 1, poll_seconds: float = 0.5, max_restarts: int = None):
+        """
+        Args:
+            processes: Number of worker processes
+            queue_path: SQLite file for the job queue
+            ledger_path: SQLite file for the shared quota ledger (the queue file by default)
+            factory: Top-level callable building a LandscapeUpdater in each worker
+            factory_args: Picklable arguments for `factory` (e.g. the model name and updater_settings())
+            batch_size: Queued extractions packed into one LLM request
+            poll_seconds: How often the parent collects results
+            max_restarts: Worker restarts before the run is abandoned
+                          (3 per process by default)
+        """
+        self.processes = max(1, processes)
+        self.queue_path = queue_path
+        self.ledger_path = ledger_path or queue_path
+        self.factory = factory
+        self.factory_args = factory_args
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_restarts = 3 * self.processes if max_restarts is None else max_restarts
+        self.respawned = 0
+
+    def run(self, urls: Iterable[str], features_to_check: List[str],
+            on_progress: Callable[[Dict], None] = None) -> List[Dict]:
+        """
+        Refresh many companies across the worker processes.
+
+        Args:
+            urls: Product URLs to refresh
+            features_to_check: Feature names passed to the extractor
+            on_progress: Called in this process with {"url", "status": "scraped"}
+                         rows and with each final row as it completes
+
+        Returns:
+            One row per unique URL, in input order, as LandscapeUpdater.update_many
+        """
+        url_list = list(dict.fromkeys(urls))
+        run_id = new_run_id()
+        queue = JobQueue(self.queue_path)
+        queue.enqueue_many(run_id, JOB_SCRAPE, url_list)
+
+        # Exports TELEMETRY_SESSION, so the workers log under this process's session
+        get_telemetry()
+        context = multiprocessing.get_context("spawn")
+        stop_event = context.Event()
+        workers = {}
+
+        def spawn(worker_id):
+            process = context.Process(
+                target=worker_main, name=worker_id, daemon=True,
+                args=(worker_id, run_id, self.queue_path, self.ledger_path, features_to_check,
+                      self.batch_size, stop_event, self.factory, self.factory_args))
+            process.start()
+            workers[worker_id] = process
+
+        results = {}
+        logging.info(f"Refreshing {len(url_list)} URLs with {self.processes} worker processes")
+        try:
+            for n in range(self.processes):
+                spawn(f"worker-{n}")
+
+            while len(results) < len(url_list):
+                for row in queue.take_results(run_id):
+                    if row["status"] != STATUS_SCRAPED:
+                        results[row["url"]] = row
+                    if on_progress is not None:
+                        try:
+                            on_progress(row)
+                        except Exception as e:
+                            logging.error(f"Progress callback failed for {row['url']}: {e}")
+                if len(results) >= len(url_list):
+                    break
+                for worker_id, process in list(workers.items()):
+                    if not process.is_alive():
+                        requeued = queue.requeue_worker(run_id, worker_id)
+                        logging.warning(f"{worker_id} exited with code {process.exitcode}; "
+                                        f"requeued {requeued} jobs and restarting it")
+                        self.respawned += 1
+                        if self.respawned > self.max_restarts:
+                            raise RuntimeError(f"Worker processes died {self.respawned} times, giving up")
+                        spawn(worker_id)
+                time.sleep(self.poll_seconds)
+        finally:
+            stop_event.set()
+            for process in workers.values():
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+            queue.purge(run_id)
+            queue.close()
+
+        logging.info(f"Refreshed {len(results)} URLs with {self.processes} worker processes "
+                     f"({self.respawned} restarted)")
+        return [results[url] for url in url_list]
+
@@ -1,136 +1,586 @@
-import os
-import logging
-import csv
-from core.config import setup_api_key, get_working_model
-from core.creator import LandscapeCreator
-from core.updater import LandscapeUpdater
-from core.llm_handler import LLMEngine
-
-def main():
-    # Setup Gemini API
-    setup_api_key()
-    client, model_name = get_working_model()
-    
-    # Initialize Engine
-    llm = LLMEngine(client, model_name)
-    creator = LandscapeCreator(llm)
-    updater = LandscapeUpdater(llm)
-
-    print("\n" + "="*50)
-    print("GEMINI MARKET RESEARCH TOOL")
-    print("="*50)
-    print("1. Create New Landscape (Taxonomy + Discovery)")
-    print("2. Update Existing Landscape (Scrape Website)")
-    print("="*50)
-    
-    choice = input("Select option: ").strip()
-
-    if choice == "1":
-        topic = input("\nEnter market topic (e.g., Chatbots, ERP solutions): ").strip()
-        
-        print(f"\n[*] Analyzing market: {topic}...")
-        
-        # Get Taxonomy
-        try:
-            tax = creator.build_taxonomy(topic)
-        except Exception as e:
-            if '429' in str(e) or 'RESOURCE_EXHAUSTED' in str(e):
-                print("\n Quota exceeded!")
-                return
-            raise
-        
-        print(f"\n{'='*50}")
-        print("MARKET TAXONOMY")
-        print("="*50)
-        print(f"Name: {tax['market_name']}")
-        print(f"Definition: {tax['definition']}")
-        print(f"\nDivisions: {', '.join(tax['divisions'])}")
-        print(f"\nSuggested Features: {', '.join(tax['suggested_features'])}")
-        print(f"\nSub-divisions: {', '.join(tax['sub_divisions'])}")
-        print("="*50)
-        
-        # Search for Players
-        do_search = input("\nSearch for current players/links? (y/n): ").strip().lower()
-        if do_search == 'y':
-            players = creator.find_competitors(topic, tax['divisions'])
-            if players:
-                print(f"\n✓ Found {len(players)} Potential Players:")
-                for p in players:
-                    print(f"  - {p['company_name']} ({p['product_name']}): {p['official_website_url']}")
-                
-                # CSV Export for Choice 1
-                filename = f"{topic.replace(' ', '_').lower()}_competitors.csv"
-                keys = ["company_name", "product_name", "official_website_url", "description"]
-                
-                try:
-                    with open(filename, "w", newline="", encoding="utf-8") as output_file:
-                        dict_writer = csv.DictWriter(output_file, fieldnames=keys)
-                        dict_writer.writeheader()
-                        dict_writer.writerows(players)
-                    print(f"\n[✔] Data saved to {filename}")
-                except Exception as csv_err:
-                    print(f"\n[!] Error saving CSV: {csv_err}")
-                
-            else:
-                print("\n[!] No competitors found.")
-
-    elif choice == "2":
-        url = input("\nEnter company product URL: ").strip()
-        
-        # Example features to check
-        features = ["Mobile App", "API access", "SSO", "Analytics Dashboard", "Webhooks"]
-        
-        print(f"\n[*] Analyzing page content from {url}...")
-        try:
-            result = updater.update_company(url, features)
-        except Exception as e:
-            if '429' in str(e) or 'RESOURCE_EXHAUSTED' in str(e):
-                print("\nQuota exceeded!")
-                return
-            raise
-        
-        print("\n" + "="*50)
-        print("EXTRACTED MARKET DATA")
-        print("="*50)
-        print(f"Company: {result.get('company_name', 'N/A')}")
-        print(f"Product: {result.get('product_name', 'N/A')}")
-        print(f"Description: {result.get('description', 'N/A')}")
-        print(f"\nFeatures: {', '.join(result.get('features', []))}")
-        print(f"\nFeature Flags:")
-        for feature, present in result.get('feature_flags', {}).items():
-            status = "✓" if present else "✗"
-            print(f"  {status} {feature}")
-        print(f"\nPricing: {result.get('pricing_desc', 'N/A')}")
-        print(f"Tiers: {', '.join(result.get('pricing_tiers', []))}")
-        print(f"\nNotes: {result.get('notes', 'N/A')}")
-        print("="*50)
-
-        # CSV Export for Choice 2
-        comp_name = result.get('company_name', 'extracted_company').replace(' ', '_').lower()
-        filename = f"{comp_name}_analysis.csv"
-        
-        try:
-            # Flatten lists/dicts so they fit into single CSV cells
-            csv_data = result.copy()
-            if 'features' in csv_data:
-                csv_data['features'] = "; ".join(csv_data['features'])
-            if 'pricing_tiers' in csv_data:
-                csv_data['pricing_tiers'] = "; ".join(csv_data['pricing_tiers'])
-            if 'feature_flags' in csv_data:
-                # Convert dict to string "Feature1: True; Feature2: False"
-                csv_data['feature_flags'] = "; ".join([f"{k}: {v}" for k, v in csv_data['feature_flags'].items()])
-            
-            keys = csv_data.keys()
-            with open(filename, "w", newline="", encoding="utf-8") as output_file:
-                dict_writer = csv.DictWriter(output_file, fieldnames=keys)
-                dict_writer.writeheader()
-                dict_writer.writerow(csv_data)
-            print(f"\n[✔] Scraped data saved to {filename}")
-        except Exception as csv_err:
-            print(f"\n[!] Error saving CSV: {csv_err}")
-    
-    else:
-        print("\n[!] Invalid option selected")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from typing import TYPE_CHECKING
+from core.config import (
+    setup_api_key, get_working_model, LLM_CACHE_PATH, LLM_CACHE_BYPASS, HTTP_CACHE_PATH,
+    SNAPSHOT_PATH, CONTEXT_TOKEN_BUDGET, CRAWL_MAX_PAGES, EXTRACT_BATCH_SIZE,
+    HTML_EXTRACTOR, BATCH_SPOOL_DIR, BATCH_POLL_SECONDS, DISCOVERY_WORKERS, LANDSCAPE_DB_PATH, LANDSCAPE_EXPORT_FORMAT,
+    WORKER_PROCESSES, JOB_QUEUE_PATH, QUOTA_LEDGER_PATH, set_quota_ledger,
+    TELEMETRY_EVENTS_PATH, TELEMETRY_PROM_PATH, get_telemetry, DEFAULT_MODELS, AUTO_MODEL
+)
+from core.store import LandscapeStore, EXPORT_KINDS, EXPORT_FORMATS
+from core.runs import RunJournal
+
+if TYPE_CHECKING:
+    from core.fetcher import HttpFetcher
+    from core.creator import LandscapeCreator
+    from core.updater import LandscapeUpdater
+    from core.llm_handler import LLMEngine
+
+# The engine, fetcher, updater and worker modules pull in the Gemini SDK,
+# requests and the HTML parsers. They are imported by build_pipeline and the
+# commands that need them, so `--help`, `export` and `--list-runs` start fast.
+
+# Example features to check when neither --features nor a taxonomy gives any
+DEFAULT_FEATURES = ["Mobile App", "API access", "SSO", "Analytics Dashboard", "Webhooks"]
+
+def export_rows(store: LandscapeStore, kind: str, name: str, fmt: str = LANDSCAPE_EXPORT_FORMAT, **filters):
+    """Export stored rows to `name` in the given format (LANDSCAPE_EXPORT_FORMAT by default)."""
+    filename = f"{name}.{fmt}"
+    try:
+        count = store.export(kind, filename, fmt, **filters)
+        print(f"\n[✔] {count} {kind} rows saved to {filename}")
+    except Exception as export_err:
+        print(f"\n[!] Error exporting {kind}: {export_err}")
+
+def build_pipeline(args, interactive: bool = True):
+    """
+    Gemini client, LLM engine, creator and updater configured from the
+    command-line options.
+
+    Args:
+        args: Parsed arguments (model, cache, crawl and worker options)
+        interactive: Prompt for a missing API key or model instead of failing
+
+    Returns:
+        (client, llm, creator, fetcher, updater)
+    """
+    from core.cache import LLMCache
+    from core.fetcher import HttpFetcher
+    from core.crawler import SiteCrawler
+    from core.snapshots import SnapshotStore
+    from core.creator import LandscapeCreator
+    from core.updater import LandscapeUpdater
+    from core.llm_handler import LLMEngine
+
+    # Setup Gemini API
+    setup_api_key(interactive)
+    if args.workers > 1:
+        # This process and the refresh workers draw from one RPM/TPM budget
+        set_quota_ledger(QUOTA_LEDGER_PATH or JOB_QUEUE_PATH)
+    client, model_name = get_working_model(interactive)
+
+    # Initialize Engine
+    llm = LLMEngine(client, model_name, cache=LLMCache(LLM_CACHE_PATH, bypass=args.no_cache))
+    creator = LandscapeCreator(llm)
+    fetcher = HttpFetcher(cache_path=HTTP_CACHE_PATH)
+    updater = LandscapeUpdater(llm, fetcher, SnapshotStore(SNAPSHOT_PATH),
+                               context_budget=CONTEXT_TOKEN_BUDGET,
+                               crawler=SiteCrawler(fetcher, max_pages=args.crawl_pages, html_backend=HTML_EXTRACTOR),
+                               html_backend=HTML_EXTRACTOR)
+    return client, llm, creator, fetcher, updater
+
+def run_refresh(journal: RunJournal, urls, features: list, updater: 'LandscapeUpdater',
+                store: LandscapeStore, llm: 'LLMEngine', client, offline: bool = False, topic: str = None,
+                workers: int = WORKER_PROCESSES, batch_size: int = EXTRACT_BATCH_SIZE):
+    """
+    Journaled bulk refresh: each vendor's outcome is recorded and its product
+    stored as soon as it completes, so an interrupted run loses nothing.
+
+    Returns:
+        The update rows, or None if the run was interrupted with Ctrl-C
+    """
+    from core.updater import STATUS_OK, STATUS_UNCHANGED
+
+    def on_progress(row):
+        journal.record_row(row)
+        if row['status'] in (STATUS_OK, STATUS_UNCHANGED):
+            store.upsert_products([row], topic)
+
+    print(f"[i] Run id: {journal.run_id} (resume with: python main.py --resume {journal.run_id})")
+    if isinstance(urls, list):
+        # Known up front: journal them all so a resume also covers vendors never reached
+        journal.add_items(urls)
+    try:
+        if offline:
+            from core.batch import OfflineBatch, GeminiBatchBackend
+            urls = list(urls)
+            batch = OfflineBatch(llm, GeminiBatchBackend(client), BATCH_SPOOL_DIR, BATCH_POLL_SECONDS)
+            rows = updater.update_many_offline(urls, features, batch, on_progress=on_progress)
+        elif workers > 1 and isinstance(urls, list):
+            from core.workers import WorkerPool, updater_settings
+            # Parse pages on every core; workers share the quota through the ledger
+            # and rebuild this updater, with the same options, in each process
+            pool = WorkerPool(workers, JOB_QUEUE_PATH, QUOTA_LEDGER_PATH or None,
+                              factory_args=(llm.model_name, updater_settings(updater)), batch_size=batch_size)
+            rows = pool.run(urls, features, on_progress=on_progress)
+        else:
+            rows = updater.update_many(journal.track(urls), features, batch_size=batch_size,
+                                       on_progress=on_progress)
+    except KeyboardInterrupt:
+        journal.finish(interrupted=True)
+        print(f"\n[!] Interrupted. Finished vendors are saved; resume with: python main.py --resume {journal.run_id}")
+        return None
+    except BaseException:
+        journal.finish(interrupted=True)
+        print(f"\n[!] Run failed. Finished vendors are saved; resume with: python main.py --resume {journal.run_id}")
+        raise
+    journal.finish()
+    return rows
+
+def report_refresh(journal: RunJournal, store: LandscapeStore, name: str, fmt: str = LANDSCAPE_EXPORT_FORMAT):
+    """Print a run's outcome (including earlier attempts when resumed) and export its products."""
+    from core.updater import STATUS_OK, STATUS_UNCHANGED
+
+    counts = journal.summary()
+    total = sum(counts.values())
+    ok, unchanged = counts.get(STATUS_OK, 0), counts.get(STATUS_UNCHANGED, 0)
+    print(f"\n✓ Extracted {ok + unchanged}/{total} companies ({unchanged} unchanged, reused)")
+    failures = journal.failures()
+    for url, error in failures.items():
+        print(f"  ✗ {url}: {error}")
+    if failures:
+        print(f"[i] Retry the failed vendors with: python main.py --resume {journal.run_id}")
+    export_rows(store, "products", name, fmt, urls=journal.items())
+
+def print_taxonomy(tax: dict):
+    print(f"\n{'='*50}")
+    print("MARKET TAXONOMY")
+    print("="*50)
+    print(f"Name: {tax['market_name']}")
+    print(f"Definition: {tax['definition']}")
+    print(f"\nDivisions: {', '.join(tax['divisions'])}")
+    print(f"\nSuggested Features: {', '.join(tax['suggested_features'])}")
+    print(f"\nSub-divisions: {', '.join(tax['sub_divisions'])}")
+    print("="*50)
+
+def print_product(result: dict):
+    print("\n" + "="*50)
+    print("EXTRACTED MARKET DATA")
+    print("="*50)
+    print(f"Company: {result['company_name']}")
+    print(f"Product: {result['product_name']}")
+    print(f"Description: {result['description']}")
+    print(f"\nFeatures: {', '.join(result['features'])}")
+    print(f"\nFeature Flags:")
+    for feature, present in result['feature_flags'].items():
+        status = "✓" if present else "✗"
+        print(f"  {status} {feature}")
+    print(f"\nPricing: {result['pricing_desc']}")
+    print(f"Tiers: {', '.join(result['pricing_tiers'])}")
+    print(f"\nNotes: {result['notes']}")
+    print("="*50)
+
+def is_quota_error(e: Exception) -> bool:
+    return '429' in str(e) or 'RESOURCE_EXHAUSTED' in str(e)
+
+def discover(creator: 'LandscapeCreator', fetcher: 'HttpFetcher', updater: 'LandscapeUpdater',
+             store: LandscapeStore, llm: 'LLMEngine', client, topic: str, tax: dict, shard: bool,
+             enrich: bool, features: list, args) -> bool:
+    """
+    Search for the market's players, printing (and, with `enrich`,
+    scraping and analyzing) each one while the search is still running,
+    then store and export them.
+
+    Returns:
+        False if no competitors were found or the run was interrupted
+    """
+    from core.discovery import CompetitorIndex
+
+    players = []
+    index = CompetitorIndex(resolver=fetcher.resolve)
+    print("\n[*] Searching for players...")
+    def stream_urls():
+        if shard:
+            found = creator.find_competitors_sharded(topic, tax['divisions'] + tax['sub_divisions'],
+                                                     DISCOVERY_WORKERS, index)
+        else:
+            found = creator.find_competitors_stream(topic, tax['divisions'])
+        for p in found:
+            players.append(p)
+            store.upsert_competitors(topic, [p])
+            print(f"  - {p['company_name']} ({p['product_name']}): {p['official_website_url']}")
+            yield p['official_website_url']
+
+    name = topic.replace(' ', '_').lower()
+    if enrich:
+        journal = RunJournal(LANDSCAPE_DB_PATH, kind="discovery",
+                             params={"topic": topic, "features": features, "name": f"{name}_bulk_analysis"})
+        rows = run_refresh(journal, stream_urls(), features, updater, store, llm, client, topic=topic,
+                           workers=args.workers, batch_size=args.batch_size)
+        if rows is None:
+            # Interrupted: leave the run resumable rather than exporting a partial landscape
+            return False
+    else:
+        for _ in stream_urls():
+            pass
+
+    if not players:
+        print("\n[!] No competitors found.")
+        return False
+    if shard:
+        # Merged records, listing every division that found each player
+        players = index.competitors()
+        print(f"\n✓ Found {len(players)} Potential Players ({index.merged} duplicates merged)")
+    else:
+        print(f"\n✓ Found {len(players)} Potential Players")
+
+    # Store, then export
+    store.upsert_competitors(topic, players)
+    export_rows(store, "competitors", f"{name}_competitors", args.format, topic=topic)
+
+    if enrich:
+        report_refresh(journal, store, f"{name}_bulk_analysis", args.format)
+    return True
+
+def refresh_file(path: str, features: list, offline: bool, updater: 'LandscapeUpdater', store: LandscapeStore,
+                 llm: 'LLMEngine', client, args) -> bool:
+    """
+    Journaled refresh of every URL in a competitors CSV or URL list.
+
+    Returns:
+        False if the file could not be read, was empty or the run was interrupted
+    """
+    from core.updater import load_urls
+
+    try:
+        urls = load_urls(path)
+    except OSError as e:
+        print(f"\n[!] Could not read {path}: {e}")
+        return False
+    if not urls:
+        print("\n[!] No URLs found.")
+        return False
+
+    # Products are stored as each vendor completes; then a combined export
+    base = os.path.splitext(os.path.basename(path))[0].replace('_competitors', '')
+    journal = RunJournal(LANDSCAPE_DB_PATH, kind="refresh",
+                         params={"features": features, "offline": offline, "name": f"{base}_bulk_analysis"})
+
+    print(f"\n[*] Refreshing {len(urls)} companies...")
+    rows = run_refresh(journal, urls, features, updater, store, llm, client, offline=offline,
+                       workers=args.workers, batch_size=args.batch_size)
+    if rows is None:
+        return False
+    report_refresh(journal, store, f"{base}_bulk_analysis", args.format)
+    return True
+
+def resume_run(run_id: str, updater: 'LandscapeUpdater', store: LandscapeStore, llm: 'LLMEngine',
+               client, args) -> bool:
+    """Finish an earlier bulk update or enrichment run. Returns False if it is unknown or interrupted again."""
+    try:
+        journal = RunJournal.load(LANDSCAPE_DB_PATH, run_id)
+    except KeyError as e:
+        print(f"\n[!] {e}. Use --list-runs to see recent runs.")
+        return False
+    params = journal.params
+    urls = journal.unfinished()
+    print(f"\n[*] Resuming run {journal.run_id}: {len(urls)} of {len(journal.items())} vendors left")
+    rows = run_refresh(journal, urls, params['features'], updater, store, llm, client,
+                       offline=params.get('offline', False), topic=params.get('topic'),
+                       workers=args.workers, batch_size=args.batch_size)
+    if rows is None:
+        return False
+    report_refresh(journal, store, params['name'], args.format)
+    return True
+
+def print_run_stats(llm: 'LLMEngine', workers: int):
+    """LLM retry, routing, validation and cache counters, then the telemetry summary."""
+    from core.telemetry import Telemetry
+
+    stats = llm.retry_policy.stats.as_dict()
+    if stats['retries']:
+        print(f"\n[i] LLM retries: {stats['retries']} over {stats['calls']} calls, "
+              f"{stats['sleep_seconds']:.0f}s spent waiting ({stats['errors']})")
+    if llm.router is not None:
+        route_stats = llm.router.stats()
+        print(f"[i] Model routing: {route_stats['calls_by_model']}, {route_stats['failovers']} failovers")
+    checks = llm.validation_stats.as_dict()
+    if checks['failures']:
+        print(f"[i] Schema validation: {checks['failures']} invalid responses, {checks['repair_calls']} repair calls, "
+              f"{checks['repaired']} repaired, {checks['unrepaired']} dropped")
+    cache_stats = llm.cache.stats()
+    print(f"[i] LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+    telemetry = get_telemetry()
+    telemetry.close()
+    if TELEMETRY_EVENTS_PATH and workers > 1:
+        # Worker processes logged their calls under this session in the shared events file
+        telemetry = Telemetry.from_events(TELEMETRY_EVENTS_PATH, telemetry.session)
+    print("\n" + telemetry.summary_table())
+    if TELEMETRY_PROM_PATH:
+        telemetry.write_prometheus(TELEMETRY_PROM_PATH)
+
+def run_command(args) -> int:
+    """
+    Run one subcommand without prompting (for cron and schedulers).
+
+    Returns:
+        Process exit code: 0 on success, 1 on failure or quota exhaustion,
+        130 when interrupted
+    """
+    store = LandscapeStore(LANDSCAPE_DB_PATH)
+    if args.command == "export":
+        topic = args.topic
+        name = f"{topic.replace(' ', '_').lower()}_{args.kind}" if topic else f"landscape_{args.kind}"
+        export_rows(store, args.kind, name, args.format, topic=topic)
+        return 0
+
+    try:
+        client, llm, creator, fetcher, updater = build_pipeline(args, interactive=False)
+    except ValueError as e:
+        # e.g. no GEMINI_API_KEY in a scheduled run
+        logging.error(str(e))
+        return 1
+    try:
+        if args.resume:
+            ok = resume_run(args.resume, updater, store, llm, client, args)
+        elif args.command in ("taxonomy", "discover"):
+            tax = store.latest_taxonomy(args.topic) if args.command == "discover" and args.reuse_taxonomy else None
+            if tax is None:
+                print(f"\n[*] Analyzing market: {args.topic}...")
+                tax = creator.build_taxonomy(args.topic)
+                store.save_taxonomy(args.topic, tax)
+            print_taxonomy(tax)
+            ok = True
+            if args.command == "discover":
+                ok = discover(creator, fetcher, updater, store, llm, client, args.topic, tax, args.shard,
+                              args.enrich, args.features or tax['suggested_features'], args)
+        elif args.command == "update":
+            features = args.features or DEFAULT_FEATURES
+            print(f"\n[*] Analyzing page content from {args.url}...")
+            result = updater.update_company(args.url, features)
+            print_product(result)
+            comp_name = result['company_name'].replace(' ', '_').lower()
+            store.upsert_products([{"url": args.url, **result}])
+            export_rows(store, "products", f"{comp_name}_analysis", args.format, urls=[args.url])
+            ok = True
+        else:
+            ok = refresh_file(args.file, args.features or DEFAULT_FEATURES, args.offline,
+                              updater, store, llm, client, args)
+    except KeyboardInterrupt:
+        print("\n[!] Interrupted")
+        return 130
+    except Exception as e:
+        if not is_quota_error(e):
+            raise
+        print("\n[!] Quota exceeded!")
+        return 1
+    print_run_stats(llm, args.workers)
+    return 0 if ok else 1
+
+def run_menu(args):
+    """The interactive menu (when neither a command nor --resume is given)."""
+    client, llm, creator, fetcher, updater = build_pipeline(args)
+    store = LandscapeStore(LANDSCAPE_DB_PATH)
+
+    print("\n" + "="*50)
+    print("GEMINI MARKET RESEARCH TOOL")
+    print("="*50)
+    print("1. Create New Landscape (Taxonomy + Discovery)")
+    print("2. Update Existing Landscape (Scrape Website)")
+    print("3. Bulk Update (Competitors CSV or URL list)")
+    print("4. Offline Bulk Update (Gemini batch job, for large landscapes)")
+    print("5. Export Stored Landscape (CSV/JSONL/Parquet)")
+    print("="*50)
+
+    choice = input("Select option: ").strip()
+
+    if choice == "1":
+        topic = input("\nEnter market topic (e.g., Chatbots, ERP solutions): ").strip()
+
+        print(f"\n[*] Analyzing market: {topic}...")
+
+        # Get Taxonomy
+        try:
+            tax = creator.build_taxonomy(topic)
+        except Exception as e:
+            if is_quota_error(e):
+                print("\n Quota exceeded!")
+                return
+            raise
+
+        print_taxonomy(tax)
+        store.save_taxonomy(topic, tax)
+
+        # Search for Players
+        do_search = input("\nSearch for current players/links? (y/n): ").strip().lower()
+        if do_search == 'y':
+            do_shard = input("Search each division and sub-division separately for broader coverage? (y/n): ").strip().lower()
+            do_enrich = input("Also scrape and analyze each player as it is found? (y/n): ").strip().lower()
+            discover(creator, fetcher, updater, store, llm, client, topic, tax, do_shard == 'y',
+                     do_enrich == 'y', args.features or tax['suggested_features'], args)
+
+    elif choice == "2":
+        url = input("\nEnter company product URL: ").strip()
+
+        features = args.features or DEFAULT_FEATURES
+
+        print(f"\n[*] Analyzing page content from {url}...")
+        try:
+            result = updater.update_company(url, features)
+        except Exception as e:
+            if is_quota_error(e):
+                print("\nQuota exceeded!")
+                return
+            raise
+
+        print_product(result)
+
+        # Store, then export for Choice 2
+        comp_name = result['company_name'].replace(' ', '_').lower()
+        store.upsert_products([{"url": url, **result}])
+        export_rows(store, "products", f"{comp_name}_analysis", args.format, urls=[url])
+
+    elif choice in ("3", "4"):
+        path = input("\nEnter competitors CSV or URL list file: ").strip()
+        refresh_file(path, args.features or DEFAULT_FEATURES, choice == "4", updater, store, llm, client, args)
+
+    elif choice == "5":
+        kind = input(f"\nWhat to export ({', '.join(EXPORT_KINDS)}): ").strip().lower()
+        topic = input("Market topic (blank for all): ").strip() or None
+        if kind not in EXPORT_KINDS:
+            print("\n[!] Invalid export kind")
+            return
+        name = f"{topic.replace(' ', '_').lower()}_{kind}" if topic else f"landscape_{kind}"
+        export_rows(store, kind, name, args.format, topic=topic)
+
+    else:
+        print("\n[!] Invalid option selected")
+        return
+
+    print_run_stats(llm, args.workers)
+
+def add_run_options(parser: argparse.ArgumentParser, defaults: bool = True):
+    """
+    Model, budget and output options. They are added to the main parser and
+    to every command, so they work before or after the command name.
+
+    Args:
+        parser: Parser to add the options to
+        defaults: False for commands: an option not given after the command
+                  must not overwrite the value given before it
+    """
+    def default(value):
+        return value if defaults else argparse.SUPPRESS
+
+    parser.add_argument("--config", metavar="FILE", default=default(None),
+                        help="JSON file with default option values")
+    parser.add_argument("--model", default=default(None),
+                        help=f"Model name or '{AUTO_MODEL}' (default: GEMINI_MODEL, "
+                             f"else {DEFAULT_MODELS[0]} when a command is given)")
+    parser.add_argument("--rpm", type=float, default=default(None),
+                        help="Requests per minute budget (overrides GEMINI_RPM)")
+    parser.add_argument("--tpm", type=float, default=default(None),
+                        help="Tokens per minute budget (overrides GEMINI_TPM)")
+    parser.add_argument("--rpd", type=int, default=default(None),
+                        help="Requests per day budget (overrides GEMINI_RPD)")
+    parser.add_argument("--workers", type=int, default=default(WORKER_PROCESSES),
+                        help="Worker processes for bulk refreshes (default: WORKER_PROCESSES)")
+    parser.add_argument("--batch-size", type=int, default=default(EXTRACT_BATCH_SIZE),
+                        help="Vendors per extraction request (default: EXTRACT_BATCH_SIZE)")
+    parser.add_argument("--crawl-pages", type=int, default=default(CRAWL_MAX_PAGES),
+                        help="Pages fetched per vendor (default: CRAWL_MAX_PAGES)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=default(LANDSCAPE_EXPORT_FORMAT),
+                        help="Export format (default: LANDSCAPE_EXPORT_FORMAT)")
+    parser.add_argument("--no-cache", action="store_true", default=default(LLM_CACHE_BYPASS),
+                        help="Bypass the LLM response cache")
+
+def build_parser():
+    """
+    Returns:
+        (parser, {command: subparser})
+    """
+    parser = argparse.ArgumentParser(
+        description="Gemini market research tool. Without a command the interactive menu is shown.",
+        epilog="Options can also be set in a JSON file passed with --config, using the long option names "
+               "as keys, e.g. {\"model\": \"gemini-2.5-flash-lite\", \"rpm\": 300, \"features\": [\"SSO\"]}. "
+               "Command-line flags take precedence.")
+    add_run_options(parser)
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Resume a bulk update or enrichment run, retrying only unfinished vendors")
+    parser.add_argument("--list-runs", action="store_true", help="List recent runs and exit")
+
+    commands = {}
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    cmd = subparsers.add_parser("taxonomy", help="Build and store a market taxonomy")
+    cmd.add_argument("topic", help="Market topic, e.g. 'ERP solutions'")
+    commands["taxonomy"] = cmd
+
+    cmd = subparsers.add_parser("discover", help="Build a taxonomy and search for the market's players")
+    cmd.add_argument("topic", help="Market topic, e.g. 'ERP solutions'")
+    cmd.add_argument("--shard", action="store_true", help="Search each division and sub-division separately")
+    cmd.add_argument("--enrich", action="store_true", help="Scrape and analyze each player as it is found")
+    cmd.add_argument("--reuse-taxonomy", action="store_true", help="Use the stored taxonomy for the topic if any")
+    cmd.add_argument("--features", nargs="+", help="Features to check (default: the taxonomy's suggestions)")
+    commands["discover"] = cmd
+
+    cmd = subparsers.add_parser("update", help="Scrape and analyze one company")
+    cmd.add_argument("url", help="Company product URL")
+    cmd.add_argument("--features", nargs="+", help="Features to check")
+    commands["update"] = cmd
+
+    cmd = subparsers.add_parser("refresh", help="Journaled bulk update from a competitors CSV or URL list")
+    cmd.add_argument("file", help="Competitors CSV or URL list file")
+    cmd.add_argument("--features", nargs="+", help="Features to check")
+    cmd.add_argument("--offline", action="store_true", help="Use a Gemini batch job (for large landscapes)")
+    commands["refresh"] = cmd
+
+    cmd = subparsers.add_parser("export", help="Export the stored landscape")
+    cmd.add_argument("kind", choices=EXPORT_KINDS)
+    cmd.add_argument("--topic", help="Only this market topic")
+    commands["export"] = cmd
+
+    for cmd in commands.values():
+        add_run_options(cmd, defaults=False)
+    return parser, commands
+
+def load_config(path: str) -> dict:
+    """Option defaults from a JSON config file, keyed by long option name."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    return {key.replace('-', '_'): value for key, value in config.items()}
+
+def parse_args(argv=None):
+    parser, commands = build_parser()
+    args = parser.parse_args(argv)
+    if args.config:
+        try:
+            config = load_config(args.config)
+        except (OSError, ValueError) as e:
+            parser.error(f"could not load --config {args.config}: {e}")
+        # Config values become defaults, so flags given on the command line still win
+        known = {action.dest for p in [parser, *commands.values()] for action in p._actions} - {"help", "config"}
+        unknown = sorted(set(config) - known)
+        if unknown:
+            parser.error(f"unknown option(s) in {args.config}: {', '.join(unknown)}")
+        top = {action.dest for action in parser._actions}
+        parser.set_defaults(**{k: v for k, v in config.items() if k in top})
+        for p in commands.values():
+            # Run options stay on the main parser (see add_run_options)
+            p.set_defaults(**{k: v for k, v in config.items() if k in {a.dest for a in p._actions} - top})
+        args = parser.parse_args(argv)
+    return args
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Only some commands take --features; the menu uses its own defaults
+    if not hasattr(args, "features"):
+        args.features = None
+
+    # Model and budgets are fixed before any client or limiter is created
+    if args.model:
+        os.environ['GEMINI_MODEL'] = args.model
+    for name in ("rpm", "tpm", "rpd"):
+        if getattr(args, name) is not None:
+            os.environ[f'GEMINI_{name.upper()}'] = str(getattr(args, name))
+
+    if args.list_runs:
+        for run in RunJournal.list_runs(LANDSCAPE_DB_PATH):
+            started = time.strftime('%Y-%m-%d %H:%M', time.localtime(run['created_at']))
+            print(f"{run['run_id']}  {run['kind']:<10} {run['status']:<12} {started}  {run['items']}")
+        return 0
+
+    if args.command is None and not args.resume:
+        run_menu(args)
+        return 0
+    return run_command(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import time
+
+import pytest
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.time; sleep() advances it instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "time", clock)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
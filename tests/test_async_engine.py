@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from core.async_engine import AsyncLLMEngine
+from core.cache import LLMCache
+from core.retry import RetryPolicy
+from models.schemas import Competitor
+
+FEATURES = ["SSO"]
+PAGE = "Partial Inc page: pricing is hidden."
+
+
+def partial_product() -> dict:
+    return {"company_name": "Partial Inc", "product_name": "Partial Cloud", "description": "Partial description",
+            "features": ["SSO"], "feature_flags": {"SSO": True}, "case_study_desc": None,
+            "case_study_link": None, "is_case_study_present": False, "notes": ""}
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class _AsyncModels:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content(self, model, contents, config=None):
+        self.prompts.append(contents)
+        if "Some entries of a previous answer" in contents:
+            return _Response(json.dumps([{"company_name": "Beta", "product_name": "Beta App",
+                                          "official_website_url": "https://beta.example"}]))
+        if "A previous answer was incomplete" in contents:
+            return _Response(json.dumps({"pricing_desc": "Free tier", "pricing_tiers": ["Free"]}))
+        return _Response(json.dumps(partial_product()))
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.aio = type("Aio", (), {})()
+        self.aio.models = _AsyncModels()
+
+
+@pytest.fixture
+def engine(tmp_path, clock, monkeypatch):
+    async def fake_sleep(seconds):
+        clock.sleep(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    client = FakeAsyncClient()
+    llm = AsyncLLMEngine(client, "gemini-2.5-flash-lite", cache=LLMCache(str(tmp_path / "cache.sqlite")),
+                         retry_policy=RetryPolicy(max_attempts=1))
+    return client, llm
+
+
+def test_extraction_is_repaired_and_the_repaired_record_cached(engine):
+    client, llm = engine
+
+    first = asyncio.run(llm.extract_product_data(PAGE, FEATURES))
+    assert first["pricing_tiers"] == ["Free"]
+    assert len(client.aio.models.prompts) == 2
+
+    assert asyncio.run(llm.extract_product_data(PAGE, FEATURES)) == first
+    assert len(client.aio.models.prompts) == 2
+    stats = llm.validation_stats.as_dict()
+    assert (stats["repair_calls"], stats["repaired"]) == (1, 1)
+
+
+def test_validate_records_repairs_keyed_records_in_one_request(engine):
+    client, llm = engine
+    records = [
+        {"company_name": "Alpha", "product_name": "Alpha App", "official_website_url": "https://alpha.example"},
+        {"company_name": "Beta", "product_name": "Beta App"},
+        {"product_name": "Nameless"},
+    ]
+
+    results = asyncio.run(llm.validate_records(Competitor, records, "Find competitors", None, "search_and_analyze"))
+
+    assert [r["company_name"] for r in results] == ["Alpha", "Beta"]
+    assert len(client.aio.models.prompts) == 1
+    stats = llm.validation_stats.as_dict()
+    assert (stats["validated"], stats["repaired"], stats["unrepaired"]) == (1, 1, 1)
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from core.batch import BatchBackend, LocalBatchBackend, OfflineBatch
+from core.cache import LLMCache, make_cache_key
+from core.llm_handler import LLMEngine
+from core.retry import RetryPolicy
+
+FEATURES = ["SSO", "API access"]
+
+
+def product_record(name: str, **overrides) -> dict:
+    record = {"company_name": name, "product_name": f"{name} Cloud", "description": f"{name} description",
+              "features": ["SSO"], "feature_flags": {"SSO": True, "API access": False},
+              "case_study_desc": None, "case_study_link": None, "is_case_study_present": False,
+              "pricing_desc": "Per seat", "pricing_tiers": ["Team", "Enterprise"], "notes": ""}
+    record.update(overrides)
+    return record
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class _Models:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, model, contents, config=None):
+        self.prompts.append(contents)
+        if "A previous answer was incomplete" in contents:
+            # Repair request: only the fields that failed validation
+            return _Response(json.dumps({"pricing_desc": "Free tier", "pricing_tiers": ["Free"]}))
+        if "Broken Inc" in contents:
+            raise RuntimeError("500 INTERNAL")
+        if "Partial Inc" in contents:
+            record = product_record("Partial Inc")
+            del record["pricing_desc"], record["pricing_tiers"]
+            return _Response(json.dumps(record))
+        return _Response(json.dumps(product_record("Good Inc")))
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = _Models()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    client = FakeClient()
+    llm = LLMEngine(client, "gemini-2.5-flash-lite", cache=LLMCache(str(tmp_path / "cache.sqlite")),
+                    retry_policy=RetryPolicy(max_attempts=1))
+    return client, llm
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        BatchBackend()
+
+
+def test_offline_batch_merges_cache_hits_errors_and_repairs(engine, tmp_path):
+    client, llm = engine
+    batch = OfflineBatch(llm, LocalBatchBackend(client), str(tmp_path / "spool"), poll_interval=0)
+    pages = {
+        "cached": "Cached Inc page: SSO everywhere.",
+        "good": "Good Inc page: API access and SSO.",
+        "failed": "Broken Inc page: nothing here.",
+        "invalid": "Partial Inc page: pricing is hidden.",
+    }
+    for key, text in pages.items():
+        batch.add_extraction(key, text, FEATURES)
+
+    # The cached key is answered locally and never submitted
+    prompt, config = llm.build_extract_request(pages["cached"], FEATURES)
+    llm.cache.put(make_cache_key(llm.cache_model("extract_product_data"), prompt, config),
+                  json.dumps(product_record("Cached Inc")), "extract_product_data")
+
+    results, errors = batch.run()
+
+    assert set(results) == {"cached", "good", "invalid"}
+    assert results["cached"]["company_name"] == "Cached Inc"
+    assert results["good"]["company_name"] == "Good Inc"
+    assert set(errors) == {"failed"}
+    assert "500 INTERNAL" in str(errors["failed"])
+    # The invalid record got its missing fields from one online repair call
+    assert results["invalid"]["pricing_tiers"] == ["Free"]
+    assert llm.validation_stats.as_dict()["repaired"] == 1
+
+    submitted = [p for p in client.models.prompts if "A previous answer" not in p]
+    assert not any("Cached Inc" in p for p in submitted)
+    assert len(submitted) == 3
+
+    # Batch results are cached under the keys online calls use
+    assert llm.extract_product_data(pages["good"], FEATURES)["company_name"] == "Good Inc"
+    assert len(client.models.prompts) == 4
+    assert len(batch) == 0
+
+    # The repaired record is what was cached, so a re-run needs no repair
+    assert llm.extract_product_data(pages["invalid"], FEATURES)["pricing_tiers"] == ["Free"]
+    assert len(client.models.prompts) == 4
+    assert llm.validation_stats.as_dict()["repair_calls"] == 1
+
+
+def test_online_extraction_caches_only_validated_records(engine):
+    client, llm = engine
+    page = "Partial Inc page: pricing is hidden."
+
+    first = llm.extract_product_data(page, FEATURES)
+    assert first["pricing_tiers"] == ["Free"]
+    assert len(client.models.prompts) == 2
+
+    assert llm.extract_product_data(page, FEATURES) == first
+    assert len(client.models.prompts) == 2
+    assert llm.validation_stats.as_dict()["repair_calls"] == 1
+
+
+def test_extract_products_batch_reuses_per_vendor_cache(engine, clock):
+    client, llm = engine
+    pages = {"good": "Good Inc page: API access and SSO.", "invalid": "Partial Inc page: pricing is hidden."}
+
+    products, errors = llm.extract_products_batch(pages, FEATURES)
+    assert not errors
+    assert products["invalid"]["pricing_tiers"] == ["Free"]
+    calls = len(client.models.prompts)
+
+    assert llm.extract_products_batch(pages, FEATURES) == (products, {})
+    assert len(client.models.prompts) == calls
@@ -0,0 +1,49 @@
+from core.context import SEPARATOR, pack_context, split_passages
+from core.rate_limiter import estimate_tokens
+
+FEATURES = ["Single sign-on", "Webhooks"]
+OPENING = "Acme CRM is the customer platform built by Acme Inc for growing sales teams."
+FILLER = [f"Our team met at conference number {i} and talked about the weather and the venue." for i in range(60)]
+PRICING = "Pricing: the Pro plan costs $49 per user per month, billed annually."
+FEATURE = "Single sign-on and webhooks are included in every plan."
+
+
+def page(*middle: str) -> str:
+    return " ".join([OPENING, *FILLER[:30], *middle, *FILLER[30:]])
+
+
+def test_short_pages_are_returned_unchanged():
+    text = f"{OPENING} {PRICING}"
+    assert pack_context(text, FEATURES, token_budget=100) == text
+
+
+def test_packing_keeps_the_opening_and_relevant_passages_within_budget():
+    packed = pack_context(page(PRICING, FEATURE), FEATURES, token_budget=150, passage_chars=120)
+    assert estimate_tokens(packed) <= 150
+    assert packed.startswith(OPENING)
+    assert PRICING in packed and FEATURE in packed
+    # Passages stay in page order
+    assert packed.index(PRICING) < packed.index(FEATURE)
+
+
+def test_repeated_passages_are_packed_once():
+    packed = pack_context(page(PRICING, *[FILLER[0]] * 20), FEATURES, token_budget=200, passage_chars=80)
+    assert packed.split(SEPARATOR).count(FILLER[0]) <= 1
+
+
+def test_a_long_unpunctuated_opening_still_leaves_room_for_the_rest():
+    text = f"{'Acme ' + 'word ' * 400}. {' '.join(FILLER)} {PRICING}"
+    packed = pack_context(text, FEATURES, token_budget=60, passage_chars=100)
+    assert estimate_tokens(packed) <= 60
+    # Only the first slice of the opening run is kept, next to the pricing passage
+    assert packed.startswith("Acme word") and packed.endswith(PRICING)
+
+
+def test_falls_back_to_truncation_when_no_passage_fits():
+    text = "x" * 4000
+    assert pack_context(text, FEATURES, token_budget=50) == text[:200]
+
+
+def test_long_unpunctuated_runs_are_split():
+    passages = split_passages("word " * 300, target_chars=100)
+    assert len(passages) > 5 and all(len(p) <= 200 for p in passages)
@@ -0,0 +1,95 @@
+from core.crawler import MAX_SITEMAPS, SiteCrawler, categorize
+
+START = "https://acme.com/crm"
+WORDS = ["pipelines", "seats", "tickets", "reports", "webhooks", "stories", "invoices", "teams"]
+
+
+class FakeResult:
+    def __init__(self, content, truncated):
+        self.content = content
+        self.bytes_downloaded = len(content)
+        self.truncated = truncated
+        self.not_modified = False
+        self.text = None
+
+
+class FakeFetcher:
+    """Serves fixed bodies and honours the per-call byte cap like HttpFetcher."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.calls = []
+
+    def fetch(self, url, max_bytes=None):
+        self.calls.append((url, max_bytes))
+        if url not in self.bodies:
+            raise IOError(f"404 for {url}")
+        body = self.bodies[url]
+        cap = len(body) if max_bytes is None else max_bytes
+        return FakeResult(body[:cap], len(body) > cap)
+
+    def save_text(self, url, text):
+        pass
+
+
+def html(title, links=(), size=1000):
+    """A page of about `size` bytes whose text differs from every other title's."""
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    words = " ".join(WORDS[(len(title) + i) % len(WORDS)] + title for i in range(size // 12))
+    return f"<html><body><h1>{title}</h1>{anchors}<p>{words}</p></body></html>".encode()[:size].ljust(size)
+
+
+def site(*paths, sitemap=None):
+    bodies = {START: html("start", paths)}
+    for path in paths:
+        bodies[f"https://acme.com{path}"] = html(path.strip("/"))
+    if sitemap is not None:
+        bodies["https://acme.com/sitemap.xml"] = sitemap
+    return bodies
+
+
+def test_candidates_cover_each_category_first():
+    crawler = SiteCrawler(FakeFetcher({}))
+    links = ["https://acme.com/pricing", "https://acme.com/pricing/enterprise", "https://other.com/pricing",
+             "https://acme.com/crm/", "https://acme.com/features", "https://acme.com/logo.png",
+             "https://acme.com/customers", "https://acme.com/blog/post"]
+    assert crawler.select_candidates(START, links, 3) == [
+        "https://acme.com/pricing", "https://acme.com/features", "https://acme.com/customers"]
+    assert crawler.select_candidates(START, links, 10)[-1] == "https://acme.com/pricing/enterprise"
+    assert categorize("https://acme.com/customer-stories/acme") == (2, "customers")
+
+
+def test_downloads_are_capped_by_the_remaining_budget():
+    fetcher = FakeFetcher(site("/pricing", "/features", "/customers"))
+    crawler = SiteCrawler(fetcher, max_pages=4, max_bytes=2500, workers=1, use_sitemap=False)
+    result = crawler.crawl(START)
+
+    assert [url for url, _ in result.pages] == [START, "https://acme.com/pricing"]
+    assert result.bytes_fetched == 2500
+    # /features was cut off at the 500 bytes left and dropped; /customers was never requested
+    assert fetcher.calls == [(START, 2500), ("https://acme.com/pricing", 1500),
+                             ("https://acme.com/features", 500)]
+
+
+def test_sitemaps_count_against_the_budget_and_are_limited():
+    nested = "".join(f"<loc>https://acme.com/sitemap-{i}.xml</loc>" for i in range(5))
+    bodies = site("/pricing", sitemap=f"<urlset>{nested}<loc>https://acme.com/features</loc></urlset>".encode())
+    bodies["https://acme.com/features"] = html("features")
+    for i in range(5):
+        bodies[f"https://acme.com/sitemap-{i}.xml"] = b"<urlset></urlset>"
+    fetcher = FakeFetcher(bodies)
+    crawler = SiteCrawler(fetcher, max_pages=3, max_bytes=10_000, workers=1)
+    result = crawler.crawl(START)
+
+    sitemaps = [url for url, _ in fetcher.calls if url.endswith(".xml")]
+    assert len(sitemaps) == MAX_SITEMAPS
+    assert result.bytes_fetched == sum(len(bodies[url]) for url, _ in fetcher.calls)
+    assert [url for url, _ in result.pages][1:] == ["https://acme.com/pricing", "https://acme.com/features"]
+
+
+def test_failed_and_duplicate_pages_are_skipped():
+    bodies = site("/pricing", "/features", "/customers")
+    bodies["https://acme.com/features"] = bodies["https://acme.com/pricing"]
+    del bodies["https://acme.com/customers"]
+    crawler = SiteCrawler(FakeFetcher(bodies), max_pages=4, use_sitemap=False)
+    assert [url for url, _ in crawler.crawl(START).pages] == [START, "https://acme.com/pricing"]
@@ -0,0 +1,32 @@
+from core.discovery import CompetitorIndex, url_key
+
+
+def competitor(company, product, url):
+    return {"company_name": company, "product_name": product, "official_website_url": url}
+
+
+def test_vendors_sharing_a_host_and_generic_product_names_stay_apart():
+    index = CompetitorIndex()
+    for i in range(6):
+        assert index.add(competitor(f"Vendor {i}", f"Product {i}", f"http://127.0.0.1:8000/vendor-{i}/"), "a")
+    # The same vendors found again by another shard are merged
+    for i in range(6):
+        assert not index.add(competitor(f"Vendor {i}", f"Product {i}", f"http://127.0.0.1:8000/vendor-{i}"), "b")
+    assert [c["product_name"] for c in index.competitors()] == [f"Product {i}" for i in range(6)]
+    assert all(c["divisions"] == ["a", "b"] for c in index.competitors())
+
+
+def test_products_of_one_company_are_compared_without_its_name():
+    index = CompetitorIndex()
+    assert index.add(competitor("Acme Inc", "Acme CRM", "https://acme.com/crm"))
+    assert index.add(competitor("Acme Inc", "Acme Helpdesk", "https://acme.com/helpdesk"))
+    assert not index.add(competitor("Acme", "CRM", "https://www.acme.com/products/crm"))
+    assert not index.add(competitor("Acme Inc.", "Acme CRM", "https://acme.de/crm"))
+    assert len(index) == 2
+
+
+def test_only_known_locales_are_stripped_from_url_keys():
+    assert url_key("https://www.acme.com/de/crm/") == "acme.com/crm"
+    assert url_key("https://acme.com/en-us/crm/index.html") == "acme.com/crm"
+    assert url_key("https://acme.com/hr") == "acme.com/hr"
+    assert url_key("https://acme.com/ai/agents") == "acme.com/ai/agents"
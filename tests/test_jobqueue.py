@@ -0,0 +1,60 @@
+from core.jobqueue import JOB_EXTRACT, JOB_FAILED, JOB_QUEUED, JOB_SCRAPE, JobQueue
+
+URLS = ["https://a.com", "https://b.com", "https://c.com"]
+
+
+def test_each_job_is_claimed_once_extractions_first(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    queue, other_process = JobQueue(path), JobQueue(path)
+    queue.enqueue_many("run", JOB_SCRAPE, URLS, {"features": ["SSO"]})
+
+    first = queue.claim("run", "w1")
+    assert [(j.kind, j.url, j.payload, j.attempts) for j in first] == [(JOB_SCRAPE, URLS[0], {"features": ["SSO"]}, 1)]
+    # A finished scrape queues its extraction, which goes ahead of the remaining scrapes
+    queue.finish(first[0], follow_up={"kind": JOB_EXTRACT, "payload": {"text": "page"}})
+    second = other_process.claim("run", "w2")
+    assert [(j.kind, j.url, j.payload) for j in second] == [(JOB_EXTRACT, URLS[0], {"text": "page"})]
+    assert [j.url for j in other_process.claim("run", "w2")] == [URLS[1]]
+    assert queue.claim("other-run", "w1") == []
+    queue.close()
+    other_process.close()
+
+
+def test_queued_extractions_are_claimed_as_a_batch(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    queue.enqueue_many("run", JOB_EXTRACT, URLS)
+    queue.enqueue_many("run", JOB_SCRAPE, ["https://d.com"])
+    assert [j.url for j in queue.claim("run", "w1", batch_size=2)] == URLS[:2]
+    assert [j.url for j in queue.claim("run", "w1", batch_size=2)] == URLS[2:]
+    # Scrapes are never batched
+    queue.enqueue_many("run", JOB_SCRAPE, ["https://e.com"])
+    assert len(queue.claim("run", "w1", batch_size=2)) == 1
+    queue.close()
+
+
+def test_dead_worker_jobs_are_requeued_until_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    queue.enqueue_many("run", JOB_SCRAPE, URLS[:1])
+    for attempt in range(1, 3):
+        assert queue.claim("run", f"w{attempt}")[0].attempts == attempt
+        assert queue.requeue_worker("run", f"w{attempt}", max_attempts=3) == 1
+        assert queue.counts("run") == {JOB_QUEUED: 1}
+
+    queue.claim("run", "w3")
+    assert queue.requeue_worker("run", "w3", max_attempts=3) == 0
+    assert queue.counts("run") == {JOB_FAILED: 1}
+    [row] = queue.take_results("run")
+    assert row["status"] == "scrape_failed" and "died 3 times" in row["error"]
+    queue.close()
+
+
+def test_results_are_reported_once(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    queue.enqueue_many("run", JOB_SCRAPE, URLS[:2])
+    for job in queue.claim("run", "w1") + queue.claim("run", "w1"):
+        queue.finish(job, {"url": job.url, "status": "ok"})
+    assert [r["url"] for r in queue.take_results("run")] == URLS[:2]
+    assert queue.take_results("run") == []
+    queue.purge("run")
+    assert queue.counts("run") == {}
+    queue.close()
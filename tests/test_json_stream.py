@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from core.json_stream import JSONObjectStreamParser, parse_json_objects
+
+RECORDS = [
+    {"company_name": "Acme {Labs}", "product_name": "Acme \"CRM\"", "official_website_url": "https://acme.com"},
+    {"company_name": "Beta", "product_name": "Beta Desk", "tags": ["a]", "{b"], "nested": {"x": [1, 2]}},
+]
+TEXT = f"Here are the players [1]:\n```json\n{json.dumps(RECORDS, indent=2)}\n```\nIt's a crowded market."
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, len(TEXT)])
+def test_objects_are_emitted_as_soon_as_they_close(chunk_size):
+    parser = JSONObjectStreamParser()
+    seen = []
+    for start in range(0, len(TEXT), chunk_size):
+        seen.extend(parser.feed(TEXT[start:start + chunk_size]))
+    assert seen == RECORDS
+    assert parser.finish() == [] and parser.emitted == 2
+
+
+def test_first_object_is_available_before_the_stream_ends():
+    parser = JSONObjectStreamParser()
+    first_end = TEXT.index("}", TEXT.index("Acme \\\"CRM\\\"")) + 1
+    assert parser.feed(TEXT[:first_end]) == RECORDS[:1]
+
+
+def test_truncated_stream_recovers_the_complete_members():
+    text = json.dumps(RECORDS)
+    cut = text.index('"tags"') + len('"tags": ["a]", "{')
+    # The cut-off list keeps its complete items; the partial string is dropped
+    assert parse_json_objects(text[:cut]) == [
+        RECORDS[0], {"company_name": "Beta", "product_name": "Beta Desk", "tags": ["a]"]}]
+
+
+def test_unrecoverable_tail_and_malformed_objects_are_dropped():
+    assert parse_json_objects('{"company_name": "Acme"} {"broken": tru} {"company_name": "Be') == [
+        {"company_name": "Acme"}]
+    assert parse_json_objects("No JSON here, just [1] citations.") == []
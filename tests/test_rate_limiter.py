@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from core.rate_limiter import RateLimiter, SharedRateLimiter, TokenBucket
+
+
+def test_bucket_reports_the_deficit_as_a_wait():
+    bucket = TokenBucket(capacity=2, rate=0.5)
+    start = bucket._updated
+    assert bucket.reserve(2, now=start) == 0.0
+    assert bucket.reserve(1, now=start) == pytest.approx(2.0)
+    assert bucket.peek(1, now=start + 4.0) == 0.0
+    # Refill never goes above capacity
+    assert bucket.peek(3, now=start + 100.0) == pytest.approx(2.0)
+
+
+def test_burst_then_full_sustained_rate(clock):
+    limiter = RateLimiter(rpm=60, burst_fraction=0.2)
+    assert [limiter.acquire() for _ in range(12)] == [0.0] * 12
+    assert limiter.acquire() == pytest.approx(1.0)
+    assert clock.slept == [pytest.approx(1.0)]
+
+    # Once the burst is spent, calls spaced at the configured RPM never wait
+    for _ in range(120):
+        clock.now += 1.0
+        assert limiter.acquire() == 0.0
+    assert limiter.total_requests == 133
+
+
+def test_tokens_per_minute_bucket_blocks_and_is_corrected(clock):
+    limiter = RateLimiter(rpm=1000, tpm=6000, burst_fraction=0.5)
+    assert limiter.acquire(tokens=3000) == 0.0
+    assert limiter.time_until_available(tokens=1000) == pytest.approx(10.0)
+    # The call used fewer tokens than estimated; the difference is returned
+    limiter.record_usage(3000, 1000)
+    assert limiter.time_until_available(tokens=1000) == 0.0
+    assert limiter.total_tokens == 1000
+
+
+def test_async_acquire_waits_without_blocking(clock, monkeypatch):
+    waited = []
+
+    async def fake_sleep(seconds):
+        waited.append(seconds)
+
+    async def two_calls(limiter):
+        return [await limiter.acquire_async(), await limiter.acquire_async()]
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    limiter = RateLimiter(rpm=60, burst_fraction=1 / 60)
+    assert asyncio.run(two_calls(limiter)) == [0.0, pytest.approx(1.0)]
+    assert waited == [pytest.approx(1.0)] and clock.slept == []
+
+
+def test_shared_limiter_splits_one_budget_between_instances(clock, tmp_path):
+    ledger = str(tmp_path / "quota.sqlite")
+    first = SharedRateLimiter(ledger, rpm=60, name="model")
+    second = SharedRateLimiter(ledger, rpm=60, name="model")
+    other_model = SharedRateLimiter(ledger, rpm=60, name="other")
+
+    waits = [limiter.acquire() for _ in range(6) for limiter in (first, second)]
+    assert waits == [0.0] * 12
+    assert second.time_until_available() == pytest.approx(1.0)
+    assert other_model.time_until_available() == 0.0
+
+    clock.now += 2.0
+    assert first.acquire() == 0.0
+    assert second.acquire() == 0.0
+    assert first.acquire() == pytest.approx(1.0)
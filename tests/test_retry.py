@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from core.retry import (DAILY_QUOTA, FATAL, RATE_LIMITED, UNAVAILABLE, CircuitBreaker, DailyQuotaExceeded,
+                        RetryExhausted, RetryPolicy, classify_error, parse_retry_delay)
+
+
+class Flaky:
+    """Callable failing with the given errors before returning "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.mark.parametrize("message, kind", [
+    ("429 RESOURCE_EXHAUSTED. Quota exceeded for metric generate_requests_per_minute", RATE_LIMITED),
+    ("429 RESOURCE_EXHAUSTED. Quota exceeded: GenerateRequestsPerDayPerProjectPerModel", DAILY_QUOTA),
+    ("503 UNAVAILABLE. The model is overloaded.", UNAVAILABLE),
+    ("500 INTERNAL", UNAVAILABLE),
+    ("400 INVALID_ARGUMENT. Request contains an invalid argument.", FATAL),
+    ("could not parse response", FATAL),
+])
+def test_classify_error(message, kind):
+    assert classify_error(Exception(message)) == kind
+
+
+def test_parse_retry_delay():
+    assert parse_retry_delay(Exception("'retryDelay': '37s'")) == 37.0
+    assert parse_retry_delay(Exception("Please retry in 12.5s.")) == 12.5
+    assert parse_retry_delay(Exception("503 UNAVAILABLE")) is None
+
+
+def test_transient_errors_are_retried_with_the_servers_delay(clock):
+    policy = RetryPolicy(max_attempts=3, max_delay=60)
+    fn = Flaky(Exception("503 UNAVAILABLE"), Exception("429 RESOURCE_EXHAUSTED 'retryDelay': '20s'"))
+    assert policy.call(fn) == "ok"
+    assert fn.calls == 3
+    assert 20.0 <= clock.slept[1] <= 21.0
+    assert policy.stats.as_dict()["errors"] == {UNAVAILABLE: 1, RATE_LIMITED: 1}
+
+
+def test_fatal_and_daily_quota_errors_are_not_retried(clock):
+    policy = RetryPolicy()
+    with pytest.raises(ValueError):
+        policy.call(Flaky(ValueError("400 INVALID_ARGUMENT")))
+    with pytest.raises(DailyQuotaExceeded):
+        policy.call(Flaky(Exception("429 RESOURCE_EXHAUSTED quota per day")))
+    assert clock.slept == []
+
+
+def test_retries_stop_at_max_attempts_and_total_sleep(clock):
+    fn = Flaky(*[Exception("503 UNAVAILABLE")] * 10)
+    with pytest.raises(RetryExhausted):
+        RetryPolicy(max_attempts=3).call(fn)
+    assert fn.calls == 3
+
+    fn = Flaky(*[Exception("429 RESOURCE_EXHAUSTED 'retryDelay': '50s'")] * 10)
+    with pytest.raises(RetryExhausted):
+        RetryPolicy(max_attempts=10, max_total_sleep=100).call(fn)
+    assert fn.calls == 2
+
+
+def test_async_call_retries_without_blocking(clock, monkeypatch):
+    waited = []
+    errors = [Exception("503 UNAVAILABLE")]
+
+    async def fake_sleep(seconds):
+        waited.append(seconds)
+
+    async def flaky():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    assert asyncio.run(RetryPolicy().call_async(flaky)) == "ok"
+    assert len(waited) == 1 and clock.slept == []
+
+
+def test_breaker_opens_then_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.is_open()
+    assert breaker.time_until_allowed() == pytest.approx(30)
+
+    clock.now += 30
+    assert not breaker.is_open()
+    assert breaker.time_until_allowed() == 0.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time while half-open
+    assert breaker.time_until_allowed() == 1.0
+
+    # A failed probe re-opens immediately; a successful one closes
+    breaker.record_failure()
+    assert breaker.is_open()
+    clock.now += 30
+    assert breaker.time_until_allowed() == 0.0
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.time_until_allowed() == 0.0
+
+
+def test_policy_waits_for_an_open_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    policy = RetryPolicy(breaker=breaker, base_delay=1, max_delay=1)
+    fn = Flaky(Exception("503 UNAVAILABLE"))
+    assert policy.call(fn) == "ok"
+    # The failure opened the breaker, so the retry waited out the reset timeout
+    assert sum(clock.slept) == pytest.approx(30)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    with pytest.raises(RetryExhausted):
+        RetryPolicy(breaker=breaker, max_total_sleep=10).call(Flaky())
@@ -0,0 +1,87 @@
+import pytest
+
+from core import config
+from core.config import get_rate_limiter
+from core.llm_handler import LLMEngine
+from core.retry import DailyQuotaExceeded
+from core.router import ModelRouter
+
+MODELS = ["model-a", "model-b"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    # Limiters and breakers are process-wide; give every test its own
+    monkeypatch.setattr(config, "_limiters", {})
+    monkeypatch.setattr(config, "_breakers", {})
+    monkeypatch.setenv("GEMINI_RPM", "600")
+
+
+def router():
+    return ModelRouter(MODELS, {"extract": ["model-b", "model-a"]})
+
+
+def failing_on(model, message):
+    def call_model(m):
+        if m == model:
+            raise Exception(message)
+        return m
+    return call_model
+
+
+def test_task_preferences_come_first():
+    assert router().candidates("extract") == ["model-b", "model-a"]
+    assert router().candidates("other") == MODELS
+    assert router().primary("extract") == "model-b"
+
+
+def test_rate_limited_model_fails_over_and_cools_down():
+    r = router()
+    assert r.call("extract", 100, failing_on("model-b", "429 RESOURCE_EXHAUSTED 'retryDelay': '30s'")) == "model-a"
+    assert r.failovers == 1
+    assert not r.is_available("model-b")
+    assert r.choose("extract") == "model-a"
+
+
+def test_model_without_free_budget_is_skipped():
+    limiter = get_rate_limiter("model-b")
+    while limiter.time_until_available() == 0:
+        limiter.acquire()
+    assert router().choose("extract") == "model-a"
+
+
+def test_requests_per_day_exhaust_each_model(monkeypatch):
+    monkeypatch.setenv("GEMINI_RPD", "2")
+    r = router()
+    assert [r.call("extract", 0, lambda m: m) for _ in range(4)] == ["model-b", "model-b", "model-a", "model-a"]
+    with pytest.raises(DailyQuotaExceeded):
+        r.call("extract", 0, lambda m: m)
+    assert r.stats()["calls_by_model"] == {"model-b": 2, "model-a": 2}
+
+
+def test_daily_quota_error_takes_the_model_out_for_the_day():
+    r = router()
+    assert r.call("extract", 0, failing_on("model-b", "429 RESOURCE_EXHAUSTED: requests per day")) == "model-a"
+    assert not r.is_available("model-b") and r.stats()["disabled"] == ["model-b"]
+
+
+def test_unknown_model_is_removed_but_other_fatal_errors_raise():
+    r = router()
+    assert r.call("extract", 0, failing_on("model-b", "404 NOT_FOUND: models/model-b")) == "model-a"
+    assert not r.is_available("model-b")
+    with pytest.raises(Exception, match="400 INVALID_ARGUMENT"):
+        r.call("extract", 0, failing_on("model-a", "400 INVALID_ARGUMENT"))
+
+
+def test_every_model_failing_raises_the_last_retryable_error():
+    r = router()
+    with pytest.raises(Exception, match="503"):
+        r.call("extract", 0, lambda m: (_ for _ in ()).throw(Exception(f"503 UNAVAILABLE from {m}")))
+    assert r.failovers == 2
+
+
+def test_routed_engine_has_no_limiter_of_its_own():
+    engine = LLMEngine(object(), config.AUTO_MODEL)
+    assert engine.router is not None and engine.limiter is None
+    assert config.AUTO_MODEL not in config._limiters
+    assert LLMEngine(object(), "model-a").limiter is get_rate_limiter("model-a")
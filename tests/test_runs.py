@@ -0,0 +1,86 @@
+import argparse
+
+import pytest
+
+import main
+from core.runs import RUN_FINISHED, RUN_INCOMPLETE, RUN_INTERRUPTED, RunJournal
+from core.store import LandscapeStore
+
+URLS = ["https://a.com", "https://b.com", "https://c.com"]
+
+
+def test_resumed_run_returns_only_unfinished_items(tmp_path):
+    path = str(tmp_path / "landscape.sqlite")
+    journal = RunJournal(path, kind="refresh", params={"features": ["SSO"]})
+    journal.add_items(URLS)
+    journal.record("https://a.com", "ok")
+    journal.record("https://b.com", "scrape_failed", "timeout")
+    journal.set_param("offline", False)
+    journal.finish(interrupted=True)
+    journal.close()
+
+    resumed = RunJournal.load(path, journal.run_id)
+    assert resumed.params == {"features": ["SSO"], "offline": False}
+    assert resumed.unfinished() == ["https://b.com", "https://c.com"]
+    assert resumed.failures() == {"https://b.com": "timeout"}
+    # Re-queueing known items keeps their state and order
+    resumed.add_items(URLS[::-1])
+    assert resumed.items() == URLS and resumed.summary()["ok"] == 1
+
+    resumed.record("https://b.com", "ok")
+    resumed.finish()
+    assert RunJournal.list_runs(path)[0]["status"] == RUN_INCOMPLETE
+    resumed.record("https://c.com", "unchanged")
+    resumed.finish()
+    runs = RunJournal.list_runs(path)
+    assert runs[0]["status"] == RUN_FINISHED and runs[0]["items"] == {"ok": 2, "unchanged": 1}
+    resumed.close()
+
+
+def test_unknown_run_id_raises_key_error(tmp_path):
+    path = str(tmp_path / "landscape.sqlite")
+    RunJournal(path).close()
+    with pytest.raises(KeyError):
+        RunJournal.load(path, "nope")
+    assert RunJournal.list_runs(str(tmp_path / "missing.sqlite")) == []
+
+
+def test_track_journals_lazy_inputs_as_they_arrive(tmp_path):
+    journal = RunJournal(str(tmp_path / "landscape.sqlite"))
+    stream = journal.track(iter(URLS))
+    assert next(stream) == URLS[0] and journal.items() == URLS[:1]
+    assert list(stream) == URLS[1:] and journal.unfinished() == URLS
+    journal.close()
+
+
+class Creator:
+    def find_competitors_stream(self, topic, divisions):
+        yield {"company_name": "Acme", "product_name": "Acme CRM", "official_website_url": "https://a.com"}
+
+
+class Fetcher:
+    def resolve(self, url):
+        return url
+
+
+def test_interrupted_discovery_is_not_exported(tmp_path, monkeypatch):
+    path = str(tmp_path / "landscape.sqlite")
+    exported = []
+
+    def interrupted_refresh(journal, urls, *args, **kwargs):
+        list(urls)
+        journal.finish(interrupted=True)
+        return None
+
+    monkeypatch.setattr(main, "LANDSCAPE_DB_PATH", path)
+    monkeypatch.setattr(main, "run_refresh", interrupted_refresh)
+    monkeypatch.setattr(main, "export_rows", lambda *args, **kwargs: exported.append(args))
+    store = LandscapeStore(path)
+    args = argparse.Namespace(workers=0, batch_size=1, format="csv")
+    tax = {"divisions": ["CRM"], "sub_divisions": []}
+
+    ok = main.discover(Creator(), Fetcher(), None, store, None, None, "CRM", tax, False, True, ["SSO"], args)
+    assert ok is False
+    assert exported == []
+    assert RunJournal.list_runs(path)[0]["status"] == RUN_INTERRUPTED
+    store.close()
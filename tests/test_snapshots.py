@@ -0,0 +1,54 @@
+from core.snapshots import PageFingerprint, SnapshotStore, diff_products, normalize_text
+
+FEATURES = ["SSO", "API access"]
+TOPICS = ["pipelines", "reminders", "dashboards", "forecasts", "contacts", "campaigns", "tickets", "invoices"]
+PAGE = " ".join(f"Acme CRM keeps your {a} next to your {b} so sales and support teams see the same {a}."
+                for a in TOPICS for b in TOPICS) + " Plans start at $29 per seat."
+
+
+def fingerprint(text):
+    return PageFingerprint.from_text(text)
+
+
+def test_dates_and_cookie_banners_are_noise():
+    noisy = f"Updated 2026-10-17 10:32. {PAGE} We use cookies to improve your visit. © 2019-2026 Acme"
+    earlier = f"Updated 3/4/2025 9:00 am. {PAGE} © 2025 Acme"
+    assert normalize_text(noisy) == normalize_text(earlier)
+    assert fingerprint(noisy).content_hash == fingerprint(earlier).content_hash
+
+
+def test_small_edits_match_but_price_changes_never_do():
+    base = fingerprint(PAGE)
+    assert base.matches(fingerprint(PAGE + " New: dark mode."), threshold=0.9)
+    assert not base.matches(fingerprint(PAGE.replace("$29", "$35")), threshold=0.0)
+    assert not base.matches(fingerprint("A completely different page about invoicing software."))
+
+
+def test_fingerprint_round_trips_through_json():
+    base = fingerprint(PAGE)
+    restored = PageFingerprint.from_json(base.to_json())
+    assert restored.content_hash == base.content_hash and restored.similarity(base) == 1.0
+
+
+def test_store_returns_the_previous_product_only_when_nothing_changed(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    product = {"product_name": "Acme CRM", "pricing_desc": "$29 per seat"}
+    assert store.unchanged_product("https://acme.com", fingerprint(PAGE), FEATURES) is None
+
+    store.save("https://acme.com", fingerprint(PAGE), FEATURES, product)
+    assert store.unchanged_product("https://acme.com", fingerprint(PAGE), list(reversed(FEATURES))) == product
+    assert store.unchanged_product("https://acme.com", fingerprint(PAGE.replace("$29", "$35")), FEATURES) is None
+    # A new feature checklist forces re-extraction
+    assert store.unchanged_product("https://acme.com", fingerprint(PAGE), FEATURES + ["Webhooks"]) is None
+    store.close()
+
+
+def test_diff_products_by_field_type():
+    old = {"pricing_desc": "$29", "features": ["SSO", "API"], "feature_flags": {"SSO": True, "API": False}}
+    new = {"pricing_desc": "$35", "features": ["SSO", "Webhooks"], "feature_flags": {"SSO": True, "API": True}}
+    assert diff_products(old, new) == {
+        "pricing_desc": {"old": "$29", "new": "$35"},
+        "features": {"added": ["Webhooks"], "removed": ["API"]},
+        "feature_flags": {"API": {"old": False, "new": True}},
+    }
+    assert diff_products(old, dict(old)) == {}
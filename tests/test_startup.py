@@ -0,0 +1,35 @@
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported until a command needs them
+DEFERRED_MODULES = ("google.genai", "requests", "bs4", "lxml")
+
+# Median seconds `import main` may take (cumulative, as reported by -X importtime)
+IMPORT_BUDGET_S = float(os.getenv("STARTUP_IMPORT_BUDGET", "0.25"))
+
+
+def import_profile() -> dict:
+    """{module: cumulative seconds} for `import main, core` in a fresh interpreter."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main, core"], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    profile = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        profile[name.strip()] = int(cumulative) / 1e6
+    return profile
+
+
+def test_heavy_modules_are_deferred():
+    loaded = [m for m in import_profile() if any(m == d or m.startswith(d + ".") for d in DEFERRED_MODULES)]
+    assert loaded == []
+
+
+def test_import_time_within_budget():
+    median = statistics.median(import_profile()["main"] for _ in range(5))
+    assert median <= IMPORT_BUDGET_S, f"import main took {median:.3f}s (budget {IMPORT_BUDGET_S:.3f}s)"
@@ -0,0 +1,77 @@
+import json
+import sqlite3
+
+from core.store import LandscapeStore
+
+
+def product(name, pricing="Free"):
+    return {"url": "https://www.acme.com/", "company_name": "Acme Inc", "product_name": name,
+            "description": f"{name} by Acme", "pricing_desc": pricing, "status": "ok"}
+
+
+def test_products_on_one_domain_are_kept_apart(tmp_path):
+    store = LandscapeStore(str(tmp_path / "landscape.sqlite"))
+    assert store.upsert_products([product("Acme CRM"), product("Acme Helpdesk")], "CRM") == 2
+
+    rows = list(store.iter_rows("products"))
+    assert sorted(row["product_name"] for row in rows) == ["Acme CRM", "Acme Helpdesk"]
+    assert store.get_product("https://acme.com", "Acme CRM")["description"] == "Acme CRM by Acme"
+    assert store.get_product("https://acme.com", "Acme Helpdesk")["description"] == "Acme Helpdesk by Acme"
+    # One history row per product, none recording the other product as a change
+    assert len(store.history("https://acme.com", "Acme CRM")) == 1
+    assert len(store.history("https://acme.com", "Acme Helpdesk")) == 1
+
+    # Re-storing an unchanged product writes nothing
+    assert store.upsert_products([product("Acme Helpdesk")]) == 0
+    store.close()
+
+
+def test_locale_like_paths_are_separate_products(tmp_path):
+    store = LandscapeStore(str(tmp_path / "landscape.sqlite"))
+    store.upsert_products([dict(product("Acme HR"), url="https://acme.com/hr"),
+                           dict(product("Acme IT"), url="https://acme.com/it")])
+    assert store.get_product("https://acme.com/hr")["product_name"] == "Acme HR"
+    assert store.get_product("https://acme.com/it")["product_name"] == "Acme IT"
+    store.close()
+
+
+def test_reworded_product_name_updates_the_stored_row(tmp_path):
+    store = LandscapeStore(str(tmp_path / "landscape.sqlite"))
+    store.upsert_products([product("Acme CRM")])
+    assert store.upsert_products([product("Acme CRMs", pricing="$10")]) == 1
+
+    rows = list(store.iter_rows("products"))
+    assert [(row["product_name"], row["pricing_desc"]) for row in rows] == [("Acme CRMs", "$10")]
+    assert len(list(store.iter_rows("history"))) == 2
+    store.close()
+
+
+def test_competitors_on_one_domain_are_kept_apart(tmp_path):
+    store = LandscapeStore(str(tmp_path / "landscape.sqlite"))
+    store.upsert_competitors("CRM", [
+        {"company_name": "Acme", "product_name": "Acme CRM", "official_website_url": "https://acme.com"},
+        {"company_name": "Acme", "product_name": "Acme Helpdesk", "official_website_url": "https://acme.com"},
+    ])
+    assert [c["product_name"] for c in store.competitors("CRM")] == ["Acme CRM", "Acme Helpdesk"]
+    store.close()
+
+
+def test_store_keyed_by_url_only_is_upgraded(tmp_path):
+    path = str(tmp_path / "landscape.sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE products (url_key TEXT PRIMARY KEY, url TEXT NOT NULL, domain TEXT NOT NULL,
+                               topic_key TEXT NOT NULL, data TEXT NOT NULL, extracted_at REAL NOT NULL);
+        CREATE INDEX idx_products_domain ON products(domain);
+    """)
+    old = {k: v for k, v in product("Acme CRM").items() if k not in ("url", "status")}
+    conn.execute("INSERT INTO products VALUES ('acme.com', 'https://acme.com/', 'acme.com', 'crm', ?, 1.0)",
+                 (json.dumps(old, sort_keys=True),))
+    conn.commit()
+    conn.close()
+
+    store = LandscapeStore(path)
+    assert store.get_product("https://acme.com", "Acme CRM") == old
+    assert store.upsert_products([product("Acme Helpdesk")]) == 1
+    assert len(list(store.iter_rows("products"))) == 2
+    store.close()
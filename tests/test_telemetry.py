@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from core.telemetry import Telemetry
+
+PRICES = {"gemini-2.5-flash-lite": (0.10, 0.40)}
+
+
+def record_calls(telemetry):
+    for wall_s in (0.1, 0.2, 0.3, 0.4):
+        telemetry.record("llm", "extract_product_data", wall_s, model="models/gemini-2.5-flash-lite",
+                         prompt_tokens=1000, output_tokens=500, throttle_s=0.05, retries=1)
+    telemetry.record("http", "fetch", 0.5, bytes=2_000_000, cache_hits=0)
+
+
+def test_stats_aggregate_counters_percentiles_and_cost():
+    telemetry = Telemetry(prices=PRICES)
+    record_calls(telemetry)
+    with pytest.raises(ValueError):
+        with telemetry.span("parse", "html", url="https://acme.com") as event:
+            event["bytes"] = 10
+            raise ValueError("bad page")
+
+    stats = {(s["kind"], s["stage"]): s for s in telemetry.stats()}
+    llm = stats[("llm", "extract_product_data")]
+    assert (llm["calls"], llm["prompt_tokens"], llm["output_tokens"], llm["retries"]) == (4, 4000, 2000, 4)
+    assert llm["p50_s"] == 0.3 and llm["p95_s"] == 0.4 and llm["throttle_s"] == pytest.approx(0.2)
+    # 4 calls x (1000 x $0.10 + 500 x $0.40) per 1M tokens
+    assert llm["cost_usd"] == pytest.approx(0.0012)
+    assert stats[("parse", "html")]["errors"] == 1 and stats[("parse", "html")]["bytes"] == 10
+
+
+def test_summary_table_has_one_line_per_stage():
+    assert Telemetry().summary_table() == "No telemetry recorded"
+    telemetry = Telemetry(prices=PRICES)
+    record_calls(telemetry)
+    lines = telemetry.summary_table().splitlines()
+    assert lines[0].split()[:3] == ["Stage", "calls", "err"]
+    assert [line.split()[0] for line in lines[2:]] == ["http:fetch", "llm:extract_product_data"]
+    assert lines[2].split()[1] == "1" and lines[3].split()[1] == "4"
+
+
+def test_prometheus_snapshot(tmp_path):
+    telemetry = Telemetry(prices=PRICES)
+    record_calls(telemetry)
+    path = tmp_path / "metrics" / "landscape.prom"
+    telemetry.write_prometheus(str(path))
+    text = path.read_text()
+
+    assert text.endswith("\n") and not (tmp_path / "metrics" / "landscape.prom.tmp").exists()
+    assert "# TYPE landscape_stage_calls_total counter" in text
+    assert 'landscape_stage_calls_total{kind="llm",stage="extract_product_data"} 4' in text
+    assert 'landscape_stage_bytes_total{kind="http",stage="fetch"} 2000000' in text
+    assert 'landscape_stage_latency_seconds{kind="llm",stage="extract_product_data",quantile="0.95"} 0.4' in text
+    assert 'landscape_stage_latency_seconds_count{kind="http",stage="fetch"} 1' in text
+    for line in text.splitlines():
+        assert line.startswith("#") or len(line.rsplit(" ", 1)) == 2
+
+
+def test_events_file_is_aggregated_per_session(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    run, worker, other = (Telemetry(path, PRICES, session=s) for s in ("run", "run", "other"))
+    record_calls(run)
+    worker.record("llm", "extract_product_data", 0.5, prompt_tokens=10)
+    other.record("http", "fetch", 1.0)
+    for telemetry in (run, worker, other):
+        telemetry.close()
+
+    with open(path, encoding="utf-8") as f:
+        events = [json.loads(line) for line in f]
+    assert len(events) == 7 and {e["session"] for e in events} == {"run", "other"}
+
+    merged = {(s["kind"], s["stage"]): s for s in Telemetry.from_events(path, session="run").stats()}
+    assert merged[("llm", "extract_product_data")]["calls"] == 5
+    assert merged[("http", "fetch")]["calls"] == 1
+    assert len(Telemetry.from_events(path).stats()) == 2